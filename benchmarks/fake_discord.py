@@ -0,0 +1,166 @@
+"""
+Objetos do Discord de mentira para o teste de carga: guilds, canais, mensagens e
+Interactions com só o que os cogs usam. Nenhum deles fala com o Discord; cada
+chamada à "API" espera `latency` segundos, como uma ida e volta à REST.
+"""
+import asyncio
+import itertools
+
+import discord
+
+_ids = itertools.count(10**17)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class DiscordLatency:
+    """Latência simulada das chamadas à API do Discord, compartilhada por todos os objetos falsos."""
+    seconds = 0.0
+
+    @classmethod
+    async def wait(cls):
+        if cls.seconds:
+            await asyncio.sleep(cls.seconds)
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel", **fields):
+        self.id = next_id()
+        self.channel = channel
+        self.fields = fields
+
+    async def edit(self, **fields) -> "FakeMessage":
+        await DiscordLatency.wait()
+        self.fields.update(fields)
+        return self
+
+    async def delete(self):
+        await DiscordLatency.wait()
+
+
+class FakeTextChannel:
+    def __init__(self, guild: "FakeGuild"):
+        self.id = next_id()
+        self.guild = guild
+        self.sent = 0
+
+    async def send(self, content=None, **fields) -> FakeMessage:
+        await DiscordLatency.wait()
+        self.sent += 1
+        return FakeMessage(self, content=content, **fields)
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild"):
+        self.id = next_id()
+        self.guild = guild
+        self.bot = False
+        self.name = self.display_name = f"ouvinte-{self.id}"
+        self.mention = f"<@{self.id}>"
+        self.voice: FakeVoiceState | None = None
+
+
+class FakeVoiceState:
+    def __init__(self, channel: "FakeVoiceChannel"):
+        self.channel = channel
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: "FakeGuild"):
+        self.id = next_id()
+        self.guild = guild
+        self.name = "Música"
+        self.members: list[FakeMember] = []
+
+    async def connect(self, *, cls, **kwargs):
+        """Como `VoiceChannel.connect`, mas o "aperto de mão" de voz é dado como concluído na hora."""
+        await DiscordLatency.wait()
+        client = self.guild.client
+        player = cls(client, self)
+        client._connection._add_voice_client(self.guild.id, player)
+        player._connected = True
+        player.node._players[self.guild.id] = player
+        return player
+
+
+class FakeGuild:
+    def __init__(self, client: discord.Client):
+        self.id = next_id()
+        self.client = client
+        self.name = f"Servidor {self.id}"
+        self.text_channel = FakeTextChannel(self)
+        self.voice_channel = FakeVoiceChannel(self)
+        self.member = FakeMember(self)
+        self.member.voice = FakeVoiceState(self.voice_channel)
+        self.voice_channel.members.append(self.member)
+
+    @property
+    def voice_client(self):
+        return self.client._connection._get_voice_client(self.id)
+
+    def get_channel(self, channel_id: int):
+        return next((channel for channel in (self.text_channel, self.voice_channel) if channel.id == channel_id), None)
+
+    async def change_voice_state(self, *, channel=None, **kwargs):
+        await DiscordLatency.wait()
+        if channel is None:
+            self.client._connection._remove_voice_client(self.id)
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, **fields):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        await DiscordLatency.wait()
+        self._done = True
+        self._interaction.responses.append(fields)
+
+    async def defer(self, **fields):
+        await self._respond(**fields)
+
+    async def send_message(self, content=None, **fields):
+        await self._respond(content=content, **fields)
+
+    async def edit_message(self, **fields):
+        await self._respond(**fields)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, **fields):
+        await DiscordLatency.wait()
+        self._interaction.responses.append({"content": content, **fields})
+        return FakeMessage(self._interaction.channel, content=content, **fields)
+
+
+class FakeInteraction:
+    """Uma Interaction de comando de barra vinda de `guild.member`, no canal de texto da guild."""
+
+    def __init__(self, guild: FakeGuild):
+        self.id = next_id()
+        self.client = guild.client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = guild.text_channel
+        self.user = guild.member
+        self.extras: dict = {}
+        self.command = None
+        self.responses: list[dict] = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, **fields):
+        await DiscordLatency.wait()
+        self.responses.append(fields)
+        return FakeMessage(self.channel, **fields)
@@ -0,0 +1,280 @@
+"""
+Lavalink e Spotify de mentira para o teste de carga (`benchmarks/load_test.py`).
+
+Um único servidor aiohttp responde:
+- a REST do Lavalink v4 (`/v4/loadtracks`, PATCH/DELETE de players, `/v4/stats`, sessão);
+- o websocket do Lavalink (`ready`, `TrackStartEvent`, `TrackEndEvent`), tocando cada
+  música por `track_seconds` segundos de verdade, para gerar eventos de fim de faixa;
+- a retomada de sessão: com `resuming` ligado, os players continuam tocando depois que o
+  bot cai e voltam para quem reconectar com o mesmo Session-Id dentro do prazo;
+- o token e os endpoints da Web API do Spotify usados pelo SpotifyClient.
+
+Cada requisição REST espera `latency_ms` antes de responder. O servidor roda em outro
+processo (`start_in_process`), para não disputar o event loop com o bot medido.
+
+Formato das buscas entendidas pelo Lavalink falso:
+    "ytmsearch:qualquer coisa"      -> 5 resultados, sempre os mesmos para o mesmo texto
+    "ytmsearch:playlist 250 ..."    -> uma playlist com 250 músicas
+    "https://www.youtube.com/..."   -> a faixa do link
+"""
+import asyncio
+import multiprocessing
+import time
+import uuid
+import zlib
+
+from aiohttp import WSMsgType, web
+
+from benchmarks.queue_bench import fake_payload
+
+SEARCH_RESULTS = 5
+# Faixas "existentes" no Lavalink falso; as buscas caem dentro deste intervalo
+CATALOG_SIZE = 1_000_000
+
+
+def _track_index(encoded: str) -> int:
+    # fake_payload gera "QAAA" + índice com 8 dígitos + preenchimento
+    return int(encoded[4:12])
+
+
+def spotify_track(i: int) -> dict:
+    return {
+        "id": f"{i:022d}",
+        "name": f"Música número {i}",
+        "artists": [{"name": f"Artista {i % 500}"}],
+        "external_ids": {"isrc": f"BRXXX{i:07d}"},
+        "duration_ms": 180_000 + i,
+    }
+
+
+class FakeLavalink:
+    def __init__(self, latency_ms: float = 5, track_seconds: float = 5):
+        self.latency = latency_ms / 1000
+        self.track_seconds = track_seconds
+        self.sockets: dict[str, web.WebSocketResponse] = {}
+        # (sessão, guild) -> (payload da faixa atual, timer do fim)
+        self.players: dict[tuple[str, str], tuple[dict, asyncio.TimerHandle]] = {}
+        # Sessão -> prazo de retomada (segundos), quando o bot pediu `resuming`
+        self.resuming: dict[str, int] = {}
+        # Sessões sem websocket esperando a retomada -> timer que as encerra
+        self.detached: dict[str, asyncio.TimerHandle] = {}
+        self.started = time.time()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/version", self.version)
+        app.router.add_get("/v4/info", self.info)
+        app.router.add_get("/v4/websocket", self.websocket)
+        app.router.add_get("/v4/loadtracks", self.load_tracks)
+        app.router.add_get("/v4/sessions/{session}/players", self.list_players)
+        app.router.add_patch("/v4/sessions/{session}/players/{guild}", self.update_player)
+        app.router.add_delete("/v4/sessions/{session}/players/{guild}", self.destroy_player)
+        app.router.add_patch("/v4/sessions/{session}", self.update_session)
+        app.router.add_get("/v4/stats", self.stats)
+
+        app.router.add_post("/api/token", self.spotify_token)
+        app.router.add_get("/v1/search", self.spotify_search)
+        app.router.add_get("/v1/tracks/{id}", self.spotify_get_track)
+        app.router.add_get("/v1/playlists/{id}", self.spotify_playlist)
+        app.router.add_get("/v1/playlists/{id}/tracks", self.spotify_collection_tracks)
+        app.router.add_get("/v1/albums/{id}/tracks", self.spotify_collection_tracks)
+        return app
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # --- LAVALINK ---
+    async def version(self, request: web.Request) -> web.Response:
+        return web.Response(text="4.0.0")
+
+    async def info(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "version": {"semver": "4.0.0", "major": 4, "minor": 0, "patch": 0, "preRelease": None, "build": None},
+            "buildTime": int(self.started * 1000),
+            "git": {"branch": "main", "commit": "0" * 40, "commitTime": int(self.started * 1000)},
+            "jvm": "-", "lavaplayer": "-",
+            "sourceManagers": ["youtube"], "filters": [], "plugins": [],
+        })
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session_id = request.headers.get("Session-Id")
+        resumed = session_id in self.detached
+        if resumed:
+            self.detached.pop(session_id).cancel()
+        else:
+            session_id = uuid.uuid4().hex[:16]
+        self.sockets[session_id] = ws
+        await ws.send_json({"op": "ready", "resumed": resumed, "sessionId": session_id})
+        try:
+            async for message in ws:
+                if message.type is WSMsgType.ERROR:
+                    break
+        finally:
+            self.sockets.pop(session_id, None)
+            timeout = self.resuming.get(session_id)
+            if timeout:
+                # Os players continuam tocando até o prazo da retomada
+                self.detached[session_id] = asyncio.get_running_loop().call_later(timeout, self._close_session, session_id)
+            else:
+                self._close_session(session_id)
+        return ws
+
+    def _close_session(self, session_id: str):
+        self.detached.pop(session_id, None)
+        self.resuming.pop(session_id, None)
+        for key in [key for key in self.players if key[0] == session_id]:
+            self.players.pop(key)[1].cancel()
+
+    async def load_tracks(self, request: web.Request) -> web.Response:
+        await self._delay()
+        identifier = request.query.get("identifier", "")
+        if "://" in identifier:
+            video_id = identifier.rsplit("=", 1)[-1]
+            index = int(video_id) if video_id.isdigit() else zlib.crc32(video_id.encode()) % CATALOG_SIZE
+            return web.json_response({"loadType": "track", "data": fake_payload(index)})
+
+        query = identifier.split(":", 1)[-1]
+        seed = zlib.crc32(query.encode()) % CATALOG_SIZE
+        words = query.split()
+        if len(words) >= 2 and words[0] == "playlist" and words[1].isdigit():
+            tracks = [fake_payload((seed + i) % CATALOG_SIZE) for i in range(int(words[1]))]
+            return web.json_response({
+                "loadType": "playlist",
+                "data": {"info": {"name": f"Playlist {seed}", "selectedTrack": -1}, "pluginInfo": {}, "tracks": tracks},
+            })
+        return web.json_response({"loadType": "search", "data": [fake_payload((seed + i) % CATALOG_SIZE) for i in range(SEARCH_RESULTS)]})
+
+    async def _event(self, session_id: str, guild_id: str, type: str, track: dict, **extra):
+        ws = self.sockets.get(session_id)
+        if ws is not None and not ws.closed:
+            await ws.send_json({"op": "event", "type": type, "guildId": guild_id, "track": track, **extra})
+
+    def _finish(self, session_id: str, guild_id: str):
+        current = self.players.pop((session_id, guild_id), None)
+        if current:
+            asyncio.create_task(self._event(session_id, guild_id, "TrackEndEvent", current[0], reason="finished"))
+
+    def _player_response(self, guild_id: str, current, data: dict) -> dict:
+        return {
+            "guildId": guild_id,
+            "track": current[0] if current else None,
+            "volume": data.get("volume", 100),
+            "paused": data.get("paused", False),
+            "state": {"time": int(time.time() * 1000), "position": data.get("position", 0), "connected": True, "ping": 0},
+            "voice": {"token": "", "endpoint": "", "sessionId": "", "channelId": data.get("channelId")},
+            "filters": data.get("filters") or {},
+        }
+
+    async def list_players(self, request: web.Request) -> web.Response:
+        await self._delay()
+        session_id = request.match_info["session"]
+        return web.json_response([
+            self._player_response(guild_id, current, {"position": int((self.track_seconds - (current[1].when() - asyncio.get_running_loop().time())) * 1000)})
+            for (session, guild_id), current in self.players.items() if session == session_id
+        ])
+
+    async def update_player(self, request: web.Request) -> web.Response:
+        await self._delay()
+        session_id, guild_id = request.match_info["session"], request.match_info["guild"]
+        data = await request.json()
+        key = (session_id, guild_id)
+        current = self.players.get(key)
+
+        track = data.get("track")
+        if track is not None and "encoded" in track:
+            no_replace = request.query.get("noReplace", "false").lower() == "true"
+            if track["encoded"] is None:
+                if current:
+                    self.players.pop(key)[1].cancel()
+                    await self._event(session_id, guild_id, "TrackEndEvent", current[0], reason="stopped")
+                current = None
+            elif not (no_replace and current):
+                if current:
+                    self.players.pop(key)[1].cancel()
+                    await self._event(session_id, guild_id, "TrackEndEvent", current[0], reason="replaced")
+                payload = fake_payload(_track_index(track["encoded"]))
+                payload["userData"] = track.get("userData") or {}
+                timer = asyncio.get_running_loop().call_later(self.track_seconds, self._finish, session_id, guild_id)
+                current = self.players[key] = (payload, timer)
+                await self._event(session_id, guild_id, "TrackStartEvent", payload)
+
+        return web.json_response(self._player_response(guild_id, current, data))
+
+    async def destroy_player(self, request: web.Request) -> web.Response:
+        await self._delay()
+        current = self.players.pop((request.match_info["session"], request.match_info["guild"]), None)
+        if current:
+            current[1].cancel()
+        return web.Response(status=204)
+
+    async def update_session(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if data.get("resuming"):
+            self.resuming[request.match_info["session"]] = data.get("timeout", 60)
+        else:
+            self.resuming.pop(request.match_info["session"], None)
+        return web.json_response({"resuming": data.get("resuming", False), "timeout": data.get("timeout", 60)})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return web.json_response({
+            "players": len(self.players),
+            "playingPlayers": len(self.players),
+            "uptime": int((time.time() - self.started) * 1000),
+            "memory": {"free": 0, "used": 0, "allocated": 0, "reservable": 0},
+            "cpu": {"cores": 1, "systemLoad": 0.0, "lavalinkLoad": 0.0},
+        })
+
+    # --- SPOTIFY ---
+    async def spotify_token(self, request: web.Request) -> web.Response:
+        return web.json_response({"access_token": "load-test", "token_type": "Bearer", "expires_in": 3600})
+
+    async def spotify_search(self, request: web.Request) -> web.Response:
+        await self._delay()
+        index = zlib.crc32(request.query.get("q", "").encode()) % CATALOG_SIZE
+        return web.json_response({"tracks": {"items": [spotify_track(index)], "total": 1}})
+
+    async def spotify_get_track(self, request: web.Request) -> web.Response:
+        await self._delay()
+        track_id = request.match_info["id"]
+        return web.json_response(spotify_track(int(track_id) if track_id.isdigit() else 0))
+
+    async def spotify_playlist(self, request: web.Request) -> web.Response:
+        await self._delay()
+        playlist_id = request.match_info["id"]
+        return web.json_response({"snapshot_id": f"snapshot-{playlist_id}", "name": f"Playlist {playlist_id}"})
+
+    async def spotify_collection_tracks(self, request: web.Request) -> web.Response:
+        """IDs de playlist/álbum no formato "<tamanho>x<semente>", ex: 300x42."""
+        await self._delay()
+        size, _, seed = request.match_info["id"].partition("x")
+        size, seed = int(size or 0), int(seed or 0)
+        offset, limit = int(request.query.get("offset", 0)), int(request.query.get("limit", 100))
+        tracks = [spotify_track((seed * 1000 + i) % CATALOG_SIZE) for i in range(offset, min(offset + limit, size))]
+        items = [{"track": track} for track in tracks] if "playlists" in request.path else tracks
+        return web.json_response({"items": items, "total": size, "offset": offset, "limit": limit})
+
+
+def _serve(port: int, latency_ms: float, track_seconds: float, ready):
+    async def main():
+        runner = web.AppRunner(FakeLavalink(latency_ms, track_seconds).app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def start_in_process(port: int, latency_ms: float, track_seconds: float) -> multiprocessing.Process:
+    """Sobe o servidor falso em um processo separado e espera ele aceitar conexões."""
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(port, latency_ms, track_seconds, ready), daemon=True)
+    process.start()
+    if not ready.wait(10):
+        process.terminate()
+        raise RuntimeError("O Lavalink falso não subiu a tempo.")
+    return process
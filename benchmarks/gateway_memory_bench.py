@@ -0,0 +1,163 @@
+"""
+Memória do cache do gateway por guild: caches completos (`LOW_MEMORY_CACHE=0`) x
+modo econômico (padrão). Ver utils/gateway_cache.py.
+
+Nenhuma conexão com o Discord: os eventos do gateway (GUILD_CREATE, VOICE_STATE_UPDATE,
+MESSAGE_CREATE) são montados aqui e entregues direto ao `ConnectionState` do discord.py,
+como o shard faria. Cada modo só recebe o que os intents dele pedem: sem
+`message_content` as mensagens chegam sem texto, embeds e anexos, e sem `guild_messages`
+elas nem chegam. Os payloads são determinísticos, então o resultado se repete.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.gateway_memory_bench [guilds] [mensagens_por_guild]
+"""
+import gc
+import itertools
+import sys
+import tracemalloc
+
+import discord
+
+from utils.gateway_cache import client_options
+
+TEXT_CHANNELS = 15
+VOICE_CHANNELS = 5
+ROLES = 20
+EMOJIS = 30
+STICKERS = 5
+# Pessoas em canais de voz em cada guild (o bot inclusive)
+IN_VOICE = 4
+TIMESTAMP = "2024-01-01T12:00:00.000000+00:00"
+BOT_ID = 10**17
+
+
+def _user(user_id: int, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": f"pessoa{user_id % 10**6}", "discriminator": "0",
+            "global_name": f"Pessoa {user_id % 10**6}", "avatar": "a" * 32, "bot": bot}
+
+
+def _member(user_id: int, with_user: bool = True) -> dict:
+    member = {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False, "flags": 0, "nick": None}
+    if with_user:
+        member["user"] = _user(user_id, bot=user_id == BOT_ID)
+    return member
+
+
+def _voice_state(guild_id: int, channel_id: int, user_id: int) -> dict:
+    return {"guild_id": str(guild_id), "channel_id": str(channel_id), "user_id": str(user_id),
+            "session_id": "s" * 32, "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+            "self_video": False, "suppress": False, "request_to_speak_timestamp": None, "member": _member(user_id)}
+
+
+def guild_create(guild_id: int) -> dict:
+    """GUILD_CREATE de uma guild sem o intent de membros: só o bot e quem está em voz vêm junto."""
+    ids = itertools.count(guild_id + 1)
+    channels = [{"id": str(next(ids)), "type": 0, "name": f"texto-{i}", "position": i, "permission_overwrites": [],
+                 "nsfw": False, "parent_id": None, "topic": "Canal de conversa " * 3, "rate_limit_per_user": 0}
+                for i in range(TEXT_CHANNELS)]
+    channels += [{"id": str(next(ids)), "type": 2, "name": f"voz-{i}", "position": i, "permission_overwrites": [],
+                  "nsfw": False, "parent_id": None, "bitrate": 64000, "user_limit": 0, "rtc_region": None}
+                 for i in range(VOICE_CHANNELS)]
+    voice_channel = int(channels[TEXT_CHANNELS]["id"])
+    listeners = [BOT_ID] + [next(ids) for _ in range(IN_VOICE - 1)]
+    return {
+        "id": str(guild_id), "name": f"Servidor {guild_id}", "icon": None, "splash": None, "banner": None,
+        "owner_id": str(listeners[-1]), "afk_timeout": 300, "verification_level": 1, "default_message_notifications": 1,
+        "explicit_content_filter": 0, "features": ["COMMUNITY", "NEWS"], "mfa_level": 0, "premium_tier": 1,
+        "member_count": 500, "large": True, "unavailable": False, "system_channel_id": channels[0]["id"],
+        "roles": [{"id": str(guild_id if i == 0 else next(ids)), "name": f"cargo-{i}", "color": 0, "hoist": False,
+                   "position": i, "permissions": "1071698660929", "managed": False, "mentionable": False, "flags": 0}
+                  for i in range(ROLES)],
+        "emojis": [{"id": str(next(ids)), "name": f"emoji_{i}", "roles": [], "require_colons": True,
+                    "managed": False, "animated": False, "available": True} for i in range(EMOJIS)],
+        "stickers": [{"id": str(next(ids)), "name": f"sticker-{i}", "tags": "boris", "type": 2, "format_type": 1,
+                      "description": "Figurinha", "available": True, "guild_id": str(guild_id)} for i in range(STICKERS)],
+        "channels": channels,
+        "threads": [],
+        "members": [_member(user_id) for user_id in listeners],
+        "voice_states": [{key: value for key, value in _voice_state(guild_id, voice_channel, user_id).items() if key != "member"}
+                         for user_id in listeners],
+        "presences": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
+
+
+def message_create(guild: dict, index: int, with_content: bool) -> dict:
+    """Mensagem de um membro qualquer num canal de texto da guild (de outro bot a cada 5, com embed)."""
+    channel = guild["channels"][index % TEXT_CHANNELS]
+    author_id = int(guild["id"]) + 10_000 + index % 50
+    message = {
+        "id": str(int(guild["id"]) + 100_000 + index), "channel_id": channel["id"], "guild_id": guild["id"],
+        "author": _user(author_id, bot=index % 5 == 0), "member": _member(author_id, with_user=False),
+        "content": "", "timestamp": TIMESTAMP, "edited_timestamp": None, "tts": False, "mention_everyone": False,
+        "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+    }
+    if with_content:
+        message["content"] = "alguém viu o jogo de ontem? " * 3
+        if index % 5 == 0:
+            message["embeds"] = [{"type": "rich", "title": "Tocando agora", "description": "Uma música qualquer - Artista " * 2,
+                                  "color": 5814783, "thumbnail": {"url": "https://i.ytimg.com/vi/abc/hqdefault.jpg"},
+                                  "fields": [{"name": "Duração", "value": "3:45", "inline": True}]}]
+        if index % 10 == 0:
+            message["attachments"] = [{"id": str(author_id), "filename": "foto.png", "size": 123456,
+                                       "url": "https://cdn.discordapp.com/attachments/1/2/foto.png",
+                                       "proxy_url": "https://media.discordapp.net/attachments/1/2/foto.png"}]
+    return message
+
+
+def feed(low_memory: bool, guilds: int, messages: int) -> discord.Client:
+    """Um cliente no modo pedido, com `guilds` guilds e `messages` mensagens em cada uma."""
+    client = discord.Client(**client_options(low_memory))
+    state = client._connection
+    intents = state._intents
+    state.user = discord.ClientUser(state=state, data={**_user(BOT_ID, bot=True), "verified": True, "mfa_enabled": False, "flags": 0})
+
+    payloads = [guild_create(BOT_ID + (guild + 1) * 10**9) for guild in range(guilds)]
+    for payload in payloads:
+        state._add_guild_from_data(payload)
+    # Mais alguém entra em um canal de voz em cada guild
+    for payload in payloads:
+        state.parse_voice_state_update(_voice_state(int(payload["id"]), int(payload["channels"][TEXT_CHANNELS]["id"]), int(payload["id"]) + 9_999))
+    if intents.guild_messages:
+        # As guilds conversam ao mesmo tempo: as mensagens chegam intercaladas
+        for index in range(messages):
+            for payload in payloads:
+                state.parse_message_create(message_create(payload, index, intents.message_content))
+    return client
+
+
+def measure(low_memory: bool, guilds: int, messages: int) -> tuple[int, discord.Client]:
+    """Bytes mantidos pelo cache depois de receber todos os eventos."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    client = feed(low_memory, guilds, messages)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, client
+
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"{guilds} guilds x {messages} mensagens")
+    print(f"{'cache':<12}{'total (MB)':>12}{'por guild (B)':>16}{'mensagens':>12}{'membros':>10}")
+    results = {}
+    for label, low_memory in (("completo", False), ("econômico", True)):
+        size, client = measure(low_memory, guilds, messages)
+        results[label] = size
+        state = client._connection
+        cached_messages = len(state._messages) if state._messages is not None else 0
+        members = sum(len(guild._members) for guild in client.guilds)
+        print(f"{label:<12}{size / 1024 ** 2:>12.1f}{size / guilds:>16,.0f}{cached_messages:>12,}{members:>10,}")
+        del client, state
+        gc.collect()
+
+    print(f"Redução: {1 - results['econômico'] / results['completo']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Teste de carga do DJ Boris: o `MyBot` completo, com todos os cogs, contra o Lavalink e o
+Spotify falsos de `benchmarks/fake_services.py` e Interactions sintéticas
+(`benchmarks/fake_discord.py`), em milhares de guilds ao mesmo tempo.
+
+1. Aquecimento: cada guild dá um /play e começa a tocar.
+2. Carga: durante `--duration` segundos chegam `--rate` comandos por segundo (/play, /splay,
+   /skip, /queue, em guilds aleatórias), independente de os anteriores terem terminado.
+   As músicas acabam sozinhas a cada `--track-seconds`, gerando os eventos de fim de faixa.
+
+Mostra p50/p99 de cada comando, eventos do Lavalink por segundo e memória, e guarda o
+resultado em benchmarks/results/load_test.jsonl junto com o commit, comparando com a
+última execução com a mesma configuração.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.load_test --guilds 2000 --duration 60 --rate 200
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results", "load_test.jsonl")
+
+# Peso de cada comando na fase de carga
+COMMAND_WEIGHTS = {"play": 35, "queue": 30, "skip": 25, "splay": 10}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Teste de carga do DJ Boris com Lavalink/Discord falsos.")
+    parser.add_argument("--guilds", type=int, default=1000, help="Guilds simuladas.")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos da fase de carga.")
+    parser.add_argument("--rate", type=float, default=100, help="Comandos por segundo na fase de carga.")
+    parser.add_argument("--track-seconds", type=float, default=5, help="Quanto cada música toca no Lavalink falso.")
+    parser.add_argument("--lavalink-latency-ms", type=float, default=5, help="Latência de cada chamada REST ao Lavalink/Spotify.")
+    parser.add_argument("--discord-latency-ms", type=float, default=20, help="Latência de cada chamada à API do Discord.")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Buscas diferentes usadas no /play (define o acerto do cache).")
+    parser.add_argument("--port", type=int, default=2444, help="Porta do Lavalink/Spotify falso.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado em benchmarks/results.")
+    return parser.parse_args(argv)
+
+
+def config_of(args: argparse.Namespace) -> dict:
+    return {key: value for key, value in vars(args).items() if key not in ("port", "no_save")}
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Sem /proc: o pico (em KiB no Linux, em bytes no macOS) é o melhor que dá
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p * (len(ordered) - 1)))]
+
+
+def git_revision() -> tuple[str, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "-uno"], capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido", False
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.events: Counter[str] = Counter()
+        self.bot = None
+        self.guilds = []
+
+    # --- PREPARAÇÃO ---
+    async def start_bot(self):
+        import discord
+        import wavelink
+
+        from benchmarks.fake_discord import FakeGuild, next_id
+        from main import MyBot
+
+        bot = self.bot = MyBot()
+        bot._connection.user = discord.ClientUser(state=bot._connection, data={
+            "id": next_id(), "username": "DJ Boris", "discriminator": "0", "avatar": None, "global_name": None, "bot": True,
+        })
+        await bot._async_setup_hook()
+
+        async def no_sync(*args, **kwargs):
+            return []
+
+        # Nada de falar com o Discord: a sincronização de comandos vira um no-op
+        bot.tree.sync = no_sync
+        await bot.setup_hook()
+
+        deadline = time.monotonic() + 10
+        while any(node.status is not wavelink.NodeStatus.CONNECTED for node in wavelink.Pool.nodes.values()):
+            if time.monotonic() > deadline:
+                raise RuntimeError("O bot não conectou ao Lavalink falso.")
+            await asyncio.sleep(0.05)
+
+        for event in ("track_start", "track_end"):
+            bot.add_listener(self._counter(event), f"on_wavelink_{event}")
+
+        for _ in range(self.args.guilds):
+            guild = FakeGuild(bot)
+            bot._connection._guilds[guild.id] = guild
+            self.guilds.append(guild)
+
+    def _counter(self, event: str):
+        async def count(payload):
+            self.events[event] += 1
+        return count
+
+    # --- COMANDOS ---
+    def _arguments(self, name: str) -> dict:
+        n = self.random.randrange(self.args.vocabulary)
+        if name == "play":
+            # De vez em quando, uma playlist inteira
+            return {"busca": f"playlist 200 {n}" if self.random.random() < 0.05 else f"música {n}"}
+        if name == "splay":
+            if self.random.random() < 0.5:
+                return {"link_ou_nome": f"https://open.spotify.com/playlist/100x{n}"}
+            return {"link_ou_nome": f"faixa {n}"}
+        return {}
+
+    async def run_command(self, guild, name: str, label: str | None = None):
+        from benchmarks.fake_discord import FakeInteraction
+
+        command = self.bot.tree.get_command(name)
+        interaction = FakeInteraction(guild)
+        interaction.command = command
+        started = time.perf_counter()
+        try:
+            # Direto no callback: o que se mede é o comando, não a árvore do discord.py
+            await command.callback(command.binding, interaction, **self._arguments(name))
+        except Exception as e:
+            label = label or name
+            self.errors[label] += 1
+            if self.errors[label] <= 3:
+                print(f"Erro no /{name}: {e!r}")
+        self.latencies[label or name].append(time.perf_counter() - started)
+
+    async def warm_up(self):
+        semaphore = asyncio.Semaphore(max(1, int(self.args.rate)))
+
+        async def first_play(guild):
+            async with semaphore:
+                await self.run_command(guild, "play", label="play (1º)")
+
+        await asyncio.gather(*(first_play(guild) for guild in self.guilds))
+
+    async def load(self) -> float:
+        names, weights = list(COMMAND_WEIGHTS), list(COMMAND_WEIGHTS.values())
+        interval = 1 / self.args.rate
+        pending = set()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0
+        # Carga em malha aberta: o próximo comando sai no horário, mesmo que o anterior não tenha acabado
+        while (now := loop.time()) - started < self.args.duration:
+            due = int((now - started) / interval) + 1
+            for _ in range(due - sent):
+                name = self.random.choices(names, weights)[0]
+                task = asyncio.create_task(self.run_command(self.random.choice(self.guilds), name))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            sent = due
+            await asyncio.sleep(interval)
+        if pending:
+            await asyncio.wait(pending, timeout=30)
+        return loop.time() - started
+
+    # --- EXECUÇÃO ---
+    async def run(self) -> dict:
+        from benchmarks.fake_discord import DiscordLatency
+
+        DiscordLatency.seconds = self.args.discord_latency_ms / 1000
+        gc.collect()
+        rss_start = rss_bytes()
+        await self.start_bot()
+
+        started = time.perf_counter()
+        await self.warm_up()
+        warm_up_seconds = time.perf_counter() - started
+        gc.collect()
+        rss_warm = rss_bytes()
+
+        self.events.clear()
+        elapsed = await self.load()
+        events = dict(self.events)
+        gc.collect()
+        rss_end = rss_bytes()
+
+        try:
+            await self.bot.close()
+        except Exception as e:
+            print(f"Erro ao fechar o bot: {e!r}")
+
+        commands = {
+            name: {
+                "count": len(values),
+                "errors": self.errors[name],
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            }
+            for name, values in sorted(self.latencies.items())
+        }
+        load_commands = sum(len(self.latencies[name]) for name in COMMAND_WEIGHTS)
+        return {
+            "commands": commands,
+            "commands_per_second": round(load_commands / elapsed, 1),
+            "events": events,
+            "events_per_second": round(sum(events.values()) / elapsed, 1),
+            "warm_up_seconds": round(warm_up_seconds, 2),
+            "rss_mb": round(rss_end / 2**20, 1),
+            "bytes_per_guild": round((rss_warm - rss_start) / max(1, self.args.guilds)),
+            "growth_during_load_mb": round((rss_end - rss_warm) / 2**20, 1),
+        }
+
+
+# --- RELATÓRIO ---
+def previous_run(config: dict) -> dict | None:
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    last = None
+    with open(RESULTS_FILE, encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            if record.get("config") == config:
+                last = record
+    return last
+
+
+def _delta(now: float, before: float | None) -> str:
+    if not before:
+        return ""
+    return f" ({(now - before) / before * 100:+.1f}%)"
+
+
+def report(results: dict, previous: dict | None):
+    before = previous["results"] if previous else {}
+    before_commands = before.get("commands", {})
+    if previous:
+        print(f"Comparando com {previous['commit']}{' (com mudanças locais)' if previous['dirty'] else ''} de {previous['date']}")
+
+    print(f"{'comando':<12}{'execuções':>10}{'erros':>7}{'p50 (ms)':>24}{'p99 (ms)':>24}")
+    for name, stats in results["commands"].items():
+        old = before_commands.get(name, {})
+        p50 = f"{stats['p50_ms']:.1f}{_delta(stats['p50_ms'], old.get('p50_ms'))}"
+        p99 = f"{stats['p99_ms']:.1f}{_delta(stats['p99_ms'], old.get('p99_ms'))}"
+        print(f"{name:<12}{stats['count']:>10}{stats['errors']:>7}{p50:>24}{p99:>24}")
+
+    print()
+    for key, label in (("commands_per_second", "Comandos/s"), ("events_per_second", "Eventos do Lavalink/s"),
+                       ("rss_mb", "Memória (RSS, MB)"), ("bytes_per_guild", "Bytes por guild"),
+                       ("growth_during_load_mb", "Crescimento na carga (MB)"), ("warm_up_seconds", "Aquecimento (s)")):
+        print(f"{label:<28}{results[key]}{_delta(results[key], before.get(key))}")
+
+
+def save(config: dict, results: dict):
+    commit, dirty = git_revision()
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    record = {"commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%d %H:%M:%S"), "config": config, "results": results}
+    with open(RESULTS_FILE, "a", encoding="utf-8") as file:
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"\nResultado salvo em {os.path.relpath(RESULTS_FILE)} (commit {commit}{', com mudanças locais' if dirty else ''}).")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # O bot lê estas variáveis ao importar/carregar os cogs: tudo aponta para os serviços falsos
+    base = f"http://127.0.0.1:{args.port}"
+    os.environ.update({
+        "LAVALINK_NODES": f"127.0.0.1:{args.port}:load-test",
+        "SPOTIPY_CLIENT_ID": "load-test",
+        "SPOTIPY_CLIENT_SECRET": "load-test",
+        "SPOTIFY_API_BASE": f"{base}/v1",
+        "SPOTIFY_TOKEN_URL": f"{base}/api/token",
+        "BORIS_DATA_DIR": tempfile.mkdtemp(prefix="boris-load-test-"),
+        "METRICS_PORT": "",
+    })
+
+    from benchmarks.fake_services import start_in_process
+
+    server = start_in_process(args.port, args.lavalink_latency_ms, args.track_seconds)
+    try:
+        print(f"Teste de carga: {args.guilds} guilds, {args.rate:g} comandos/s por {args.duration:g}s\n")
+        results = asyncio.run(LoadTest(args).run())
+    finally:
+        server.terminate()
+
+    config = config_of(args)
+    print()
+    report(results, previous_run(config))
+    if not args.no_save:
+        save(config, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compara a fila antiga (`wavelink.Queue` + `list(queue)[:10]`) com a `IndexedQueue`
+em filas de 10 a 10.000 músicas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.queue_bench
+"""
+import random
+import time
+
+import wavelink
+
+from utils.queue import IndexedQueue
+
+SIZES = (10, 100, 1_000, 10_000)
+ROUNDS = 200
+
+
+def fake_payload(i: int) -> dict:
+    """Payload no formato do Lavalink, com campos de tamanho parecido com os de uma faixa real do YouTube."""
+    identifier = f"{i:011d}"
+    return {
+        "encoded": f"QAAA{i:08d}" + "x" * 160,
+        "info": {
+            "identifier": identifier,
+            "isSeekable": True,
+            "author": f"Artista {i % 500} - Topic",
+            "length": 180_000 + i,
+            "isStream": False,
+            "position": 0,
+            "title": f"Música número {i} (Official Audio)",
+            "uri": f"https://www.youtube.com/watch?v={identifier}",
+            "artworkUrl": f"https://i.ytimg.com/vi/{identifier}/maxresdefault.jpg",
+            "isrc": None,
+            "sourceName": "youtube",
+        },
+        "pluginInfo": {},
+        "userData": {},
+    }
+
+
+def fake_track(i: int) -> wavelink.Playable:
+    return wavelink.Playable(fake_payload(i))
+
+
+def timed(fn) -> float:
+    """Tempo médio de `fn()` em microssegundos."""
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - started) / ROUNDS * 1e6
+
+
+def bench(size: int) -> dict[str, float]:
+    tracks = [fake_track(i) for i in range(size)]
+    old = wavelink.Queue()
+    old.put(tracks)
+    new = IndexedQueue()
+    new.put(tracks)
+    last_page = (size - 1) // 10
+
+    def old_move():
+        old._items.insert(random.randrange(size), old._items.pop(random.randrange(size)))
+
+    def old_remove_put():
+        del old[random.randrange(size)]
+        old.put(tracks[0])
+
+    def new_remove_put():
+        del new[random.randrange(size)]
+        new.put(tracks[0])
+
+    return {
+        "página (antes)": timed(lambda: list(old)[:10]),
+        "página (agora)": timed(lambda: new.page(last_page)),
+        "duração (antes)": timed(lambda: sum(track.length for track in old)),
+        "duração (agora)": timed(lambda: new.total_length),
+        "remover (antes)": timed(old_remove_put),
+        "remover (agora)": timed(new_remove_put),
+        "mover (antes)": timed(old_move),
+        "mover (agora)": timed(lambda: new.move(random.randrange(size), random.randrange(size))),
+    }
+
+
+def main():
+    results = {size: bench(size) for size in SIZES}
+    columns = list(next(iter(results.values())))
+
+    print(f"Latência média por operação (µs), {ROUNDS} rodadas")
+    print(f"{'operação':<18}" + "".join(f"{size:>12,}" for size in SIZES))
+    for column in columns:
+        print(f"{column:<18}" + "".join(f"{results[size][column]:>12.2f}" for size in SIZES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Memória ocupada pelas filas: `Playable` completos (antes) x `LazyTrack` (agora),
+com várias guilds simuladas, cada uma com uma playlist grande na fila.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.queue_memory_bench [guilds] [músicas_por_guild]
+"""
+import gc
+import sys
+import tracemalloc
+
+import wavelink
+
+from benchmarks.queue_bench import fake_payload
+from utils.queue import IndexedQueue, compact_tracks
+
+
+def measure(build) -> tuple[int, list]:
+    """Bytes alocados (e mantidos) por `build()`."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def build_queues(guilds: int, per_guild: int, compact: bool) -> list[IndexedQueue]:
+    queues = []
+    for guild in range(guilds):
+        # Como no /play: a playlist chega do Lavalink como Playables
+        tracks = [wavelink.Playable(fake_payload(guild * per_guild + i)) for i in range(per_guild)]
+        queue = IndexedQueue()
+        queue.put(compact_tracks(tracks, requester_id=1234567890123) if compact else tracks)
+        queues.append(queue)
+        del tracks
+    return queues
+
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_guild = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    entries = guilds * per_guild
+
+    print(f"{guilds} guilds x {per_guild:,} músicas ({entries:,} entradas)")
+    print(f"{'fila':<12}{'total (MB)':>14}{'por 1.000 (KB)':>18}{'por entrada (B)':>18}")
+    results = {}
+    for label, compact in (("Playable", False), ("LazyTrack", True)):
+        size, queues = measure(lambda: build_queues(guilds, per_guild, compact))
+        results[label] = size
+        print(f"{label:<12}{size / 1024 ** 2:>14.1f}{size / entries * 1000 / 1024:>18.1f}{size / entries:>18.0f}")
+        del queues
+
+    print(f"Redução: {1 - results['LazyTrack'] / results['Playable']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import json
+import multiprocessing
+import os
+import time
+import urllib.request
+from dotenv import load_dotenv
+
+from utils.cluster import ClusterLink, split_shards
+
+load_dotenv()
+
+TOKEN = os.getenv('DISCORD_TOKEN')
+# Quantidade de processos. Padrão: um por núcleo de CPU.
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", os.cpu_count() or 1))
+# Quantidade total de shards. Sem valor, usa a recomendação do Discord.
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+
+
+def recommended_shards(token: str) -> int:
+    """Pergunta ao Discord quantos shards ele recomenda para o bot (GET /gateway/bot)."""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DJ Boris (cluster launcher)"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as resp:
+        return json.load(resp)["shards"]
+
+
+def run_cluster(cluster_id: int, cluster_count: int, shard_ids: list[int], shard_count: int, stats, presence):
+    """Ponto de entrada de cada processo: um MyBot só com a sua faixa de shards."""
+    # Importado aqui para que cada processo monte seu próprio bot (e seu próprio event loop)
+    from main import MyBot
+
+    link = ClusterLink(cluster_id, cluster_count, shard_ids, shard_count, stats, presence)
+    bot = MyBot(shard_ids=shard_ids, shard_count=shard_count, cluster=link)
+    bot.run(TOKEN)
+
+
+def main():
+    shard_count = int(SHARD_COUNT) if SHARD_COUNT else recommended_shards(TOKEN)
+    ranges = split_shards(shard_count, CLUSTER_COUNT)
+    print(f"Iniciando {len(ranges)} cluster(s) para {shard_count} shard(s)...")
+
+    with multiprocessing.Manager() as manager:
+        stats = manager.dict()
+        presence = manager.Value('i', 0)
+
+        def spawn(cluster_id: int) -> multiprocessing.Process:
+            process = multiprocessing.Process(
+                target=run_cluster,
+                args=(cluster_id, len(ranges), ranges[cluster_id], shard_count, stats, presence),
+                name=f"boris-cluster-{cluster_id}",
+            )
+            process.start()
+            print(f"-> Cluster {cluster_id} (shards {ranges[cluster_id]}) iniciado, PID {process.pid}.")
+            return process
+
+        processes = {cluster_id: spawn(cluster_id) for cluster_id in range(len(ranges))}
+
+        # Supervisor: se um cluster cair, ele é reiniciado sem derrubar os outros
+        try:
+            while True:
+                time.sleep(5)
+                for cluster_id, process in list(processes.items()):
+                    if not process.is_alive():
+                        print(f"Cluster {cluster_id} caiu (código {process.exitcode}). Reiniciando...")
+                        stats.pop(cluster_id, None)
+                        processes[cluster_id] = spawn(cluster_id)
+        except KeyboardInterrupt:
+            print("Encerrando os clusters...")
+            for process in processes.values():
+                process.terminate()
+            for process in processes.values():
+                process.join()
+
+
+if __name__ == "__main__":
+    if TOKEN:
+        main()
+    else:
+        print("ERRO CRÍTICO: O token do Discord não foi encontrado no arquivo .env!")
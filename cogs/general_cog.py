@@ -1,3 +1,5 @@
+import math
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -21,6 +23,53 @@ class GeneralCog(commands.Cog):
             bot_user=self.bot.user
         ))
 
+    @app_commands.command(name="lavalink", description="Mostra a saúde e a latência dos nós do Lavalink.")
+    async def lavalink(self, interaction: discord.Interaction):
+        """Resumo de cada nó: status, latência da API, players e carga."""
+        embed = discord.Embed(title="🎛️ Nós do Lavalink", color=Embeds.COR_INFO)
+
+        for node in self.bot.node_balancer.summary():
+            latencia = f"{node['latency_ms']:.0f}ms" if node['latency_ms'] is not None else "N/A"
+            status = "🟢" if node['status'] == "CONNECTED" else "🔴"
+            embed.add_field(
+                name=f"{status} {node['identifier']}",
+                value=(
+                    f"Latência: `{latencia}`\n"
+                    f"Players: `{node['players']}`\n"
+                    f"CPU: `{node['system_load']:.0%}` | Frames perdidos: `{node['frame_deficit']}`\n"
+                    f"Penalidade: `{node['penalty']:.1f}`"
+                ),
+                inline=True
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="stats", description="Mostra as estatísticas globais do bot (todos os clusters).")
+    async def stats(self, interaction: discord.Interaction):
+        """Soma os números publicados por cada cluster (processo) do bot."""
+        await interaction.response.defer(ephemeral=True)
+        clusters = await self.bot.global_stats()
+
+        total_guilds = sum(c["guilds"] for c in clusters.values())
+        total_players = sum(c["players"] for c in clusters.values())
+        total_shards = sum(len(c["shards"]) for c in clusters.values())
+
+        embed = Embeds.info(
+            "Estatísticas Globais",
+            f"**Servidores:** `{total_guilds}`\n**Players ativos:** `{total_players}`\n"
+            f"**Shards:** `{total_shards}` em `{len(clusters)}` cluster(s)",
+            bot_user=self.bot.user
+        )
+        for cluster_id, c in sorted(clusters.items()):
+            # Antes do primeiro heartbeat de um shard, o discord.py informa latência NaN/inf
+            latencia = f"{round(c['latency'] * 1000)}ms" if math.isfinite(c['latency']) else "N/A"
+            embed.add_field(
+                name=f"Cluster {cluster_id}",
+                value=f"Servidores: `{c['guilds']}`\nPlayers: `{c['players']}`\nLatência: `{latencia}`",
+                inline=True
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
     @app_commands.command(name="ajuda", description="Mostra todos os meus comandos.")
     async def ajuda(self, interaction: discord.Interaction):
         """Mostra uma mensagem de ajuda dinâmica com todos os comandos do bot."""
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import os
+import time
+
+import discord
+import wavelink
+from discord import app_commands
+from discord.ext import commands
+
+from utils.embeds import Embeds
+from utils.metrics import measure_loop_lag, observe_command, registry
+from utils.profiler import LoopWatchdog, SamplingProfiler
+
+# Porta do endpoint /metrics (formato do Prometheus). Sem METRICS_PORT, nada é exposto.
+# Com o launcher de clusters, cada cluster usa METRICS_PORT + id do cluster.
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# A partir de quantos milissegundos um travamento do event loop é registrado com a pilha
+LOOP_STALL_THRESHOLD_MS = int(os.getenv("LOOP_STALL_THRESHOLD_MS", 250))
+
+
+async def is_owner(interaction: discord.Interaction) -> bool:
+    return await interaction.client.is_owner(interaction.user)
+
+
+class MetricsCog(commands.Cog, name="Métricas"):
+    """
+    Telemetria do bot: mede comandos, buscas, Spotify, filas, players por nó,
+    atraso do event loop e latência do gateway, sem código extra em cada comando.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._runner = None
+        self._lag_task: asyncio.Task | None = None
+        self.watchdog = LoopWatchdog(threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+        self.sampler = SamplingProfiler()
+
+        registry.gauge("boris_players", "Players ativos por nó do Lavalink.", ("node",), collect=self._players_per_node)
+        registry.gauge("boris_queue_tracks", "Músicas nas filas (total e maior fila).", ("kind",), collect=self._queue_lengths)
+        registry.gauge("boris_gateway_latency_seconds", "Latência do gateway do Discord por shard.", ("shard",), collect=self._gateway_latency)
+        registry.gauge("boris_guilds", "Servidores neste processo.", collect=lambda: [((), len(self.bot.guilds))])
+        registry.gauge("boris_outbound_queue_depth", "Mensagens esperando no OutboundScheduler.", collect=lambda: [((), self.bot.outbound.depth())])
+
+    async def cog_load(self):
+        self._lag_task = asyncio.create_task(measure_loop_lag())
+        self.watchdog.start()
+        if METRICS_PORT:
+            # O servidor HTTP do aiohttp só é importado quando o endpoint está ligado
+            from aiohttp import web
+
+            port = int(METRICS_PORT) + (self.bot.cluster.cluster_id if getattr(self.bot, 'cluster', None) else 0)
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, METRICS_HOST, port).start()
+            print(f"Métricas disponíveis em http://{METRICS_HOST}:{port}/metrics")
+
+    async def cog_unload(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        self.watchdog.stop()
+        if self.sampler.running:
+            self.sampler.stop()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle_metrics(self, request):
+        from aiohttp import web
+
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8", headers={"X-Content-Type-Options": "nosniff"})
+
+    # --- COLETA ---
+    def _players_per_node(self):
+        return [((node.identifier,), len(node.players)) for node in wavelink.Pool.nodes.values()]
+
+    def _queue_lengths(self):
+        lengths = [len(player.queue) for player in self.bot.voice_clients if isinstance(player, wavelink.Player)]
+        return [(("total",), sum(lengths)), (("max",), max(lengths, default=0))]
+
+    def _gateway_latency(self):
+        return [((shard_id,), latency) for shard_id, latency in self.bot.latencies if latency == latency]  # ignora NaN
+
+    # --- COMANDOS ---
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command):
+        observe_command(interaction, command, "ok")
+
+    @app_commands.command(name="profiler", description="[DONO] Grava um perfil do bot por alguns segundos (flamegraph).")
+    @app_commands.describe(segundos="Por quantos segundos amostrar (entre 1 e 120).")
+    @app_commands.check(is_owner)
+    async def profiler(self, interaction: discord.Interaction, segundos: app_commands.Range[int, 1, 120]):
+        """Amostra a pilha do event loop e devolve um arquivo collapsed (flamegraph.pl / speedscope)."""
+        if self.sampler.running:
+            return await interaction.response.send_message(embed=Embeds.erro("Já Rodando", "Já existe um perfil sendo gravado.", bot_user=self.bot.user), ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        self.sampler.start()
+        await asyncio.sleep(segundos)
+        collapsed = self.sampler.stop()
+
+        filename = f"boris-profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        descricao = (
+            f"**Amostras:** `{self.sampler.samples}` em `{segundos}s`\n"
+            f"**Travamentos do loop desde o início:** `{self.watchdog.stalls}`\n\n"
+            "Abra o arquivo no speedscope.app ou gere o SVG com `flamegraph.pl`."
+        )
+        await interaction.followup.send(
+            embed=Embeds.sucesso("Perfil Gravado", descricao, bot_user=self.bot.user),
+            file=discord.File(io.BytesIO(collapsed.encode()), filename=filename),
+            ephemeral=True
+        )
+
+    @profiler.error
+    async def profiler_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            await interaction.response.send_message(embed=Embeds.erro("Acesso Negado", "Só o dono do bot pode usar este comando.", bot_user=self.bot.user), ephemeral=True)
+        else:
+            print(f"Erro inesperado no comando /profiler: {error}")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MetricsCog(bot))
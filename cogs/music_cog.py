@@ -1,10 +1,23 @@
 import discord
 from discord import ui
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import wavelink
 import asyncio
 from typing import cast
+from utils.admission import SearchOverloaded
+from utils.autocomplete import TitleIndex
+from utils.background import spawn
+from utils.guild_actor import GuildActors
+from utils.idle_scheduler import IdleScheduler
+from utils.metrics import timed_search
+from utils.now_playing import NowPlayingManager
+from utils.player import BorisPlayer
+from utils.prefetch import Prefetcher
+from utils.queue import IndexedQueue, LazyTrack, PendingTrack, compact_tracks, entry_from_data
+from utils.queue_journal import GuildQueueState, QueueJournal
+from utils.search_cache import SearchCache
+from utils.ytdlp_fallback import YtDlpResolver
 
 # --- Classe de Embeds (Adapte se a sua for diferente) ---
 class Embeds:
@@ -45,17 +58,29 @@ class Embeds:
 
 # --- INTERFACE DE BOTÕES PARA O VOLUME ---
 class VolumeControlView(ui.View):
+    """
+    Painel de volume. Cliques seguidos não viram uma chamada ao Lavalink e uma edição
+    cada: o BorisPlayer junta as mudanças da janela em uma atualização e o painel é
+    editado uma vez por janela, sempre com o volume mais recente.
+    """
+
     def __init__(self, player: wavelink.Player):
         super().__init__(timeout=120.0)
         self.player = player
+        self._interaction: discord.Interaction | None = None
+        self._refresh_task: asyncio.Task | None = None
         self.update_volume_label()
 
+    @property
+    def volume(self) -> int:
+        return getattr(self.player, 'target_volume', self.player.volume)
+
     def update_volume_label(self):
-        self.volume_display.label = f"{self.player.volume}%"
+        self.volume_display.label = f"{self.volume}%"
 
     async def update_message(self, interaction: discord.Interaction):
         self.update_volume_label()
-        embed = self.create_volume_embed(self.player.volume, interaction.client.user)
+        embed = self.create_volume_embed(self.volume, interaction.client.user)
         await interaction.response.edit_message(embed=embed, view=self)
 
     def create_volume_embed(self, volume, bot_user):
@@ -63,98 +88,609 @@ class VolumeControlView(ui.View):
         bar = "█" * (visual_volume // 10) + "─" * ((100 - visual_volume) // 10)
         return Embeds.info("Controle de Volume", f"Ajuste o volume do bot.\n\n`{bar}` **{volume}%**", bot_user=bot_user)
 
+    async def change_volume(self, interaction: discord.Interaction, delta: int):
+        new_volume = max(0, min(150, self.volume + delta))
+        if not hasattr(self.player, 'request_volume'):
+            # Player sem agrupamento: comportamento antigo, uma chamada por clique
+            await self.player.set_volume(new_volume)
+            return await self.update_message(interaction)
+
+        await interaction.response.defer()
+        self._interaction = interaction
+        self.player.request_volume(new_volume)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_panel())
+
+    async def _refresh_panel(self):
+        # Uma edição por janela; se chegaram cliques novos durante a edição, espera a próxima janela
+        while (pending := self.player.pending_update()) is not None:
+            try:
+                await pending
+            except Exception as e:
+                print(f"Falha ao ajustar o volume: {e}")
+            self.update_volume_label()
+            try:
+                await self._interaction.edit_original_response(embed=self.create_volume_embed(self.volume, self._interaction.client.user), view=self)
+            except discord.HTTPException:
+                return
+
     @ui.button(style=discord.ButtonStyle.secondary, emoji="🔉")
     async def decrease_volume(self, interaction: discord.Interaction, button: ui.Button):
-        new_volume = max(0, self.player.volume - 10)
-        await self.player.set_volume(new_volume)
-        await self.update_message(interaction)
+        await self.change_volume(interaction, -10)
 
     @ui.button(style=discord.ButtonStyle.grey, label="100%", disabled=True)
     async def volume_display(self, interaction: discord.Interaction, button: ui.Button): pass
 
     @ui.button(style=discord.ButtonStyle.secondary, emoji="🔊")
     async def increase_volume(self, interaction: discord.Interaction, button: ui.Button):
-        new_volume = min(150, self.player.volume + 10)
-        await self.player.set_volume(new_volume)
-        await self.update_message(interaction)
+        await self.change_volume(interaction, 10)
 
     @ui.button(style=discord.ButtonStyle.danger, emoji="✖️", row=1)
     async def close_panel(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.message.delete()
 
+def format_duration(ms: int) -> str:
+    minutes, seconds = divmod(int(ms / 1000), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+# --- NAVEGAÇÃO DA FILA ---
+class JumpToPageModal(ui.Modal, title="Ir para a página"):
+    pagina = ui.TextInput(label="Página", placeholder="Ex: 12", max_length=6)
+
+    def __init__(self, view: "QueueView"):
+        super().__init__()
+        self.view = view
+        self.pagina.placeholder = f"1 a {view.page_count}"
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            page = int(self.pagina.value) - 1
+        except ValueError:
+            return await interaction.response.send_message(embed=Embeds.erro("Página Inválida", "Digite só o número da página.", bot_user=interaction.client.user), ephemeral=True)
+        self.view.page = page
+        await self.view.update_message(interaction)
+
+class QueueView(ui.View):
+    PER_PAGE = 10
+
+    def __init__(self, player: wavelink.Player):
+        super().__init__(timeout=180.0)
+        self.player = player
+        self.page = 0
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.player.queue) // self.PER_PAGE))
+
+    def _page_tracks(self) -> list:
+        queue = self.player.queue
+        if isinstance(queue, IndexedQueue):
+            return queue.page(self.page, self.PER_PAGE)
+        # Player de outra classe (ex: criado antes do balanceador): fatia sem copiar a fila toda
+        start = self.page * self.PER_PAGE
+        return [queue[i] for i in range(start, min(start + self.PER_PAGE, len(queue)))]
+
+    def create_embed(self, bot_user) -> discord.Embed:
+        self.page = min(max(0, self.page), self.page_count - 1)
+        embed = discord.Embed(title="Fila de Músicas 🎵", color=Embeds.COR_MUSICA, description="")
+        if self.player.current:
+            embed.description += f"**▶️ Tocando Agora:** [{self.player.current.title}]({self.player.current.uri})\n\n"
+
+        tracks = self._page_tracks()
+        if tracks:
+            start = self.page * self.PER_PAGE
+            embed.description += "**⬇️ Próximas na Fila:**\n"
+            embed.description += "\n".join(f"`{start + i + 1}.` [{track.title}]({track.uri}) `{format_duration(track.length)}`" for i, track in enumerate(tracks))
+        else:
+            embed.description += "Não há mais músicas na fila."
+
+        queue = self.player.queue
+        total = queue.total_length if isinstance(queue, IndexedQueue) else sum(track.length for track in queue)
+        embed.set_footer(text=f"Página {self.page + 1}/{self.page_count} • {len(queue)} músicas • {format_duration(total)} no total")
+        self._update_buttons()
+        return embed
+
+    def _update_buttons(self):
+        self.first_page.disabled = self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.last_page.disabled = self.page >= self.page_count - 1
+        self.page_display.label = f"{self.page + 1}/{self.page_count}"
+
+    async def update_message(self, interaction: discord.Interaction):
+        await interaction.response.edit_message(embed=self.create_embed(interaction.client.user), view=self)
+
+    @ui.button(style=discord.ButtonStyle.secondary, emoji="⏮️")
+    async def first_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page = 0
+        await self.update_message(interaction)
+
+    @ui.button(style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page -= 1
+        await self.update_message(interaction)
+
+    @ui.button(style=discord.ButtonStyle.grey, label="1/1", disabled=True)
+    async def page_display(self, interaction: discord.Interaction, button: ui.Button): pass
+
+    @ui.button(style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page += 1
+        await self.update_message(interaction)
+
+    @ui.button(style=discord.ButtonStyle.secondary, emoji="⏭️")
+    async def last_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page = self.page_count - 1
+        await self.update_message(interaction)
+
+    @ui.button(style=discord.ButtonStyle.primary, label="Ir para...", emoji="🔢", row=1)
+    async def jump_to_page(self, interaction: discord.Interaction, button: ui.Button):
+        await interaction.response.send_modal(JumpToPageModal(self))
+
 # --- COG DE MÚSICA ---
 class MusicCog(commands.Cog, name="Música"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.is_247 = {}
+        # Modo 24/7, inatividade, volume padrão e canal de anúncios de cada guild
+        self.settings = bot.settings
+        self.idle = IdleScheduler(self._idle_disconnect)
+        self.now_playing = NowPlayingManager(bot.outbound)
+        self.search_cache = SearchCache()
+        # Plano B quando o Lavalink não encontra nada ou recusa a busca
+        self.fallback = YtDlpResolver()
+        self.prune_search_cache.start()
+        # Títulos já vistos, para o autocomplete do /play e do /splay
+        self.titles = TitleIndex()
+        self.journal = QueueJournal()
+        self.prefetcher = Prefetcher(self._prefetch_resolve, self._prefetch_replace)
+        # Todas as mudanças no player/fila de uma guild passam por aqui, uma de cada vez
+        self.actors = GuildActors()
+        self._node_ready = asyncio.Event()
+
+    async def cog_load(self):
+        self.idle.start()
+        self.journal.start()
+        self.compact_journal.start()
+        self.titles.start()
+        spawn(self._restore_when_ready(), name="restore-queues")
+        spawn(self._seed_titles(), name="seed-titles")
+
+    async def cog_unload(self):
+        self.idle.stop()
+        self.prefetcher.stop()
+        self.actors.stop()
+        self.titles.stop()
+        self.prune_search_cache.cancel()
+        self.compact_journal.cancel()
+        self.search_cache.close()
+        self.fallback.close()
+        await self.journal.stop()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Controle de admissão: cada comando custa fichas do usuário e da guild (ver utils/admission.py)
+        return await self.bot.admission.admit(interaction)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.MissingPermissions) and not interaction.response.is_done():
+            await interaction.response.send_message(embed=Embeds.erro("Acesso Negado", "Só quem pode gerenciar o servidor pode mudar esta configuração.", bot_user=self.bot.user), ephemeral=True)
+
+    @tasks.loop(hours=1)
+    async def prune_search_cache(self):
+        await self.search_cache.prune()
+
+    async def _seed_titles(self):
+        """Preenche o índice do autocomplete com as buscas guardadas no cache (em segundo plano)."""
+        try:
+            for info in await self.search_cache.recent_tracks(self.titles.max_entries):
+                self.titles.add(info["title"], info.get("author"), info.get("uri"))
+            await self.titles.rebuild()
+            print(f"Autocomplete: {len(self.titles)} títulos indexados.")
+        except Exception as e:
+            print(f"Falha ao montar o índice do autocomplete: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.titles.forget_guild(guild.id)
+
+    # --- DIÁRIO DA FILA (sobrevive a deploys e crashes) ---
+    @tasks.loop(minutes=1)
+    async def compact_journal(self):
+        for player in list(self.bot.voice_clients):
+            if not isinstance(player, wavelink.Player) or not player.guild:
+                continue
+            if self.journal.needs_compaction(player.guild.id):
+                self.journal.snapshot(player.guild.id, GuildQueueState.from_player(player))
+            elif player.current:
+                # Sem isto, a posição só iria para o disco na compactação e a música voltaria do início
+                self.journal.position(player.guild.id, player.position)
+
+    @commands.Cog.listener()
+    async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload):
+        self._node_ready.set()
+
+    async def _restore_when_ready(self):
+        """
+        Depois que o bot e o Lavalink estão prontos, reconstrói as filas salvas de todas as guilds.
+        Guilds cujo player continuou tocando numa sessão retomada do Lavalink são assumidas
+        como estão; as demais voltam do diário, com a música reiniciada na posição salva.
+        """
+        await self.bot.wait_until_ready()
+        if not any(node.status is wavelink.NodeStatus.CONNECTED for node in wavelink.Pool.nodes.values()):
+            await self._node_ready.wait()
+
+        states = await self.journal.load_all()
+        resumed = await self.bot.node_balancer.resumed_players()
+        # Com vários clusters, cada processo restaura só as guilds dos seus shards
+        cluster = getattr(self.bot, 'cluster', None)
+        if cluster:
+            states = {guild_id: state for guild_id, state in states.items() if cluster.owns_guild(guild_id)}
+            resumed = {guild_id: player for guild_id, player in resumed.items() if cluster.owns_guild(guild_id)}
+        guild_ids = list(states.keys() | resumed.keys())
+        if not guild_ids:
+            return
+
+        def restore(guild_id: int):
+            if guild_id in resumed:
+                node, info = resumed[guild_id]
+                return self._resume_guild(guild_id, node, info, states.get(guild_id))
+            return self._restore_guild(guild_id, states[guild_id])
+
+        # Todas as guilds são restauradas em paralelo
+        results = await asyncio.gather(*(
+            self.actors.submit(guild_id, lambda guild_id=guild_id: restore(guild_id))
+            for guild_id in guild_ids
+        ), return_exceptions=True)
+        recovered = sum(result is True for guild_id, result in zip(guild_ids, results) if guild_id in resumed)
+        restored = sum(result is True for guild_id, result in zip(guild_ids, results) if guild_id not in resumed)
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, Exception):
+                print(f"Falha ao restaurar a fila da guild {guild_id}: {result}")
+        if resumed:
+            print(f"Players retomados do Lavalink sem interrupção: {recovered}/{len(resumed)} guild(s).")
+        if len(guild_ids) > len(resumed):
+            print(f"Filas restauradas: {restored}/{len(guild_ids) - len(resumed)} guild(s).")
+
+    async def _resume_guild(self, guild_id: int, node: wavelink.Node, info: wavelink.PlayerResponsePayload, state: GuildQueueState | None) -> bool:
+        """Assume um player que o Lavalink manteve tocando e reconcilia a fila com o diário."""
+        guild = self.bot.get_guild(guild_id)
+        channel_id = (state.voice_channel_id if state else None) or (int(info.voice_state.channel_id) if info.voice_state.channel_id else None)
+        channel = guild.get_channel(channel_id) if guild and channel_id else None
+        if not channel:
+            # Sem canal para voltar: o player ficaria tocando para ninguém
+            await node._destroy_player(guild_id)
+            self.journal.forget(guild_id)
+            return False
+        if guild.voice_client:
+            return False
+
+        await self.settings.load(guild_id)
+        player = BorisPlayer(nodes=[node])
+        player.adopt(info)
+        # Só entra de novo no canal de voz: a música, a posição e o volume já estão no Lavalink
+        player = await channel.connect(cls=player)
+        player.text_channel_id = state.text_channel_id if state else None
+
+        queue = [entry_from_data(data) for data in state.queue] if state else []
+        if info.track:
+            # O diário pode estar um pouco atrás do Lavalink (o lote mais recente não chegou ao disco):
+            # se a música tocando já está na fila salva, ela e as anteriores já saíram da fila
+            for index, entry in enumerate(queue):
+                if getattr(entry, 'encoded', None) == info.track.encoded or getattr(entry, 'identifier', None) == info.track.identifier:
+                    del queue[:index + 1]
+                    break
+        player.queue.put(queue)
+        self.journal.snapshot(guild_id, GuildQueueState.from_player(player))
+        self.prefetcher.schedule(player)
+
+        if not info.track:
+            # A música acabou enquanto o bot estava fora (o fim de faixa não teve quem ouvisse)
+            await self.start_if_idle(player)
+        return True
+
+    async def _restore_guild(self, guild_id: int, state: GuildQueueState) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(state.voice_channel_id) if guild else None
+        if not channel:
+            self.journal.forget(guild_id)
+            return False
+        if guild.voice_client:
+            return False
+
+        player = await self.connect(channel)
+        player.text_channel_id = state.text_channel_id
+
+        # As faixas voltam direto do formato codificado, sem nova busca no Lavalink
+        player.queue.put([entry_from_data(data) for data in state.queue])
+        current = entry_from_data(state.current) if state.current else None
+        if current is not None:
+            # A atual já saiu da fila no diário: volta a tocar direto, sem passar pela fila
+            # (um "dequeue" aqui tiraria a próxima do diário) e na posição salva
+            current = await self.prefetcher.resolve_now(current)
+        if current is not None:
+            await player.play(current, start=state.position)
+        else:
+            await self.start_if_idle(player)
+        return True
+
+    def bind_text_channel(self, player: wavelink.Player, channel):
+        """Associa o canal de texto ao player e registra a sessão no diário."""
+        player.text_channel_id = channel.id if channel else None
+        self.journal.session(player.guild.id, player.channel.id if player.channel else None, channel.id if channel else None)
+
+    def enqueue(self, player: wavelink.Player, tracks: list[wavelink.Playable]):
+        """Adiciona faixas à fila do player e ao diário. Chamado de dentro do ator da guild."""
+        player.queue.put(tracks)
+        self.journal.enqueue(player.guild.id, tracks)
+        self.idle.cancel(player.guild.id)
+        self.prefetcher.schedule(player)
+
+    # --- PRÉ-CARREGAMENTO DAS PRÓXIMAS MÚSICAS ---
+    async def _prefetch_resolve(self, entry) -> wavelink.Playable | None:
+        """Resolve um PendingTrack ou confirma que uma faixa antiga ainda pode ser tocada."""
+        if isinstance(entry, PendingTrack):
+            track = await self.search_first(entry.query)
+            if track:
+                self.bot.dispatch("pending_track_resolved", entry, track)
+            return track
+
+        if isinstance(entry, LazyTrack):
+            entry = entry.to_playable()
+            if self.prefetcher.is_ready(entry):
+                return entry
+
+        if entry.uri:
+            try:
+                async with self.bot.admission.search_slot():
+                    found = await timed_search(entry.uri)
+            except wavelink.LavalinkLoadException:
+                found = None  # o Lavalink não consegue mais carregar: procura uma substituta
+            if found:
+                tracks = found.tracks if isinstance(found, wavelink.Playlist) else found
+                same = next((track for track in tracks if track.identifier == entry.identifier), None)
+                return entry if same else tracks[0]
+
+        return await self.search_first(f"{entry.title} {entry.author}".strip())
+
+    def _prefetch_replace(self, player: wavelink.Player, index: int, track: wavelink.Playable | None):
+        if track is None:
+            del player.queue[index]
+            self.journal.record(player.guild.id, "remove", index=index)
+        else:
+            player.queue[index] = track
+            self.journal.record(player.guild.id, "replace", index=index, track=track.raw_data)
+
+    async def _next_track(self, player: wavelink.Player) -> wavelink.Playable | None:
+        """Tira da fila a próxima música tocável (normalmente já pronta pelo Prefetcher)."""
+        while player.queue:
+            entry = player.queue.get()
+            self.journal.record(player.guild.id, "dequeue")
+            self.prefetcher.note_handoff(player.guild.id, entry)
+            track = await self.prefetcher.resolve_now(entry)
+            if track:
+                return track
+        return None
 
     @commands.Cog.listener()
     async def on_wavelink_track_end(self, payload: wavelink.TrackEndEventPayload):
         player = payload.player
         if not player or not player.connected: return
+        # "replaced": uma faixa nova já tomou o lugar desta, não há o que avançar
+        if payload.reason == "replaced": return
+
+        self.actors.post(player.guild.id, lambda: self._advance(player))
 
-        if player.queue:
-            next_track = player.queue.get()
+    async def _advance(self, player: wavelink.Player):
+        """Toca a próxima da fila depois do fim de uma música (no ator da guild)."""
+        # Um /stop ou um /play que chegou antes já resolveu a situação
+        if not player.connected or player.playing: return
+
+        next_track = await self._next_track(player)
+        if next_track:
             await player.play(next_track)
+            self.show_now_playing(player, next_track)
+        else:
+            self.journal.record(player.guild.id, "skip")
+            settings = self.settings.get(player.guild.id)
+            if not settings.is_247:
+                self.idle.schedule(player.guild.id, settings.idle_timeout)
+
+    @commands.Cog.listener()
+    async def on_wavelink_track_start(self, payload: wavelink.TrackStartEventPayload):
+        # Voltou a tocar: qualquer desconexão agendada deixa de valer
+        if payload.player and payload.player.guild:
+            self.idle.cancel(payload.player.guild.id)
+            self.prefetcher.note_started(payload.player.guild.id)
+            self.titles.record_play(payload.player.guild.id, payload.track)
+            # A janela de pré-carregamento andou uma música
+            self.prefetcher.schedule(payload.player)
+
+    async def _idle_disconnect(self, guild_id: int):
+        """Chamado pelo IdleScheduler quando o prazo de inatividade da guild vence."""
+        # Entra na fila da guild: se um /play chegou antes, o player já estará tocando quando for a vez
+        await self.actors.submit(guild_id, lambda: self._idle_disconnect_now(guild_id))
+
+    async def _idle_disconnect_now(self, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        player = cast(wavelink.Player, guild.voice_client) if guild else None
+        if not player or not player.connected or player.playing or self.settings.get(guild_id).is_247:
+            return
+
+        self.journal.forget(guild_id)
+        self.now_playing.forget(guild_id)
+        self.prefetcher.forget(guild_id)
+        await player.disconnect()
+        channel = self.announce_channel(player)
+        if channel:
+            embed = Embeds.info("Até mais!", "Fila vazia, estou de saída! 👋", bot_user=self.bot.user)
+            self.bot.outbound.submit(("channel", channel.id), lambda: channel.send(embed=embed))
+
+    # --- MENSAGEM DE "TOCANDO AGORA" ---
+    def announce_channel(self, player: wavelink.Player):
+        """Canal de anúncios configurado na guild ou, sem ele, o canal onde a música foi pedida."""
+        channel_id = self.settings.get(player.guild.id).announce_channel_id
+        channel = player.guild.get_channel(channel_id) if channel_id else None
+        return channel or getattr(player, 'text_channel', None)
+
+    def show_now_playing(self, player: wavelink.Player, track: wavelink.Playable):
+        """Atualiza a mensagem única de "Tocando Agora" da guild (editada, não reenviada)."""
+        channel = self.announce_channel(player)
+        if channel:
+            embed = Embeds.musica_tocando(track, bot_user=self.bot.user)
+            self.now_playing.show(player.guild.id, channel, embed)
 
-            if hasattr(player, 'text_channel') and player.text_channel:
-                embed = Embeds.musica_tocando(next_track, bot_user=self.bot.user)
-                await player.text_channel.send(embed=embed)
-        elif not self.is_247.get(player.guild.id, False):
-            await asyncio.sleep(300)
-            if player.connected and not player.playing:
-                await player.disconnect()
-                if hasattr(player, 'text_channel') and player.text_channel:
-                    await player.text_channel.send(embed=Embeds.info("Até mais!", "Fila vazia, estou de saída! 👋", bot_user=self.bot.user))
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        self.now_playing.on_message(message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.now_playing.on_message_delete(payload.message_id, payload.channel_id)
 
     async def get_player(self, interaction: discord.Interaction) -> wavelink.Player | None:
+        """Player da guild, conectando se preciso. Deve rodar dentro do ator da guild (`self.actors`)."""
         if not interaction.user.voice:
             # Não use followup aqui, a resposta inicial já foi deferida
             await interaction.edit_original_response(embed=Embeds.erro("Onde você está?", "Você precisa estar em um canal de voz.", bot_user=self.bot.user), view=None)
             return None
 
         if not interaction.guild.voice_client:
-            return await interaction.user.voice.channel.connect(cls=wavelink.Player)
+            return await self.connect(interaction.user.voice.channel)
         return cast(wavelink.Player, interaction.guild.voice_client)
 
+    async def connect(self, channel: discord.VoiceChannel) -> wavelink.Player:
+        """Entra no canal com um player novo, já com o volume padrão da guild."""
+        # Primeiro uso da guild neste processo: as configurações dela vêm do disco agora, uma vez só
+        settings = await self.settings.load(channel.guild.id)
+        # Novos players vão para o nó do Lavalink menos carregado
+        player = await channel.connect(cls=self.bot.node_balancer.new_player())
+        if settings.default_volume != player.volume:
+            await player.set_volume(settings.default_volume)
+        return player
+
+    async def search(self, busca: str, source: str | None = "ytmsearch") -> wavelink.Search:
+        """Busca no Lavalink passando antes pelo cache (memória e disco); sem resultado, tenta o yt-dlp."""
+        tracks = await self.search_cache.get(busca, source)
+        if tracks is None:
+            try:
+                # Vaga no limite global de buscas simultâneas (levanta SearchOverloaded se demorar demais)
+                async with self.bot.admission.search_slot():
+                    tracks = await timed_search(busca, source=source)
+            except wavelink.LavalinkLoadException:
+                # A fonte do Lavalink recusou a busca (ex: limitada pelo YouTube)
+                tracks = await self.fallback.resolve(busca)
+                if not tracks:
+                    raise
+                return tracks
+            if not tracks:
+                # O resultado do yt-dlp não vai para o cache de buscas: a URL direta expira em algumas horas
+                return await self.fallback.resolve(busca)
+            await self.search_cache.put(busca, source, tracks)
+            if tracks and not isinstance(tracks, wavelink.Playlist):
+                self.titles.add_track(tracks[0])
+            # Acabaram de vir do Lavalink: o Prefetcher não precisa validá-las de novo
+            self.prefetcher.mark_fresh(tracks.tracks if isinstance(tracks, wavelink.Playlist) else tracks)
+        return tracks
+
+    async def search_first(self, busca: str) -> wavelink.Playable | None:
+        """Busca e devolve apenas o primeiro resultado (usado por outros cogs, ex: Spotify)."""
+        tracks = await self.search(busca)
+        if not tracks:
+            return None
+        return tracks.tracks[0] if isinstance(tracks, wavelink.Playlist) else tracks[0]
+
+    async def enqueue_and_start(self, player: wavelink.Player, tracks: list) -> bool:
+        """
+        Adiciona à fila e começa a tocar se o player estiver parado (dentro do ator da guild).
+        Retorna False se o player já foi desconectado (ex: um /stop no meio de um /splay).
+        """
+        if not player.connected:
+            return False
+        self.enqueue(player, tracks)
+        await self.start_if_idle(player)
+        return True
+
+    async def start_if_idle(self, player: wavelink.Player) -> wavelink.Playable | None:
+        """
+        Começa a tocar o próximo da fila se o player estiver parado. Retorna a música iniciada.
+        Deve rodar dentro do ator da guild.
+        """
+        if player.playing or not player.queue:
+            return None
+
+        first_track = await self._next_track(player)
+        if not first_track:
+            return None
+        await player.play(first_track)
+        self.show_now_playing(player, first_track)
+        return first_track
+
     @app_commands.command(name="play", description="Toca uma música ou playlist do YouTube/SoundCloud.")
     @app_commands.describe(busca="Nome ou link da música/playlist.")
     async def play(self, interaction: discord.Interaction, *, busca: str):
         await interaction.response.defer(thinking=True, ephemeral=True)
-        player = await self.get_player(interaction)
-        if not player: return
-
-        player.text_channel = interaction.channel
+        if not interaction.user.voice:
+            return await interaction.edit_original_response(embed=Embeds.erro("Onde você está?", "Você precisa estar em um canal de voz.", bot_user=self.bot.user), view=None)
 
-        tracks: wavelink.Search = await wavelink.Playable.search(busca)
+        # A busca fica fora do ator: só a parte que mexe no player espera a vez da guild
+        try:
+            tracks: wavelink.Search = await self.search(busca)
+        except SearchOverloaded:
+            return await interaction.edit_original_response(embed=Embeds.erro("Muita gente buscando", "Estou com muitas buscas ao mesmo tempo agora. Tente de novo em alguns segundos!", bot_user=self.bot.user), view=None)
         if not tracks:
             return await interaction.edit_original_response(embed=Embeds.erro("Não Encontrado", f"Não encontrei nada para `{busca}`.", bot_user=self.bot.user), view=None)
 
+        result = await self.actors.submit(interaction.guild.id, lambda: self._play_tracks(interaction, tracks))
+        if result is None: return
+        was_playing, started = result
+
         if isinstance(tracks, wavelink.Playlist):
-            player.queue.extend(tracks.tracks)
             await interaction.edit_original_response(embed=Embeds.sucesso("Playlist Adicionada", f"Adicionei **{len(tracks.tracks)}** músicas da playlist **{tracks.name}** à fila.", bot_user=self.bot.user), view=None)
-        else:
+        elif was_playing:
             track: wavelink.Playable = tracks[0]
-            player.queue.put(track)
-            if player.playing:
-                await interaction.edit_original_response(embed=Embeds.sucesso("Adicionado à Fila", f"**[{track.title}]({track.uri})** foi adicionado à fila.", bot_user=self.bot.user), view=None)
+            await interaction.edit_original_response(embed=Embeds.sucesso("Adicionado à Fila", f"**[{track.title}]({track.uri})** foi adicionado à fila.", bot_user=self.bot.user), view=None)
 
-        if not player.playing:
-            first_track = player.queue.get()
-            await player.play(first_track)
-            embed = Embeds.musica_tocando(first_track, bot_user=self.bot.user)
-            await interaction.channel.send(embed=embed)
+        if started:
             await interaction.edit_original_response(content="Começando a festa! 🥳", view=None)
 
+    @play.autocomplete("busca")
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        # Só memória: responde bem antes do prazo do Discord, sem buscar nada no Lavalink
+        return self.titles.choices(interaction.guild_id, current, command="play")
+
+    async def _play_tracks(self, interaction: discord.Interaction, tracks: wavelink.Search) -> tuple[bool, bool] | None:
+        """Parte do /play que roda no ator: conecta, enfileira e começa a tocar. Retorna (já tocava, começou agora)."""
+        player = await self.get_player(interaction)
+        if not player: return None
+
+        self.bind_text_channel(player, interaction.channel)
+        if isinstance(tracks, wavelink.Playlist):
+            # Playlists grandes ficam na fila em forma compacta; o Prefetcher remonta cada faixa antes da vez dela
+            self.enqueue(player, compact_tracks(tracks.tracks, interaction.user.id))
+        else:
+            self.enqueue(player, [tracks[0]])
+        was_playing = player.playing
+        return was_playing, await self.start_if_idle(player) is not None
+
     @app_commands.command(name="skip", description="Pula para a próxima música da fila.")
     async def skip(self, interaction: discord.Interaction):
         player = cast(wavelink.Player, interaction.guild.voice_client)
         if not player or not player.playing:
             return await interaction.response.send_message(embed=Embeds.erro("Nada tocando", "Não há nenhuma música tocando para eu pular.", bot_user=self.bot.user), ephemeral=True)
 
+        # A caixa da guild pode estar ocupada (conexão, busca da próxima faixa) além do prazo de 3s do Discord
+        await interaction.response.defer(ephemeral=True)
+        # Vários /skip seguidos enquanto a caixa da guild está ocupada viram um só
+        skipped = await self.actors.submit(player.guild.id, lambda: self._skip(player), key="skip")
+        if skipped is None:
+            return await interaction.edit_original_response(embed=Embeds.erro("Nada tocando", "Não há nenhuma música tocando para eu pular.", bot_user=self.bot.user))
+        await interaction.edit_original_response(embed=Embeds.sucesso("Música Pulada!", f"Pulei **{skipped}**.", bot_user=self.bot.user))
+
+    async def _skip(self, player: wavelink.Player) -> str | None:
+        if not player.playing:
+            return None
         current_title = player.current.title if player.current else "a música atual"
+        self.journal.record(player.guild.id, "skip")
         await player.stop()
-        await interaction.response.send_message(embed=Embeds.sucesso("Música Pulada!", f"Pulei **{current_title}**.", bot_user=self.bot.user), ephemeral=True)
+        return current_title
 
     @app_commands.command(name="stop", description="Para a música, limpa a fila e desconecta o bot.")
     async def stop(self, interaction: discord.Interaction):
@@ -162,10 +698,22 @@ class MusicCog(commands.Cog, name="Música"):
         if not player or not player.connected:
             return await interaction.response.send_message(embed=Embeds.erro("Não conectado", "Não estou em nenhum canal de voz.", bot_user=self.bot.user), ephemeral=True)
 
+        await interaction.response.defer()
+        if not await self.actors.submit(player.guild.id, lambda: self._stop(player)):
+            return await interaction.edit_original_response(embed=Embeds.erro("Não conectado", "Não estou em nenhum canal de voz.", bot_user=self.bot.user))
+        await interaction.edit_original_response(embed=Embeds.sucesso("Festa Encerrada!", "Música parada e fila limpa. Até a próxima!", bot_user=self.bot.user))
+
+    async def _stop(self, player: wavelink.Player) -> bool:
+        if not player.connected:
+            return False
         player.queue.clear()
+        self.journal.forget(player.guild.id)
+        self.idle.cancel(player.guild.id)
+        self.now_playing.forget(player.guild.id)
+        self.prefetcher.forget(player.guild.id)
         await player.stop()
         await player.disconnect()
-        await interaction.response.send_message(embed=Embeds.sucesso("Festa Encerrada!", "Música parada e fila limpa. Até a próxima!", bot_user=self.bot.user))
+        return True
 
     @app_commands.command(name="queue", description="Mostra a fila de músicas.")
     async def queue(self, interaction: discord.Interaction):
@@ -173,19 +721,82 @@ class MusicCog(commands.Cog, name="Música"):
         if not player or (not player.current and not player.queue):
             return await interaction.response.send_message(embed=Embeds.info("Fila Vazia", "Não há músicas na fila.", bot_user=self.bot.user))
 
-        embed = discord.Embed(title="Fila de Músicas 🎵", color=Embeds.COR_MUSICA, description="")
-        if player.current:
-            embed.description += f"**▶️ Tocando Agora:** [{player.current.title}]({player.current.uri})\n\n"
-
-        if player.queue:
-            embed.description += "**⬇️ Próximas na Fila:**\n"
-            queue_list = "\n".join(f"`{i+1}.` [{track.title}]({track.uri})" for i, track in enumerate(list(player.queue)[:10]))
-            embed.description += queue_list
+        view = QueueView(player)
+        await interaction.response.send_message(embed=view.create_embed(self.bot.user), view=view)
 
-        if len(player.queue) > 10:
-            embed.set_footer(text=f"... e mais {len(player.queue) - 10} músicas.")
-
-        await interaction.response.send_message(embed=embed)
+    def _indexed_queue(self, interaction: discord.Interaction) -> tuple[wavelink.Player | None, IndexedQueue | None]:
+        player = cast(wavelink.Player, interaction.guild.voice_client)
+        if not player or not isinstance(player.queue, IndexedQueue):
+            return player, None
+        return player, player.queue
+
+    @app_commands.command(name="shuffle", description="Embaralha as músicas da fila.")
+    async def shuffle(self, interaction: discord.Interaction):
+        player, queue = self._indexed_queue(interaction)
+        short = Embeds.erro("Fila Curta", "Preciso de pelo menos duas músicas na fila para embaralhar.", bot_user=self.bot.user)
+        if not queue or len(queue) < 2:
+            return await interaction.response.send_message(embed=short, ephemeral=True)
+
+        async def mutate() -> int | None:
+            if not queue or len(queue) < 2:
+                return None
+            queue.shuffle()
+            # Embaralhar mexe em todas as posições: o diário recebe a fila nova de uma vez
+            self.journal.snapshot(player.guild.id, GuildQueueState.from_player(player))
+            self.prefetcher.schedule(player)
+            return len(queue)
+
+        # Conferido de novo dentro do ator: a fila pode ter mudado enquanto o comando esperava a vez
+        await interaction.response.defer()
+        shuffled = await self.actors.submit(interaction.guild.id, mutate)
+        if shuffled is None:
+            return await interaction.edit_original_response(embed=short)
+        await interaction.edit_original_response(embed=Embeds.sucesso("Fila Embaralhada", f"Embaralhei **{shuffled}** músicas. 🔀", bot_user=self.bot.user))
+
+    @app_commands.command(name="remove", description="Remove uma música da fila.")
+    @app_commands.describe(posicao="Posição da música na fila (veja em /queue).")
+    async def remove(self, interaction: discord.Interaction, posicao: app_commands.Range[int, 1]):
+        player, queue = self._indexed_queue(interaction)
+        invalid = Embeds.erro("Posição Inválida", "Não existe música nessa posição da fila.", bot_user=self.bot.user)
+        if not queue or posicao > len(queue):
+            return await interaction.response.send_message(embed=invalid, ephemeral=True)
+
+        async def mutate():
+            if not queue or posicao > len(queue):
+                return None
+            track = queue[posicao - 1]
+            del queue[posicao - 1]
+            self.journal.record(player.guild.id, "remove", index=posicao - 1)
+            self.prefetcher.schedule(player)
+            return track
+
+        await interaction.response.defer()
+        track = await self.actors.submit(interaction.guild.id, mutate)
+        if track is None:
+            return await interaction.edit_original_response(embed=invalid)
+        await interaction.edit_original_response(embed=Embeds.sucesso("Removida da Fila", f"Removi **[{track.title}]({track.uri})** da fila.", bot_user=self.bot.user))
+
+    @app_commands.command(name="move", description="Muda a posição de uma música na fila.")
+    @app_commands.describe(de="Posição atual da música.", para="Nova posição da música.")
+    async def move(self, interaction: discord.Interaction, de: app_commands.Range[int, 1], para: app_commands.Range[int, 1]):
+        player, queue = self._indexed_queue(interaction)
+        invalid = Embeds.erro("Posição Inválida", "Não existe música nessa posição da fila.", bot_user=self.bot.user)
+        if not queue or de > len(queue) or para > len(queue):
+            return await interaction.response.send_message(embed=invalid, ephemeral=True)
+
+        async def mutate():
+            if not queue or de > len(queue) or para > len(queue):
+                return None
+            queue.move(de - 1, para - 1)
+            self.journal.record(player.guild.id, "move", source=de - 1, destination=para - 1)
+            self.prefetcher.schedule(player)
+            return queue[para - 1]
+
+        await interaction.response.defer()
+        track = await self.actors.submit(interaction.guild.id, mutate)
+        if track is None:
+            return await interaction.edit_original_response(embed=invalid)
+        await interaction.edit_original_response(embed=Embeds.sucesso("Música Movida", f"**[{track.title}]({track.uri})** agora está na posição **{para}**.", bot_user=self.bot.user))
 
     @app_commands.command(name="volume", description="Abre o painel para ajustar o volume do bot.")
     async def volume(self, interaction: discord.Interaction):
@@ -194,18 +805,80 @@ class MusicCog(commands.Cog, name="Música"):
             return await interaction.response.send_message(embed=Embeds.erro("Não Conectado", "Preciso estar em um canal de voz para ajustar o volume.", bot_user=self.bot.user), ephemeral=True)
 
         view = VolumeControlView(player)
-        embed = view.create_volume_embed(player.volume, self.bot.user)
+        embed = view.create_volume_embed(view.volume, self.bot.user)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
     @app_commands.command(name="247", description="Ativa/desativa o modo 24/7 (não sair do canal).")
     async def twentyfourseven(self, interaction: discord.Interaction):
         guild_id = interaction.guild.id
-        status = not self.is_247.get(guild_id, False)
-        self.is_247[guild_id] = status
+        status = not (await self.settings.load(guild_id)).is_247
+        settings = await self.settings.update(guild_id, is_247=status)
 
-        message = "ativado! Não sairei mais do canal por inatividade." if status else "desativado. Sairei do canal após 5 minutos de inatividade."
+        timeout = settings.idle_timeout
+        player = cast(wavelink.Player, interaction.guild.voice_client)
+        if status:
+            self.idle.cancel(guild_id)
+        elif player and player.connected and not player.playing:
+            self.idle.schedule(guild_id, timeout)
+
+        message = "ativado! Não sairei mais do canal por inatividade." if status else f"desativado. Sairei do canal após {timeout // 60} minutos de inatividade."
         await interaction.response.send_message(embed=Embeds.info("Modo 24/7", f"O modo 24/7 foi **{message}**", bot_user=self.bot.user))
 
+    @app_commands.command(name="inatividade", description="[ADMIN] Define após quantos minutos sem música eu saio do canal.")
+    @app_commands.describe(minutos="Minutos de inatividade antes de sair (entre 1 e 120).")
+    # Configurações do servidor inteiro: só quem pode gerenciar o servidor
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def inatividade(self, interaction: discord.Interaction, minutos: app_commands.Range[int, 1, 120]):
+        guild_id = interaction.guild.id
+        await self.settings.update(guild_id, idle_timeout=minutos * 60)
+
+        # Se já existe uma saída agendada, ela passa a usar o novo tempo
+        if self.idle.deadline(guild_id) is not None:
+            self.idle.schedule(guild_id, minutos * 60)
+
+        await interaction.response.send_message(embed=Embeds.sucesso("Inatividade Ajustada", f"Vou sair do canal após **{minutos}** minutos sem música.", bot_user=self.bot.user))
+
+    @app_commands.command(name="volume-padrao", description="[ADMIN] Define o volume com que eu entro no canal de voz.")
+    @app_commands.describe(volume="Volume inicial (entre 0 e 150).")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def volume_padrao(self, interaction: discord.Interaction, volume: app_commands.Range[int, 0, 150]):
+        await self.settings.update(interaction.guild.id, default_volume=volume)
+        await interaction.response.send_message(embed=Embeds.sucesso("Volume Padrão Ajustado", f"Vou entrar nos canais de voz com volume **{volume}%**.", bot_user=self.bot.user))
+
+    @app_commands.command(name="anuncios", description="[ADMIN] Define o canal onde aviso qual música está tocando.")
+    @app_commands.describe(canal="Canal dos avisos. Deixe vazio para avisar no canal onde a música foi pedida.")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def anuncios(self, interaction: discord.Interaction, canal: discord.TextChannel | None = None):
+        await self.settings.update(interaction.guild.id, announce_channel_id=canal.id if canal else None)
+        message = f"Vou avisar as músicas em {canal.mention}." if canal else "Vou avisar as músicas no canal onde elas forem pedidas."
+        await interaction.response.send_message(embed=Embeds.sucesso("Canal de Anúncios", message, bot_user=self.bot.user))
+
+    @app_commands.command(name="cache", description="Mostra as estatísticas do cache de buscas.")
+    async def cache(self, interaction: discord.Interaction):
+        stats = self.search_cache.stats()
+        descricao = (
+            f"**Acertos (memória):** `{stats['memory_hits']}`\n"
+            f"**Acertos (disco):** `{stats['disk_hits']}`\n"
+            f"**Falhas:** `{stats['misses']}`\n"
+            f"**Taxa de acerto:** `{stats['hit_rate']:.1%}`\n"
+            f"**Entradas em memória:** `{stats['memory_entries']}`"
+        )
+        prefetch = self.prefetcher.stats()
+        descricao += (
+            f"\n\n**Próxima música já pronta:** `{prefetch['hit_rate']:.1%}` ({prefetch['hits']}/{prefetch['hits'] + prefetch['misses']})\n"
+            f"**Removidas antes da vez:** `{prefetch['dropped']}`"
+        )
+        if prefetch['gap_p50_ms'] is not None:
+            descricao += f"\n**Tempo até o próximo áudio:** `{prefetch['gap_p50_ms']:.0f} ms` (p50) / `{prefetch['gap_p95_ms']:.0f} ms` (p95)"
+        fallback = self.fallback.stats()
+        if fallback['available']:
+            estado = {"closed": "ativo", "open": "pausado", "half_open": "em teste"}[fallback['state']]
+            descricao += f"\n\n**Plano B (yt-dlp):** `{estado}`, {fallback['cached']} busca(s) em cache"
+        await interaction.response.send_message(embed=Embeds.info("Cache de Buscas", descricao, bot_user=self.bot.user), ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(MusicCog(bot))
@@ -1,10 +1,21 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+import wavelink
+import asyncio
 import os
 from utils.embeds import Embeds # Supondo que você tenha este arquivo de embeds
+from utils.queue import LazyTrack, PendingTrack
+from utils.resolver import resolve_in_order
+from utils.spotify_client import SpotifyClient
+from utils.spotify_store import SpotifyStore, simplify_track
+
+# Quantas buscas no Lavalink rodam ao mesmo tempo ao resolver playlists/álbuns
+RESOLVE_CONCURRENCY = int(os.getenv("SPOTIFY_RESOLVE_CONCURRENCY", 8))
+# Intervalo mínimo (segundos) entre edições da mensagem de progresso
+PROGRESS_INTERVAL = 2.0
+# Campos pedidos ao paginar playlists (só o que o SpotifyStore guarda)
+PLAYLIST_FIELDS = "total,items(track(id,name,duration_ms,artists(name),external_ids(isrc)))"
 
 class SpotifyCog(commands.Cog, name="Spotify"):
     """Cog para integrar o Spotify e adicionar músicas à fila."""
@@ -12,6 +23,7 @@ class SpotifyCog(commands.Cog, name="Spotify"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.sp = None
+        self.store = SpotifyStore()
         # Tenta inicializar a conexão com a API do Spotify
         try:
             client_id = os.getenv("SPOTIPY_CLIENT_ID")
@@ -19,13 +31,22 @@ class SpotifyCog(commands.Cog, name="Spotify"):
             if not client_id or not client_secret:
                 raise ValueError("Credenciais do Spotify não encontradas no .env")
 
-            auth_manager = SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
-            self.sp = spotipy.Spotify(auth_manager=auth_manager)
-            print("Cog do Spotify carregado e autenticado com sucesso.")
+            # Cliente assíncrono: nenhuma chamada ao Spotify bloqueia o event loop
+            self.sp = SpotifyClient(client_id, client_secret)
+            print("Cog do Spotify carregado com sucesso.")
         except Exception as e:
             print(f"ERRO CRÍTICO ao carregar SpotifyCog: {e}")
             print("Verifique se SPOTIPY_CLIENT_ID e SPOTIPY_CLIENT_SECRET estão no seu .env")
 
+    async def cog_unload(self):
+        if self.sp:
+            await self.sp.close()
+        self.store.close()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Controle de admissão: cada comando custa fichas do usuário e da guild (ver utils/admission.py)
+        return await self.bot.admission.admit(interaction)
+
     @app_commands.command(name="splay", description="Toca uma música, playlist ou álbum do Spotify.")
     @app_commands.describe(link_ou_nome="Link do Spotify (música/playlist/álbum) ou nome da música.")
     async def splay(self, interaction: discord.Interaction, *, link_ou_nome: str):
@@ -35,13 +56,12 @@ class SpotifyCog(commands.Cog, name="Spotify"):
 
         # Pega o comando /play do outro cog
         music_cog = self.bot.get_cog("Música")
-        if not music_cog or not hasattr(music_cog, 'play'):
+        if not music_cog or not hasattr(music_cog, 'enqueue_and_start'):
             return await interaction.response.send_message(embed=Embeds.erro("Comando não encontrado", "Não consegui encontrar o comando /play para processar as músicas.", bot_user=self.bot.user), ephemeral=True)
 
         await interaction.response.send_message(embed=Embeds.info("Processando Spotify", f"Recebi sua solicitação! Buscando as músicas...", bot_user=self.bot.user), ephemeral=True)
 
         try:
-            queries = []
             # Verifica se é um link do Spotify
             if "open.spotify.com" in link_ou_nome:
                 # Extrai o tipo (track, playlist, album) e o ID do link
@@ -49,66 +69,166 @@ class SpotifyCog(commands.Cog, name="Spotify"):
                 entity_type = parts[-2]
                 entity_id = parts[-1].split('?')[0]
 
-                if entity_type == 'track':
-                    track = self.sp.track(entity_id)
-                    queries.append(f"{track['name']} {track['artists'][0]['name']}")
-
-                elif entity_type in ['playlist', 'album']:
-                    if entity_type == 'playlist':
-                        results = self.sp.playlist_items(entity_id)
-                    else: # album
-                        results = self.sp.album_tracks(entity_id)
-
-                    tracks = results['items']
-                    # Paginação para buscar todas as músicas
-                    while results['next']:
-                        results = self.sp.next(results)
-                        tracks.extend(results['items'])
-
-                    for item in tracks:
-                        track = item.get('track') if entity_type == 'playlist' else item
-                        if track:
-                            queries.append(f"{track['name']} {track['artists'][0]['name']}")
-
-                else:
+                if entity_type not in ('track', 'playlist', 'album'):
                     await interaction.followup.send(embed=Embeds.erro("Link Inválido", "Só consigo tocar links de músicas, playlists ou álbuns.", bot_user=self.bot.user), ephemeral=True)
                     return
-
             # Se não for um link, busca por nome
             else:
-                result = self.sp.search(q=link_ou_nome, type='track', limit=1)
+                result = await self.sp.search(link_ou_nome, type='track', limit=1)
                 if not result['tracks']['items']:
                     await interaction.followup.send(embed=Embeds.erro("Não Encontrado", f"Não encontrei `{link_ou_nome}` no Spotify.", bot_user=self.bot.user), ephemeral=True)
                     return
-                track = result['tracks']['items'][0]
-                queries.append(f"{track['name']} {track['artists'][0]['name']}")
+                track = simplify_track(result['tracks']['items'][0])
+                await self.store.save_tracks([track])
+                entity_type, entity_id = 'track', track['id']
 
-            if not queries:
-                await interaction.followup.send(embed=Embeds.erro("Nenhuma música encontrada", "Não consegui extrair nenhuma música da sua solicitação.", bot_user=self.bot.user), ephemeral=True)
+            player = await music_cog.actors.submit(interaction.guild.id, lambda: music_cog.get_player(interaction))
+            if not player:
                 return
+            music_cog.bind_text_channel(player, interaction.channel)
 
-            # Chama o comando /play para a primeira música para uma resposta rápida
-            first_query = queries.pop(0)
-            # Precisamos invocar o comando play, passando o contexto da interação
-            await music_cog.play.callback(music_cog, interaction, busca=first_query)
-
-            # Adiciona o resto das músicas da playlist/álbum na fila em segundo plano
-            for query in queries:
-                # Aqui, não precisamos mais da interação, pois o bot já estará no canal.
-                # A lógica do /play original cuidará de adicionar à fila.
-                # Para simplificar, estamos apenas passando a string de busca.
-                # A implementação de uma fila interna aqui seria mais complexa.
-                # Esta abordagem é mais direta.
-                # Note: Esta forma de chamar o callback para as outras músicas pode não funcionar como esperado
-                # sem uma interação válida. A melhor abordagem seria o MusicCog ter uma função interna para adicionar à fila.
-                # Vamos simplificar por agora: apenas a primeira música será adicionada via /splay para playlists.
-                pass
-
+            await self._resolve_and_enqueue(interaction, music_cog, player, entity_type, entity_id)
 
         except Exception as e:
             print(f"Erro no /splay: {e}")
             await interaction.followup.send(embed=Embeds.erro("Erro Inesperado", "Ocorreu um erro ao processar sua solicitação do Spotify.", bot_user=self.bot.user), ephemeral=True)
 
+    @splay.autocomplete("link_ou_nome")
+    async def splay_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        music_cog = self.bot.get_cog("Música")
+        if not music_cog or not hasattr(music_cog, 'titles'):
+            return []
+        # O /splay busca pelo nome no Spotify: a sugestão envia "título artista", não o link do YouTube
+        return music_cog.titles.choices(interaction.guild_id, current, command="splay", use_uri=False)
+
+    @staticmethod
+    def _build_query(track: dict) -> str:
+        artist = track['artists'][0] if track['artists'] else ""
+        return f"{track['name']} {artist}".strip()
+
+    async def _with_matches(self, tracks: list[dict]) -> list[dict]:
+        """Anexa a cada faixa o resultado do Lavalink encontrado da última vez (se houver)."""
+        matches = await self.store.get_matches([track['id'] for track in tracks if track['id']])
+        return [{**track, 'match': matches.get(track['id'])} for track in tracks]
+
+    async def _iter_pages(self, entity_type: str, entity_id: str):
+        """Gera as faixas do Spotify em blocos, conforme chegam, como (faixas, total)."""
+        if entity_type == 'track':
+            track = (await self.store.get_tracks([entity_id])).get(entity_id)
+            if not track:
+                track = simplify_track(await self.sp.track(entity_id))
+                await self.store.save_tracks([track])
+            yield await self._with_matches([track]), 1
+            return
+
+        snapshot_id = None
+        if entity_type == 'playlist':
+            # Uma requisição barata: se o snapshot não mudou, nada de paginar a playlist
+            meta = await self.sp.playlist(entity_id, fields="snapshot_id,name")
+            snapshot_id = meta['snapshot_id']
+            track_ids = await self.store.get_playlist(entity_id, snapshot_id)
+        else:
+            track_ids = await self.store.get_album(entity_id)
+
+        if track_ids is not None:
+            known = await self.store.get_tracks(track_ids)
+            if all(track_id in known for track_id in track_ids):
+                for start in range(0, len(track_ids), 100):
+                    chunk = [known[track_id] for track_id in track_ids[start:start + 100]]
+                    yield await self._with_matches(chunk), len(track_ids)
+                return
+
+        if entity_type == 'playlist':
+            pages = self.sp.playlist_pages(entity_id, fields=PLAYLIST_FIELDS)
+        else: # album
+            pages = self.sp.album_pages(entity_id)
+
+        # As páginas seguintes são buscadas em paralelo pelo cliente, mas chegam em ordem
+        all_ids = []
+        async for results in pages:
+            tracks = []
+            for item in results['items']:
+                track = item.get('track') if entity_type == 'playlist' else item
+                if track:
+                    tracks.append(simplify_track(track))
+            await self.store.save_tracks(tracks)
+            all_ids.extend(track['id'] for track in tracks if track['id'])
+            yield await self._with_matches(tracks), results.get('total', len(tracks))
+
+        # Só guarda a versão depois de ler a playlist/álbum por completo
+        if entity_type == 'playlist':
+            await self.store.save_playlist(entity_id, snapshot_id, meta.get('name'), all_ids)
+        else:
+            await self.store.save_album(entity_id, all_ids)
+
+    async def _resolve_track(self, music_cog, track: dict, requester_id: int) -> LazyTrack | None:
+        """Reaproveita a faixa do Lavalink já associada a este ID do Spotify, ou busca pelo nome."""
+        if track['match']:
+            # Direto do payload salvo para a forma compacta, sem montar um Playable
+            return LazyTrack.from_data(track['match'], requester_id)
+
+        result = await music_cog.search_first(self._build_query(track))
+        if not result:
+            return None
+        if track['id']:
+            await self.store.save_match(track['id'], result.raw_data)
+        return LazyTrack.from_playable(result, requester_id)
+
+    @commands.Cog.listener()
+    async def on_pending_track_resolved(self, entry: PendingTrack, track: wavelink.Playable):
+        # Uma música que falhou no /splay foi encontrada mais tarde: guarda a associação
+        if entry.spotify_id:
+            await self.store.save_match(entry.spotify_id, track.raw_data)
+
+    async def _resolve_and_enqueue(self, interaction: discord.Interaction, music_cog, player, entity_type: str, entity_id: str):
+        """
+        Pipeline do /splay: páginas do Spotify entram em streaming, cada música vira uma
+        busca no Lavalink (com concorrência limitada) e o resultado vai para a fila na ordem
+        da playlist. A reprodução começa assim que a primeira música é encontrada.
+        """
+        progress = {"total": 0, "added": 0, "pending": 0}
+        last_update = 0.0
+
+        async def spotify_tracks():
+            async for page, total in self._iter_pages(entity_type, entity_id):
+                progress["total"] = total
+                for item in page:
+                    yield item
+
+        async def resolve(item: dict):
+            return await self._resolve_track(music_cog, item, interaction.user.id)
+
+        async for _, item, track in resolve_in_order(spotify_tracks(), resolve, concurrency=RESOLVE_CONCURRENCY):
+            if not track:
+                # Não achou agora: a música guarda o lugar na fila e o Prefetcher tenta de novo antes da vez dela
+                track = PendingTrack(self._build_query(item), title=item['name'], author=", ".join(item['artists']),
+                                     length=item['duration_ms'] or 0, spotify_id=item['id'], requester_id=interaction.user.id)
+                progress["pending"] += 1
+
+            # Cada música entra pela caixa da guild, na vez dela entre os outros comandos
+            if not await music_cog.actors.submit(player.guild.id, lambda track=track: music_cog.enqueue_and_start(player, [track])):
+                break  # o player foi desconectado (/stop ou inatividade) no meio do /splay
+            progress["added"] += 1
+
+            # Uma única mensagem de progresso, editada no máximo a cada PROGRESS_INTERVAL segundos
+            now = asyncio.get_running_loop().time()
+            if now - last_update >= PROGRESS_INTERVAL:
+                last_update = now
+                await interaction.edit_original_response(embed=Embeds.info(
+                    "Processando Spotify",
+                    f"Adicionadas **{progress['added']}** de **{progress['total']}** músicas à fila...",
+                    bot_user=self.bot.user
+                ))
+
+        if not progress["added"]:
+            await interaction.edit_original_response(embed=Embeds.erro("Nenhuma música encontrada", "Não consegui extrair nenhuma música da sua solicitação.", bot_user=self.bot.user))
+            return
+
+        descricao = f"Adicionei **{progress['added']}** músicas do Spotify à fila."
+        if progress["pending"]:
+            descricao += f"\n`{progress['pending']}` ainda não foram encontradas; vou tentar de novo antes da vez delas."
+        await interaction.edit_original_response(embed=Embeds.sucesso("Spotify Adicionado", descricao, bot_user=self.bot.user))
+
 
 async def setup(bot: commands.Bot):
     # Só adiciona o Cog se as credenciais do Spotify existirem
@@ -1,67 +1,116 @@
+import time
+
 import discord
-from discord import app_commands
+from discord import app_commands, ui
 from discord.ext import commands
+from utils.admission import AdmissionRejected
 from utils.embeds import Embeds # Importamos nossa classe de embeds padronizados
+from utils.purge import PurgeJob
+
+# Máximo de mensagens por /limpar
+MAX_PURGE = 10_000
+# O token da Interaction vale 15 minutos; depois disso o resultado vai como mensagem no canal
+INTERACTION_LIFETIME = 14 * 60
+
+
+class PurgeView(ui.View):
+    """Botão de cancelar da mensagem de progresso do /limpar (visível só para quem pediu)."""
+
+    def __init__(self, job: PurgeJob):
+        super().__init__(timeout=None)
+        self.job = job
+
+    @ui.button(label="Cancelar", style=discord.ButtonStyle.danger, emoji="🛑")
+    async def cancel_purge(self, interaction: discord.Interaction, button: ui.Button):
+        self.job.cancel()
+        button.disabled = True
+        button.label = "Cancelando..."
+        await interaction.response.edit_message(view=self)
+
 
 class UtilitariosCog(commands.Cog):
     """Cog para comandos de utilidade e moderação."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Limpeza em andamento por guild (uma por vez em cada servidor)
+        self.purges: dict[int, PurgeJob] = {}
+
+    async def cog_unload(self):
+        for job in self.purges.values():
+            job.cancel()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Controle de admissão: cada comando custa fichas do usuário e da guild (ver utils/admission.py)
+        return await self.bot.admission.admit(interaction)
+
+    @staticmethod
+    def _purge_embed(job: PurgeJob, final: bool, bot_user) -> discord.Embed:
+        if not final:
+            descricao = (
+                f"**Apagadas:** `{job.deleted}` de até `{job.limit}`\n"
+                f"**Lidas do histórico:** `{job.scanned}`"
+            )
+            if job.old_pending:
+                descricao += f"\n**Antigas esperando:** `{job.old_pending}` (mais de 14 dias, apagadas uma a uma)"
+            return Embeds.info("Limpando o Canal...", descricao, bot_user=bot_user)
+
+        if job.error:
+            return Embeds.erro("Limpeza Interrompida", f"{job.error}\n\n**{job.deleted}** mensagens foram apagadas antes disso.", bot_user=bot_user)
+        if job.cancelled:
+            return Embeds.info("Limpeza Cancelada", f"Parei a limpeza. **{job.deleted}** mensagens foram apagadas.", bot_user=bot_user)
+
+        descricao = f"**{job.deleted}** mensagens foram apagadas deste canal."
+        if job.single_deleted:
+            descricao += f"\n`{job.single_deleted}` delas tinham mais de 14 dias e foram apagadas uma a uma."
+        if job.skipped:
+            descricao += f"\n`{job.skipped}` já tinham sido apagadas ou não puderam ser removidas."
+        return Embeds.sucesso("Limpeza Concluída!", descricao, bot_user=bot_user)
 
     @app_commands.command(name="limpar", description="[ADMIN] Limpa uma quantidade específica de mensagens do canal.")
-    @app_commands.describe(quantidade="O número de mensagens que você deseja apagar (entre 1 e 100).")
+    @app_commands.describe(quantidade=f"O número de mensagens que você deseja apagar (entre 1 e {MAX_PURGE}).")
     # Define que apenas membros com permissão de "Gerenciar Mensagens" podem usar o comando.
     # Isso é crucial para a segurança do seu servidor.
     @app_commands.checks.has_permissions(manage_messages=True)
-    async def limpar(self, interaction: discord.Interaction, quantidade: int):
+    async def limpar(self, interaction: discord.Interaction, quantidade: app_commands.Range[int, 1, MAX_PURGE]):
         """
         Apaga um número de mensagens do canal atual.
-        Limitado a 100 mensagens por vez devido às restrições do Discord.
+        Mensagens recentes vão em lotes de 100; as com mais de 14 dias, uma a uma (bem mais devagar).
         """
-        # Adia a resposta para o Discord não dar timeout, especialmente se a limpeza demorar.
-        await interaction.response.defer(ephemeral=True)
-
-        if quantidade <= 0:
-            return await interaction.followup.send(
-                embed=Embeds.erro("Valor Inválido", "A quantidade de mensagens deve ser maior que zero.", bot_user=self.bot.user),
+        guild_id = interaction.guild.id
+        running = self.purges.get(guild_id)
+        if running and not running.done:
+            return await interaction.response.send_message(
+                embed=Embeds.erro("Limpeza em Andamento", f"Já existe uma limpeza rodando em <#{running.channel.id}>. Espere ela terminar ou cancele pelo botão.", bot_user=self.bot.user),
                 ephemeral=True # A mensagem de erro só será visível para quem usou o comando
             )
 
-        if quantidade > 100:
-            return await interaction.followup.send(
-                embed=Embeds.erro("Limite Excedido", "Você só pode apagar até 100 mensagens por vez.", bot_user=self.bot.user),
-                ephemeral=True
-            )
+        job = PurgeJob(interaction.channel, quantidade, self.bot.outbound, interaction.user.id)
+        view = PurgeView(job)
+        # Uma única mensagem de progresso (só para quem pediu), editada durante a limpeza
+        await interaction.response.send_message(embed=self._purge_embed(job, False, self.bot.user), view=view, ephemeral=True)
 
-        try:
-            # O método purge do canal de texto faz a limpeza.
-            # O +1 é para incluir a mensagem do próprio comando /limpar na contagem, se aplicável,
-            # mas como a resposta é adiada, geralmente não é necessário. Limitamos a quantidade exata.
-            deleted_messages = await interaction.channel.purge(limit=quantidade)
+        async def report(job: PurgeJob, final: bool):
+            embed = self._purge_embed(job, final, self.bot.user)
+            if final:
+                view.stop()
+            if time.monotonic() - job.started < INTERACTION_LIFETIME:
+                await interaction.edit_original_response(embed=embed, view=None if final else view)
+            elif final:
+                channel = job.channel
+                self.bot.outbound.submit(("channel", channel.id), lambda: channel.send(content=f"<@{job.requester_id}>", embed=embed))
 
-            # Envia uma mensagem de sucesso que só o autor do comando vê (ephemeral=True)
-            await interaction.followup.send(
-                embed=Embeds.sucesso("Limpeza Concluída!", f"**{len(deleted_messages)}** mensagens foram apagadas deste canal.", bot_user=self.bot.user),
-                ephemeral=True
-            )
+        def finished(_):
+            if self.purges.get(guild_id) is job:
+                del self.purges[guild_id]
 
-        except discord.Forbidden:
-            # Caso o bot não tenha a permissão necessária no canal.
-            await interaction.followup.send(
-                embed=Embeds.erro("Permissão Negada", "Eu não tenho permissão para apagar mensagens neste canal.", bot_user=self.bot.user),
-                ephemeral=True
-            )
-        except Exception as e:
-            # Captura outros erros inesperados.
-            print(f"Erro ao executar /limpar: {e}")
-            await interaction.followup.send(
-                embed=Embeds.erro("Ocorreu um Erro", "Não foi possível completar a limpeza das mensagens.", bot_user=self.bot.user),
-                ephemeral=True
-            )
+        self.purges[guild_id] = job
+        job.start(report).add_done_callback(finished)
 
     # Tratamento de erro para o caso de o usuário não ter a permissão necessária.
     @limpar.error
     async def limpar_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, AdmissionRejected):
+            return  # o usuário já recebeu o "tente de novo"
         if isinstance(error, app_commands.MissingPermissions):
             await interaction.response.send_message(
                 embed=Embeds.erro("Acesso Negado", "Você não tem permissão para usar este comando.", bot_user=self.bot.user),
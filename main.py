@@ -1,79 +1,181 @@
+import time
+# Início do processo, antes dos imports pesados: a primeira fase medida da inicialização
+BOOT_STARTED = time.perf_counter()
+
+import asyncio
 import os
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 from itertools import cycle
 import wavelink
+from utils.admission import AdmissionControl
+from utils.cluster import ClusterLink
+from utils.gateway_cache import LOW_MEMORY, client_options
+from utils.guild_settings import GuildSettingsStore
+from utils.lavalink_pool import NodeBalancer, build_nodes, load_node_configs
+from utils.metrics import InstrumentedTree
+from utils.outbound import OutboundScheduler
+from utils.startup import BootTimer, sync_if_changed
 
 load_dotenv()
 
 TOKEN = os.getenv('DISCORD_TOKEN')
-LAVALINK_HOST = os.getenv("LAVALINK_HOST")
-LAVALINK_PORT = int(os.getenv("LAVALINK_PORT", 2333))
-LAVALINK_PASSWORD = os.getenv("LAVALINK_PASSWORD")
-
-intents = discord.Intents.default()
-intents.guilds = True
-intents.voice_states = True
-intents.message_content = True
-
-class MyBot(commands.Bot):
-    def __init__(self):
-        super().__init__(command_prefix='!boris ', intents=intents)
-        self.bot_activities = cycle([
+
+class MyBot(commands.AutoShardedBot):
+    def __init__(self, *, shard_ids: list[int] | None = None, shard_count: int | None = None, cluster: ClusterLink | None = None):
+        # Sem shard_ids/shard_count o discord.py escolhe a quantidade de shards sozinho (auto-sharding).
+        # Com o launcher (cluster.py), cada processo recebe só a sua faixa de shards.
+        # A InstrumentedTree mede a duração de todos os comandos de barra (ver cogs/metrics_cog.py)
+        # Intents e caches do gateway: só o que os cogs usam, a menos que LOW_MEMORY_CACHE=0 (ver utils/gateway_cache.py)
+        super().__init__(command_prefix='!boris ', shard_ids=shard_ids, shard_count=shard_count, tree_cls=InstrumentedTree, **client_options(LOW_MEMORY))
+        self.cluster = cluster
+        self.activities_list = [
             discord.Game(name="músicas com /play"),
             discord.Activity(type=discord.ActivityType.listening, name="suas dúvidas em /ajuda"),
             discord.Game(name="no seu servidor favorito!")
-        ])
+        ]
+        self.bot_activities = cycle(self.activities_list)
+        self.node_balancer = NodeBalancer(self)
+        # Fila global de mensagens enviadas/editadas pelo bot, respeitando os limites por canal
+        self.outbound = OutboundScheduler()
+        # Configurações por guild: lidas da memória, gravadas em lote no SQLite
+        self.settings = GuildSettingsStore()
+        # Fichas por usuário/guild para os comandos caros e limite global de buscas no Lavalink
+        self.admission = AdmissionControl()
+        # Tempo de cada fase até o on_ready (ver utils/startup.py)
+        self.boot = BootTimer(BOOT_STARTED)
+        self.boot.mark("imports")
 
     async def setup_hook(self):
-        print(f"Tentando conectar ao Lavalink em {LAVALINK_HOST}:{LAVALINK_PORT}...")
-        node_uri = f"http://{LAVALINK_HOST}:{LAVALINK_PORT}"
-        node = wavelink.Node(uri=node_uri, password=LAVALINK_PASSWORD)
-        await wavelink.Pool.connect(client=self, nodes=[node])
+        self.boot.mark("login")
+        self.outbound.start()
+        self.settings.start()
+
+        # Os cogs carregam enquanto a conexão com o Lavalink ainda está em andamento
+        await asyncio.gather(
+            self.boot.measure("lavalink", self.connect_nodes()),
+            self.boot.measure("cogs", self.load_cogs()),
+        )
+
+        # Comandos de barra são globais: com vários clusters, só o cluster 0 sincroniza
+        if self.cluster and not self.cluster.is_primary:
+            print(f"Cluster {self.cluster.cluster_id}: sincronização de comandos fica com o cluster 0.")
+        else:
+            try:
+                synced = await self.boot.measure("sync", sync_if_changed(self.tree, self.application_id))
+                if synced is None:
+                    print("Comandos de barra (/) sem mudanças desde a última sincronização.")
+                else:
+                    print(f"Sincronizados {synced} comandos de barra (/).")
+            except Exception as e:
+                print(f"Falha ao sincronizar comandos: {e}")
+        self.boot.mark()
+
+    async def connect_nodes(self):
+        nodes = build_nodes(load_node_configs(), self.node_balancer.previous_sessions)
+        print(f"Tentando conectar ao Lavalink em {', '.join(node.identifier for node in nodes)}...")
+        await wavelink.Pool.connect(client=self, nodes=nodes)
+        self.node_balancer.start()
+
+    async def load_cogs(self):
+        if not os.path.exists('./cogs'):
+            return
+        names = [filename[:-3] for filename in sorted(os.listdir('./cogs')) if filename.endswith('.py') and not filename.startswith('__')]
+
+        async def load(name: str):
+            try:
+                await self.load_extension(f'cogs.{name}')
+                print(f'-> Cog "{name}" carregado com sucesso.')
+            except Exception as e:
+                print(f'-> Falha ao carregar o cog "{name}". Erro: {e}')
 
         print("\nCarregando extensões (cogs)...")
-        if os.path.exists('./cogs'):
-            for filename in os.listdir('./cogs'):
-                if filename.endswith('.py') and not filename.startswith('__'):
-                    try:
-                        await self.load_extension(f'cogs.{filename[:-3]}')
-                        print(f'-> Cog "{filename[:-3]}" carregado com sucesso.')
-                    except Exception as e:
-                        print(f'-> Falha ao carregar o cog "{filename[:-3]}". Erro: {e}')
+        await asyncio.gather(*(load(name) for name in names))
 
+    async def close(self):
+        # Os players continuam tocando no Lavalink, esperando a retomada da sessão no próximo boot
+        detached = self.node_balancer.detach_players()
+        if detached:
+            print(f"{detached} player(s) mantidos no Lavalink para a retomada da sessão.")
+        # Grava as configurações que ainda estavam só em memória
         try:
-            synced = await self.tree.sync()
-            print(f"Sincronizados {len(synced)} comandos de barra (/).")
+            await self.settings.stop()
         except Exception as e:
-            print(f"Falha ao sincronizar comandos: {e}")
+            print(f"Falha ao gravar as configurações das guilds: {e}")
+        await super().close()
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.settings.forget(guild.id)
 
     @tasks.loop(minutes=1)
     async def change_status_task(self):
-        await self.change_presence(activity=next(self.bot_activities))
+        if self.cluster:
+            # Todos os clusters mostram o mesmo status, escolhido pelo cluster 0
+            index = await self.cluster.presence_index(len(self.activities_list))
+            await self.change_presence(activity=self.activities_list[index])
+        else:
+            await self.change_presence(activity=next(self.bot_activities))
+
+    @tasks.loop(seconds=15)
+    async def publish_cluster_stats(self):
+        await self.cluster.publish(self.local_stats())
+
+    def local_stats(self) -> dict:
+        """Números deste processo (guilds, players, latência)."""
+        return {
+            "guilds": len(self.guilds),
+            "players": len(self.voice_clients),
+            "shards": list(self.shards),
+            "latency": self.latency,
+        }
+
+    async def global_stats(self) -> dict[int, dict]:
+        """Números de todos os clusters. Sem launcher, só existe o cluster 0 (este processo)."""
+        if not self.cluster:
+            return {0: self.local_stats()}
+        stats = await self.cluster.collect()
+        stats[self.cluster.cluster_id] = self.local_stats()
+        return stats
 
     async def on_ready(self):
         await self.wait_until_ready()
+        if "total" not in self.boot.phases:
+            self.boot.mark("gateway")
+            self.boot.record("total", self.boot.elapsed())
         print('------')
         print(f'Logado como {self.user} (ID: {self.user.id})')
+        print(f'Inicialização: {self.boot.summary()}')
+        print(f"Cache do gateway: {'econômico' if LOW_MEMORY else 'completo'} (LOW_MEMORY_CACHE)")
+        if self.cluster:
+            print(f'Cluster {self.cluster.cluster_id}/{self.cluster.cluster_count} com os shards {self.cluster.shard_ids}')
         print(f'Versão do Wavelink: {wavelink.__version__}')
         print('Iniciando tarefa de mudança de status...')
         print('------')
         if not self.change_status_task.is_running():
             self.change_status_task.start()
+        if self.cluster and not self.publish_cluster_stats.is_running():
+            self.publish_cluster_stats.start()
 
     # A CORREÇÃO FINAL E DEFINITIVA ESTÁ AQUI
     # O evento passa um objeto 'payload', que contém um objeto 'node', que por sua vez contém o 'identifier'.
     async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload):
         print('------')
         print(f"Nó do Wavelink '{payload.node.identifier}' está pronto e conectado!")
+        if payload.resumed:
+            print(f"Sessão anterior retomada: os players que estavam tocando continuam no nó '{payload.node.identifier}'.")
+        self.node_balancer.remember_session(payload.node)
         print(f'DJ Boris está 100% online e funcional!')
         print('------')
 
-bot = MyBot()
+    async def on_wavelink_node_disconnected(self, payload: wavelink.NodeDisconnectedEventPayload):
+        print(f"Nó do Wavelink '{payload.node.identifier}' desconectou! Movendo os players para outro nó...")
+        await self.node_balancer.failover(payload.node)
 
 if __name__ == "__main__":
+    # Processo único. Para vários processos, use o launcher: python cluster.py
     if TOKEN:
+        bot = MyBot()
         bot.run(TOKEN)
     else:
         print("ERRO CRÍTICO: O token do Discord não foi encontrado no arquivo .env!")
\ No newline at end of file
@@ -0,0 +1,52 @@
+import asyncio
+import types
+
+import discord
+import pytest
+from discord import app_commands
+
+from utils.admission import AdmissionControl, AdmissionRejected
+from utils.metrics import InstrumentedTree
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    def is_done(self) -> bool:
+        return bool(self.sent)
+
+    async def send_message(self, **fields):
+        self.sent.append(fields)
+
+
+def interaction(admission: AdmissionControl, command: str = "limpar"):
+    return types.SimpleNamespace(
+        type=discord.InteractionType.application_command,
+        command=types.SimpleNamespace(name=command, qualified_name=command),
+        namespace=types.SimpleNamespace(),
+        user=types.SimpleNamespace(id=1),
+        guild_id=2,
+        extras={},
+        response=FakeResponse(),
+        client=types.SimpleNamespace(admission=admission, user=None),
+    )
+
+
+def test_commands_refused_by_later_checks_get_their_tokens_back():
+    async def run():
+        admission = AdmissionControl(user_capacity=10, user_rate=0.001, guild_capacity=10, guild_rate=0.001)
+        tree = InstrumentedTree.__new__(InstrumentedTree)
+        # /limpar custa 5: sem devolução, o terceiro seria recusado
+        for _ in range(5):
+            call = interaction(admission)
+            assert await admission.admit(call)
+            # Como o handler de erro do cog: responde "Acesso Negado" antes de a árvore ver o erro
+            await call.response.send_message(content="Acesso Negado")
+            await tree.on_error(call, app_commands.MissingPermissions(["manage_messages"]))
+        assert await admission.admit(interaction(admission))
+        assert await admission.admit(interaction(admission))
+        with pytest.raises(AdmissionRejected):
+            await admission.admit(interaction(admission))
+
+    asyncio.run(run())
@@ -0,0 +1,25 @@
+import asyncio
+import gc
+
+from utils import background
+
+
+def test_spawn_keeps_task_alive_and_reports_errors(capsys):
+    async def slow():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def broken():
+        raise RuntimeError("falhou")
+
+    async def main():
+        task = background.spawn(slow(), name="lenta")
+        failing = background.spawn(broken(), name="quebrada")
+        del task, failing
+        gc.collect()
+        assert len(background._tasks) == 2
+        await asyncio.sleep(0.05)
+        assert not background._tasks
+
+    asyncio.run(main())
+    assert "Erro na tarefa em segundo plano 'quebrada': RuntimeError: falhou" in capsys.readouterr().out
@@ -0,0 +1,19 @@
+import asyncio
+
+import wavelink
+
+from utils import metrics
+
+
+def test_timed_search_records_latency_and_results(monkeypatch):
+    async def fake_search(query, /, *, source=wavelink.TrackSource.YouTubeMusic, node=None):
+        return [object(), object()]
+
+    monkeypatch.setattr(wavelink.Playable, "search", fake_search)
+    before = metrics.SEARCH_RESULTS._values.get(("url",), 0)
+
+    result = asyncio.run(metrics.timed_search("https://youtu.be/abc", source=None))
+
+    assert len(result) == 2
+    assert metrics.SEARCH_RESULTS._values[("url",)] == before + 2
+    assert metrics.SEARCH_LATENCY._series[("url", "found")][2] >= 1
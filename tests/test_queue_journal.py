@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from utils.queue_journal import GuildQueueState, QueueJournal
+
+
+def track(n: int) -> dict:
+    return {"encoded": f"enc{n}", "info": {"title": f"T{n}"}}
+
+
+def test_failed_write_loses_nothing(tmp_path):
+    journal = QueueJournal(str(tmp_path))
+    original_write = journal._write
+    failures = []
+
+    def write_once_failing(batches, rewrite, written):
+        if not failures:
+            failures.append(True)
+            raise OSError("disco cheio")
+        original_write(batches, rewrite, written)
+
+    journal._write = write_once_failing
+
+    async def run():
+        state = GuildQueueState()
+        state.voice_channel_id = 10
+        state.queue = [track(1), track(2)]
+        journal.snapshot(1, state)
+        journal.record(1, "dequeue")
+        journal.record(2, "session", voice_channel_id=20, text_channel_id=None)
+        journal.record(2, "enqueue", tracks=[track(9)])
+
+        with pytest.raises(OSError):
+            await journal.flush()
+        # Chegou mais coisa antes do próximo flush: vai depois do que falhou
+        journal.record(1, "position", position=42_000)
+        await journal.flush()
+        return await journal.load_all()
+
+    states = asyncio.run(run())
+    assert states[1].current == track(1)
+    assert states[1].queue == [track(2)]
+    assert states[1].position == 42_000
+    assert states[2].voice_channel_id == 20
+    assert states[2].queue == [track(9)]
+
+
+def test_snapshot_during_failed_write_wins(tmp_path):
+    journal = QueueJournal(str(tmp_path))
+
+    async def run():
+        journal.record(1, "session", voice_channel_id=10, text_channel_id=None)
+        journal.record(1, "enqueue", tracks=[track(1)])
+        written = set()
+        batches, journal._pending = journal._pending, type(journal._pending)(list)
+        rewrite, journal._rewrite = journal._rewrite, set()
+        # Um snapshot chega enquanto a escrita do lote antigo está falhando
+        state = GuildQueueState()
+        state.voice_channel_id = 10
+        state.queue = [track(5)]
+        journal.snapshot(1, state)
+        journal._requeue(batches, rewrite, written)
+        await journal.flush()
+        return await journal.load_all()
+
+    assert asyncio.run(run())[1].queue == [track(5)]
@@ -0,0 +1,89 @@
+import asyncio
+import types
+
+from cogs.music_cog import MusicCog
+from utils.prefetch import Prefetcher
+from utils.queue import IndexedQueue, LazyTrack, PendingTrack
+from utils.queue_journal import GuildQueueState, QueueJournal
+
+GUILD_ID = 1
+VOICE_ID = 10
+
+
+def lazy(n: int) -> LazyTrack:
+    return LazyTrack(f"enc{n}", f"id{n}", f"T{n}", "Autor", 180_000, None, "youtube")
+
+
+class FakePlayer:
+    def __init__(self):
+        self.queue = IndexedQueue()
+        self.guild = types.SimpleNamespace(id=GUILD_ID)
+        self.playing = False
+        self.played = []
+        self.text_channel_id = None
+
+    async def play(self, track, *, start: int = 0):
+        self.playing = True
+        self.played.append((track, start))
+
+
+def make_cog(tmp_path, resolve=None):
+    """MusicCog só com o que a restauração usa: diário em disco, Prefetcher e um player falso."""
+    cog = MusicCog.__new__(MusicCog)
+    player = FakePlayer()
+    guild = types.SimpleNamespace(voice_client=None, get_channel=lambda channel_id: object() if channel_id == VOICE_ID else None)
+    cog.bot = types.SimpleNamespace(get_guild=lambda guild_id: guild)
+    cog.journal = QueueJournal(str(tmp_path))
+    cog.prefetcher = Prefetcher(resolve or (lambda entry: asyncio.sleep(0)), lambda *args: None)
+    cog.show_now_playing = lambda *args: None
+
+    async def connect(channel):
+        return player
+
+    cog.connect = connect
+    return cog, player
+
+
+def saved_state(current, queue, position) -> GuildQueueState:
+    state = GuildQueueState()
+    state.voice_channel_id = VOICE_ID
+    state.current = current.raw_data
+    state.queue = [entry.raw_data for entry in queue]
+    state.position = position
+    return state
+
+
+async def restore(cog, state) -> GuildQueueState:
+    cog.journal.snapshot(GUILD_ID, state)
+    await cog.journal.flush()
+    states = await cog.journal.load_all()
+    assert await cog._restore_guild(GUILD_ID, states[GUILD_ID])
+    await cog.journal.flush()
+    return (await cog.journal.load_all())[GUILD_ID]
+
+
+def test_restore_lazy_current_track_keeps_journal_in_step(tmp_path):
+    cog, player = make_cog(tmp_path)
+    replayed = asyncio.run(restore(cog, saved_state(lazy(1), [lazy(2), lazy(3)], 90_000)))
+
+    # O player volta na mesma música, na posição salva, e a fila fica intacta
+    (track, start), = player.played
+    assert track.title == "T1" and start == 90_000
+    assert [entry.title for entry in player.queue] == ["T2", "T3"]
+    # O diário continua dizendo o mesmo que o player
+    assert replayed.current["lazy"][2] == "T1"
+    assert [data["lazy"][2] for data in replayed.queue] == ["T2", "T3"]
+    assert replayed.position == 90_000
+
+
+def test_restore_pending_current_track_is_resolved_in_place(tmp_path):
+    async def resolve(entry):
+        return lazy(1).to_playable()
+
+    cog, player = make_cog(tmp_path, resolve)
+    replayed = asyncio.run(restore(cog, saved_state(PendingTrack("T1 Autor", title="T1"), [lazy(2)], 5_000)))
+
+    (track, start), = player.played
+    assert track.title == "T1" and start == 5_000
+    assert [entry.title for entry in player.queue] == ["T2"]
+    assert [data["lazy"][2] for data in replayed.queue] == ["T2"]
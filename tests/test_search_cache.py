@@ -0,0 +1,34 @@
+import asyncio
+
+import wavelink
+
+from benchmarks.queue_bench import fake_payload
+from utils.search_cache import SearchCache, normalize_query
+
+
+def test_text_searches_ignore_case_and_spacing():
+    assert normalize_query("  Bohemian   RHAPSODY ") == normalize_query("bohemian rhapsody")
+
+
+def test_urls_differing_only_in_case_are_different_entries(tmp_path):
+    upper = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    lower = "https://www.youtube.com/watch?v=dqw4w9wgxcq"
+    assert normalize_query(upper) != normalize_query(lower)
+
+    async def run():
+        cache = SearchCache(path=str(tmp_path / "cache.sqlite3"))
+        await cache.put(upper, None, [wavelink.Playable(fake_payload(1))])
+        await cache.put(lower, None, [wavelink.Playable(fake_payload(2))])
+        from_memory = (await cache.get(upper))[0].identifier, (await cache.get(lower))[0].identifier
+
+        # A camada em disco usa a mesma chave: um cache novo no mesmo arquivo lê do SQLite
+        cache.close()
+        cache = SearchCache(path=str(tmp_path / "cache.sqlite3"))
+        from_disk = (await cache.get(upper))[0].identifier, (await cache.get(lower))[0].identifier
+        cache.close()
+        return from_memory, from_disk
+
+    from_memory, from_disk = asyncio.run(run())
+    expected = (fake_payload(1)["info"]["identifier"], fake_payload(2)["info"]["identifier"])
+    assert from_memory == expected
+    assert from_disk == expected
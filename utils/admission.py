@@ -0,0 +1,187 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable
+
+import discord
+from discord import app_commands
+
+from utils.embeds import Embeds
+from utils.metrics import registry
+from utils.outbound import TokenBucket
+
+ADMISSION_REJECTED = registry.counter("boris_admission_rejected_total", "Comandos recusados pelo controle de admissão.", ("command", "scope"))
+SEARCH_SHED = registry.counter("boris_search_shed_total", "Buscas no Lavalink recusadas por excesso de buscas simultâneas.")
+
+# Fichas (capacidade) e reposição por segundo de cada usuário e de cada guild
+USER_CAPACITY = float(os.getenv("ADMISSION_USER_CAPACITY", 10))
+USER_RATE = float(os.getenv("ADMISSION_USER_RATE", 0.2))
+GUILD_CAPACITY = float(os.getenv("ADMISSION_GUILD_CAPACITY", 30))
+GUILD_RATE = float(os.getenv("ADMISSION_GUILD_RATE", 0.5))
+# Buscas no Lavalink em andamento ao mesmo tempo (todas as guilds) e quanto uma busca espera por uma vaga
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", 16))
+SEARCH_MAX_WAIT = float(os.getenv("SEARCH_MAX_WAIT", 5))
+
+
+def _play_cost(namespace: app_commands.Namespace) -> float:
+    busca = getattr(namespace, "busca", "") or ""
+    # Link de playlist: centenas de faixas para a fila e para o Prefetcher
+    return 5 if "list=" in busca or "/playlist" in busca or "/sets/" in busca else 1
+
+
+def _splay_cost(namespace: app_commands.Namespace) -> float:
+    link = getattr(namespace, "link_ou_nome", "") or ""
+    # Playlists e álbuns viram uma busca no Lavalink por faixa, além da paginação no Spotify
+    return 10 if "/playlist/" in link or "/album/" in link else 2
+
+
+# Custo de cada comando em fichas; o que não está aqui custa 1
+COMMAND_COSTS: dict[str, float | Callable[[app_commands.Namespace], float]] = {
+    "play": _play_cost,
+    "splay": _splay_cost,
+    "limpar": 5,
+    "queue": 0.5,
+    "cache": 0.5,
+}
+
+
+class AdmissionRejected(app_commands.CheckFailure):
+    """Comando recusado pelo controle de admissão (o usuário já recebeu a resposta)."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Recusado ({scope}), tente de novo em {retry_after:.0f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class SearchOverloaded(Exception):
+    """Todas as vagas de busca no Lavalink ficaram ocupadas por mais de `SEARCH_MAX_WAIT`."""
+
+
+class AdmissionControl:
+    """
+    Controle de admissão dos comandos caros (música, Spotify, limpeza).
+
+    Cada comando custa fichas (`COMMAND_COSTS`: uma playlist custa mais que uma música) e
+    é cobrado do balde do usuário e do balde da guild. Sem fichas em algum dos dois, o
+    comando é recusado na hora, com uma resposta curta dizendo quando tentar de novo, sem
+    chegar ao Lavalink nem ao Spotify. Os cogs chamam `admit` no `interaction_check`.
+
+    O `interaction_check` roda antes das checagens de permissão e da conversão dos
+    argumentos; se uma delas recusar o comando, a árvore chama `refund` e as fichas voltam.
+
+    À parte, `search_slot` limita quantas buscas no Lavalink rodam ao mesmo tempo no bot
+    inteiro: quem espera mais que `SEARCH_MAX_WAIT` por uma vaga recebe `SearchOverloaded`.
+    """
+
+    def __init__(self, *, user_capacity: float = USER_CAPACITY, user_rate: float = USER_RATE,
+                 guild_capacity: float = GUILD_CAPACITY, guild_rate: float = GUILD_RATE,
+                 search_concurrency: int = SEARCH_CONCURRENCY, search_max_wait: float = SEARCH_MAX_WAIT):
+        self.user_limits = (user_capacity, user_rate)
+        self.guild_limits = (guild_capacity, guild_rate)
+        self.search_concurrency = search_concurrency
+        self.search_max_wait = search_max_wait
+
+        self._buckets: dict[tuple[str, int], TokenBucket] = {}
+        self._last_prune = time.monotonic()
+        self._searches = asyncio.Semaphore(search_concurrency)
+        self.searches_waiting = 0
+        self.rejected = 0
+        registry.gauge("boris_search_slots_in_use", "Buscas no Lavalink em andamento.", collect=lambda: [((), self.search_concurrency - self._searches._value)])
+
+    @staticmethod
+    def cost(command: app_commands.Command, namespace: app_commands.Namespace) -> float:
+        cost = COMMAND_COSTS.get(command.name, 1)
+        return cost(namespace) if callable(cost) else cost
+
+    def _bucket(self, scope: str, id: int) -> TokenBucket:
+        bucket = self._buckets.get((scope, id))
+        if bucket is None:
+            capacity, rate = self.user_limits if scope == "user" else self.guild_limits
+            bucket = self._buckets[(scope, id)] = TokenBucket(capacity, rate)
+        return bucket
+
+    def _prune(self, now: float):
+        # Um balde cheio é igual a um balde que não existe: não precisa ficar na memória
+        if time.monotonic() - self._last_prune < 60:
+            return
+        self._last_prune = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if bucket.wait_time(now, bucket.capacity) == 0]:
+            del self._buckets[key]
+
+    def try_admit(self, user_id: int, guild_id: int | None, cost: float) -> tuple[str, float] | None:
+        """Cobra `cost` fichas do usuário e da guild. Recusado: devolve (escopo, segundos até haver fichas)."""
+        buckets = [("user", self._bucket("user", user_id))]
+        if guild_id is not None:
+            buckets.append(("guild", self._bucket("guild", guild_id)))
+        # Depois de criar os baldes: um balde novo não pode ver o relógio andar para trás
+        now = asyncio.get_running_loop().time()
+
+        # Confere os dois antes de cobrar: uma recusa da guild não gasta as fichas do usuário
+        for scope, bucket in buckets:
+            wait = bucket.wait_time(now, min(cost, bucket.capacity))
+            if wait > 0:
+                return scope, wait
+        for _, bucket in buckets:
+            bucket.try_take(now, min(cost, bucket.capacity))
+        self._prune(now)
+        return None
+
+    def refund(self, interaction: discord.Interaction):
+        """Devolve as fichas de um comando admitido que não chegou a rodar (permissão ou argumento inválido)."""
+        charged = interaction.extras.pop("admission", None)
+        if charged is None:
+            return
+        user_id, guild_id, cost = charged
+        for key in (("user", user_id), ("guild", guild_id)):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + min(cost, bucket.capacity))
+
+    async def admit(self, interaction: discord.Interaction) -> bool:
+        """`interaction_check` dos cogs: admite o comando ou responde e levanta `AdmissionRejected`."""
+        # O autocomplete também passa pelas checagens, mas não custa nada: só lê a memória
+        if interaction.type is discord.InteractionType.autocomplete or interaction.command is None:
+            return True
+
+        cost = self.cost(interaction.command, interaction.namespace)
+        rejected = self.try_admit(interaction.user.id, interaction.guild_id, cost)
+        if rejected is None:
+            interaction.extras["admission"] = (interaction.user.id, interaction.guild_id, cost)
+            return True
+
+        scope, retry_after = rejected
+        self.rejected += 1
+        ADMISSION_REJECTED.inc(interaction.command.name, scope)
+        quem = "Você está" if scope == "user" else "Este servidor está"
+        await interaction.response.send_message(embed=Embeds.erro(
+            "Calma aí! 🐢",
+            f"{quem} pedindo muita coisa ao mesmo tempo. Tente de novo em **{max(1, round(retry_after))}s**.",
+            bot_user=interaction.client.user,
+        ), ephemeral=True)
+        raise AdmissionRejected(scope, retry_after)
+
+    @asynccontextmanager
+    async def search_slot(self):
+        """Vaga para uma busca no Lavalink. Sem vaga em `search_max_wait` segundos, levanta `SearchOverloaded`."""
+        self.searches_waiting += 1
+        try:
+            await asyncio.wait_for(self._searches.acquire(), self.search_max_wait)
+        except asyncio.TimeoutError:
+            SEARCH_SHED.inc()
+            raise SearchOverloaded() from None
+        finally:
+            self.searches_waiting -= 1
+        try:
+            yield
+        finally:
+            self._searches.release()
+
+    def stats(self) -> dict:
+        return {
+            "rejected": self.rejected,
+            "buckets": len(self._buckets),
+            "searches_running": self.search_concurrency - self._searches._value,
+            "searches_waiting": self.searches_waiting,
+        }
@@ -0,0 +1,227 @@
+import asyncio
+import bisect
+import heapq
+import time
+import unicodedata
+
+from discord import app_commands
+
+from utils.metrics import registry
+
+AUTOCOMPLETE_LATENCY = registry.histogram(
+    "boris_autocomplete_duration_seconds", "Tempo para montar as sugestões do autocomplete.", ("command",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+# O Discord aceita no máximo 25 sugestões, com nome e valor de até 100 caracteres
+MAX_CHOICES = 25
+MAX_CHOICE_LENGTH = 100
+# Quantas posições do índice ordenado são examinadas por consulta (limita o pior caso de prefixos curtos)
+SCAN_LIMIT = 2000
+# Uma música tocada na guild vale tanto quanto esta quantidade de reproduções em outras guilds
+GUILD_WEIGHT = 10
+
+
+def normalize_title(text: str) -> str:
+    """Minúsculas, sem acentos e sem pontuação: "Música - Ação!" vira "musica acao"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return " ".join("".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c)).split())
+
+
+class _Entry:
+    __slots__ = ("label", "uri", "query", "plays")
+
+    def __init__(self, label: str, uri: str | None, query: str):
+        self.label = label
+        self.uri = uri
+        self.query = query
+        self.plays = 0
+
+
+class TitleIndex:
+    """
+    Índice de prefixos dos títulos que o bot já viu, para o autocomplete do /play e do /splay.
+
+    As faixas entram pelas buscas que foram ao Lavalink e pelas músicas tocadas; cada
+    reprodução conta para a guild e para o total. A consulta é só memória: uma busca
+    binária num array ordenado com o início de cada palavra de cada título, então
+    "rhap" encontra "Bohemian Rhapsody". As sugestões são ordenadas pelas reproduções na
+    guild (com peso `GUILD_WEIGHT`) e depois pelas reproduções em todas as guilds.
+
+    Títulos novos ficam consultáveis pelas listas de mais tocadas na hora e entram no
+    array ordenado na próxima reconstrução incremental (`rebuild_interval`), feita em
+    segundo plano: só os títulos novos são ordenados e intercalados com o array atual.
+    """
+
+    def __init__(self, *, max_entries: int = 50_000, max_guild_entries: int = 200, rebuild_interval: float = 5.0):
+        self.max_entries = max_entries
+        self.max_guild_entries = max_guild_entries
+        self.rebuild_interval = rebuild_interval
+
+        # Título normalizado -> entrada (a ordem de inserção serve para descartar as mais antigas)
+        self._entries: dict[str, _Entry] = {}
+        # Array ordenado de (sufixo a partir de uma palavra, título normalizado)
+        self._sorted: list[tuple[str, str]] = []
+        self._pending: list[str] = []
+        self._guild_plays: dict[int, dict[str, int]] = {}
+        # As mais tocadas em todas as guilds, recalculadas a cada reconstrução
+        self._popular: list[str] = []
+        self._task: asyncio.Task | None = None
+        # Uma reconstrução por vez: duas juntas intercalariam o mesmo lote de `_pending`
+        self._rebuild_lock = asyncio.Lock()
+        self.last_rebuild = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- ALIMENTAÇÃO ---
+    def add(self, title: str, author: str | None = None, uri: str | None = None) -> str | None:
+        """Registra uma faixa (sem contar reprodução). Retorna a chave dela no índice."""
+        label = f"{title} - {author}" if author else title
+        key = normalize_title(label)
+        if not key:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = _Entry(label[:MAX_CHOICE_LENGTH], uri if uri and len(uri) <= MAX_CHOICE_LENGTH else None, f"{title} {author or ''}".strip()[:MAX_CHOICE_LENGTH])
+            self._pending.append(key)
+        elif uri and entry.uri is None and len(uri) <= MAX_CHOICE_LENGTH:
+            entry.uri = uri
+        return key
+
+    def add_track(self, track) -> str | None:
+        return self.add(track.title, track.author, track.uri)
+
+    def record_play(self, guild_id: int, track) -> None:
+        key = self.add_track(track)
+        if key is None:
+            return
+        self._entries[key].plays += 1
+        plays = self._guild_plays.setdefault(guild_id, {})
+        plays[key] = plays.get(key, 0) + 1
+        if len(plays) > self.max_guild_entries:
+            # Esquece a menos tocada (entre as de mesma contagem, a mais antiga)
+            del plays[min(plays, key=plays.__getitem__)]
+
+    def forget_guild(self, guild_id: int):
+        self._guild_plays.pop(guild_id, None)
+
+    # --- CONSULTA ---
+    def suggest(self, guild_id: int | None, text: str, *, limit: int = MAX_CHOICES) -> list[_Entry]:
+        tokens = normalize_title(text).split()
+        guild_plays = self._guild_plays.get(guild_id, {}) if guild_id is not None else {}
+
+        if not tokens:
+            # Nada digitado ainda: as mais tocadas da guild, completadas pelas mais tocadas em geral
+            keys = heapq.nlargest(limit, guild_plays, key=guild_plays.__getitem__)
+            keys += [key for key in self._popular if key not in guild_plays][:limit - len(keys)]
+            return [self._entries[key] for key in keys if key in self._entries]
+
+        candidates: set[str] = set()
+        # O termo mais longo é o mais seletivo: é ele que vai para a busca binária
+        anchor = max(tokens, key=len)
+        start = bisect.bisect_left(self._sorted, (anchor,))
+        for suffix, key in self._sorted[start:start + SCAN_LIMIT]:
+            if not suffix.startswith(anchor):
+                break
+            candidates.add(key)
+        # As mais tocadas (e as que ainda não entraram no array) são conferidas uma a uma
+        for key in (*guild_plays, *self._popular, *self._pending):
+            if key not in candidates and any(word.startswith(anchor) for word in key.split()):
+                candidates.add(key)
+
+        matches = []
+        for key in candidates:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if len(tokens) > 1:
+                words = key.split()
+                if not all(any(word.startswith(token) for word in words) for token in tokens):
+                    continue
+            score = guild_plays.get(key, 0) * GUILD_WEIGHT + entry.plays
+            # Mais reproduções primeiro; empate: títulos que começam pelo texto digitado, depois os mais curtos
+            matches.append((-score, not key.startswith(tokens[0]), len(key), key, entry))
+        return [match[-1] for match in heapq.nsmallest(limit, matches)]
+
+    def choices(self, guild_id: int | None, text: str, *, command: str, use_uri: bool = True) -> list[app_commands.Choice[str]]:
+        """
+        Sugestões no formato do autocomplete. Com `use_uri`, o valor enviado é o link da
+        faixa (o /play carrega direto, sem busca); sem ele, o valor é "título artista".
+        """
+        with AUTOCOMPLETE_LATENCY.time(command):
+            # Links não são completados: o que foi colado é o que vale
+            if "://" in text:
+                return []
+            return [
+                app_commands.Choice(name=entry.label, value=(entry.uri if use_uri and entry.uri else entry.query))
+                for entry in self.suggest(guild_id, text)
+            ]
+
+    # --- RECONSTRUÇÃO ---
+    @staticmethod
+    def _suffixes(keys: list[str]) -> list[tuple[str, str]]:
+        suffixes = []
+        for key in keys:
+            position = 0
+            while position != -1:
+                suffixes.append((key[position:], key))
+                position = key.find(" ", position)
+                if position != -1:
+                    position += 1
+        suffixes.sort()
+        return suffixes
+
+    @staticmethod
+    def _merge(current: list[tuple[str, str]], new: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        # Duas sequências já ordenadas: o timsort só intercala as duas, em tempo linear
+        merged = current + new
+        merged.sort()
+        return merged
+
+    def _evict(self) -> bool:
+        """Descarta as entradas mais antigas nunca tocadas acima do limite. Retorna se algo saiu."""
+        if len(self._entries) <= self.max_entries:
+            return False
+        # Desce até 90% do limite, para o array não ser refeito do zero a cada título novo
+        excess = len(self._entries) - int(self.max_entries * 0.9)
+        in_guilds = set().union(*self._guild_plays.values()) if self._guild_plays else set()
+        evicted = [key for key, entry in self._entries.items() if not entry.plays and key not in in_guilds][:excess]
+        for key in evicted:
+            del self._entries[key]
+        # Tudo já foi tocado: nada sai, e o array não precisa ser refeito do zero
+        return bool(evicted)
+
+    async def rebuild(self):
+        """Põe os títulos novos no array ordenado. Ordenação e intercalação rodam em thread."""
+        async with self._rebuild_lock:
+            await self._rebuild()
+
+    async def _rebuild(self):
+        # Os títulos continuam em `_pending` (e consultáveis) até o array novo ficar pronto
+        pending = self._pending[:]
+        if self._evict():
+            # Houve descarte: o array é refeito do zero, só com o que ficou
+            self._sorted = await asyncio.to_thread(self._suffixes, list(self._entries))
+        elif pending:
+            new = await asyncio.to_thread(self._suffixes, pending)
+            self._sorted = await asyncio.to_thread(self._merge, self._sorted, new)
+        del self._pending[:len(pending)]
+        self._popular = heapq.nlargest(MAX_CHOICES * 4, (key for key, entry in self._entries.items() if entry.plays), key=lambda key: self._entries[key].plays)
+        self.last_rebuild = time.time()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.rebuild_interval)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"Erro ao atualizar o índice do autocomplete: {e}")
@@ -0,0 +1,21 @@
+import asyncio
+from typing import Coroutine
+
+# O event loop guarda só referências fracas às tarefas: sem este conjunto, uma tarefa que
+# ninguém aguarda pode ser coletada pelo GC no meio do caminho
+_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine, *, name: str) -> asyncio.Task:
+    """Roda `coro` em segundo plano sem que ninguém precise aguardá-la. Erros vão para o console."""
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        error = task.exception()
+        print(f"Erro na tarefa em segundo plano '{task.get_name()}': {type(error).__name__}: {error}")
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+
+def split_shards(shard_count: int, cluster_count: int) -> list[list[int]]:
+    """Divide os shards em faixas contíguas, uma por cluster (processo)."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    ranges, start = [], 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Fórmula do Discord para saber em qual shard uma guild está."""
+    return (guild_id >> 22) % shard_count
+
+
+class ClusterLink:
+    """
+    Canal de coordenação entre um cluster (processo) e o launcher.
+
+    Usa objetos de um `multiprocessing.Manager` criados pelo launcher:
+    - `stats`: dicionário compartilhado, cada cluster publica seus números;
+    - `presence`: índice compartilhado do status atual, avançado só pelo cluster 0,
+      para que todos os clusters mostrem o mesmo status ao mesmo tempo.
+
+    As chamadas ao Manager são I/O entre processos, então rodam em thread.
+    """
+
+    def __init__(self, cluster_id: int, cluster_count: int, shard_ids: list[int], shard_count: int, stats, presence):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self._stats = stats
+        self._presence = presence
+
+    @property
+    def is_primary(self) -> bool:
+        """O cluster 0 é o responsável pelas tarefas globais (sincronizar comandos, status)."""
+        return self.cluster_id == 0
+
+    def owns_guild(self, guild_id: int) -> bool:
+        return shard_for_guild(guild_id, self.shard_count) in self.shard_ids
+
+    async def publish(self, stats: dict):
+        await asyncio.to_thread(self._stats.__setitem__, self.cluster_id, {**stats, "updated": time.time()})
+
+    async def collect(self) -> dict[int, dict]:
+        return await asyncio.to_thread(lambda: dict(self._stats))
+
+    async def presence_index(self, total: int) -> int:
+        """Índice do status a exibir. O cluster 0 avança; os outros apenas leem."""
+        def _step():
+            if self.is_primary:
+                self._presence.value = (self._presence.value + 1) % total
+            return self._presence.value % total
+        return await asyncio.to_thread(_step)
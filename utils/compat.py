@@ -0,0 +1,25 @@
+"""
+Os únicos acessos a partes privadas do wavelink e do discord.py, todos aqui.
+
+Nenhuma das duas bibliotecas tem API pública para isto. Os nomes abaixo foram conferidos
+no wavelink 3.5 e no discord.py 2.7, e o requirements.txt fixa essas faixas. Ao subir a
+versão de uma das duas, confira estes atributos primeiro.
+"""
+import discord
+import wavelink
+
+
+def set_resume_session(node: wavelink.Node, session_id: str | None):
+    """
+    Sessão que o nó tenta retomar ao conectar. O wavelink manda `Node._session_id` no
+    cabeçalho Session-Id do websocket, mas só o preenche sozinho depois do `ready`.
+    """
+    node._session_id = session_id
+
+
+def drop_voice_client(client: discord.Client, guild_id: int):
+    """
+    Esquece o voice client da guild sem desconectar (o `close()` do discord.py não o verá).
+    Usa `ConnectionState._remove_voice_client`, o mesmo que o discord.py chama ao desconectar.
+    """
+    client._connection._remove_voice_client(guild_id)
@@ -0,0 +1,38 @@
+import os
+
+import discord
+
+# Perfil de cache do gateway: "1" (padrão) guarda só o que os cogs usam; "0" volta aos caches completos
+LOW_MEMORY = os.getenv("LOW_MEMORY_CACHE", "1") != "0"
+
+
+def build_intents(low_memory: bool = LOW_MEMORY) -> discord.Intents:
+    """
+    Intents do bot. Todos os comandos são de barra, então no modo econômico fica só:
+    - guilds: canais e cargos (interaction.channel, canal de anúncios, permissões)
+    - voice_states: o Lavalink precisa dos eventos de voz, e `/play` lê `user.voice`
+    - guild_messages: o "Tocando Agora" conta as mensagens novas e apagadas do canal
+      (sem `message_content`: o texto das mensagens nunca é lido)
+    """
+    if not low_memory:
+        intents = discord.Intents.default()
+        intents.guilds = True
+        intents.voice_states = True
+        intents.message_content = True
+        return intents
+    return discord.Intents(guilds=True, voice_states=True, guild_messages=True)
+
+
+def client_options(low_memory: bool = LOW_MEMORY) -> dict:
+    """Argumentos de cache para o `discord.Client` (usados pelo bot e pelo benchmark de memória)."""
+    intents = build_intents(low_memory)
+    if not low_memory:
+        return {"intents": intents}
+    return {
+        "intents": intents,
+        # Só membros em canais de voz: o wavelink conta os ouvintes por `channel.members`
+        "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+        # Nenhuma mensagem guardada: on_message e on_raw_message_delete chegam do mesmo jeito
+        "max_messages": None,
+        "chunk_guilds_at_startup": False,
+    }
@@ -0,0 +1,99 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.metrics import registry
+
+MAILBOX_COLLAPSED = registry.counter("boris_guild_mailbox_collapsed_total", "Operações de player unificadas com uma igual que já esperava na fila da guild.", ("key",))
+
+
+class _Op:
+    __slots__ = ("key", "factory", "future")
+
+    def __init__(self, key, factory, future):
+        self.key = key
+        self.factory = factory
+        self.future = future
+
+
+class GuildActors:
+    """
+    Uma caixa de mensagens por guild para as operações que mexem no player e na fila.
+
+    Tudo o que é enviado com `submit` para a mesma guild roda uma operação por vez, na
+    ordem de chegada; guilds diferentes continuam em paralelo. Assim um fim de música não
+    pega a mesma faixa que um /play, nem volta a tocar depois de um /stop, e a saída por
+    inatividade confere o estado do player só quando chega a vez dela.
+
+    Uma operação com `key` igual à da última que ainda espera na caixa é unificada com
+    ela (ex: cinco /skip seguidos viram um só) e recebe o mesmo resultado.
+
+    A tarefa de cada guild só existe enquanto há operações na caixa. Uma operação nunca
+    deve esperar outra da mesma guild (`submit` de dentro de `submit`): ela ficaria
+    esperando a si mesma.
+    """
+
+    def __init__(self):
+        self._mailboxes: dict[int, deque[_Op]] = {}
+        self._runners: dict[int, asyncio.Task] = {}
+        self.collapsed = 0
+        registry.gauge("boris_guild_mailbox_depth", "Operações de player esperando na fila das guilds (total e maior fila).", ("kind",), collect=self._depths)
+
+    def _depths(self):
+        depths = [len(mailbox) for mailbox in self._mailboxes.values()]
+        return [(("total",), sum(depths)), (("max",), max(depths, default=0))]
+
+    def depth(self, guild_id: int) -> int:
+        mailbox = self._mailboxes.get(guild_id)
+        return len(mailbox) if mailbox else 0
+
+    def submit(self, guild_id: int, factory: Callable[[], Awaitable[Any]], *, key: Hashable | None = None) -> asyncio.Future:
+        """Agenda `factory()` na caixa da guild. Retorna um Future com o resultado."""
+        mailbox = self._mailboxes.get(guild_id)
+        if mailbox is None:
+            mailbox = self._mailboxes[guild_id] = deque()
+
+        if key is not None and mailbox and mailbox[-1].key == key:
+            self.collapsed += 1
+            MAILBOX_COLLAPSED.inc(str(key))
+            return mailbox[-1].future
+
+        op = _Op(key, factory, asyncio.get_running_loop().create_future())
+        mailbox.append(op)
+        if guild_id not in self._runners:
+            self._runners[guild_id] = asyncio.create_task(self._drain(guild_id, mailbox))
+        return op.future
+
+    def post(self, guild_id: int, factory: Callable[[], Awaitable[Any]], *, key: Hashable | None = None):
+        """Como `submit`, para quem não vai esperar o resultado: erros só vão para o log."""
+        self.submit(guild_id, factory, key=key).add_done_callback(lambda future: self._log_error(guild_id, future))
+
+    @staticmethod
+    def _log_error(guild_id: int, future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            print(f"Erro em uma operação do player da guild {guild_id}: {future.exception()}")
+
+    async def _drain(self, guild_id: int, mailbox: deque[_Op]):
+        op = None
+        try:
+            while mailbox:
+                op = mailbox.popleft()
+                try:
+                    result = await op.factory()
+                except Exception as e:
+                    if not op.future.done():
+                        op.future.set_exception(e)
+                else:
+                    if not op.future.done():
+                        op.future.set_result(result)
+        finally:
+            del self._runners[guild_id]
+            # Cancelada no meio (ex: descarregando o cog): a operação atual e o resto da caixa são descartados
+            for pending in ([op] if op else []) + list(mailbox):
+                if not pending.future.done():
+                    pending.future.cancel()
+            del self._mailboxes[guild_id]
+
+    def stop(self):
+        for runner in list(self._runners.values()):
+            runner.cancel()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+from utils.background import spawn
+from utils.metrics import registry
+from utils.storage import data_path
+
+# Tempo padrão (segundos) sem música antes de sair do canal
+IDLE_TIMEOUT = 300
+
+SETTINGS_LOADS = registry.counter("boris_guild_settings_loads_total", "Configurações de guild lidas do disco (uma vez por guild e processo).", ("result",))
+
+# Nome -> (tipo, valor padrão). Só o que difere do padrão vai para o disco.
+FIELDS: dict[str, tuple[type, object]] = {
+    "is_247": (bool, False),
+    "idle_timeout": (int, IDLE_TIMEOUT),
+    "default_volume": (int, 100),
+    "announce_channel_id": (int, None),
+}
+
+
+class GuildSettings:
+    """Configurações de uma guild. Leia à vontade; para mudar, use `GuildSettingsStore.update`."""
+
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, **values):
+        for name, (kind, default) in FIELDS.items():
+            value = values.get(name, default)
+            setattr(self, name, value if value is None else kind(value))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GuildSettings":
+        # Campos que deixaram de existir são ignorados; valores que não convertem voltam ao padrão
+        values = {}
+        for name, value in data.items():
+            if name in FIELDS:
+                try:
+                    values[name] = value if value is None else FIELDS[name][0](value)
+                except (TypeError, ValueError):
+                    continue
+        return cls(**values)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name, (_, default) in FIELDS.items() if getattr(self, name) != default}
+
+
+class GuildSettingsStore:
+    """
+    Configurações por guild (modo 24/7, inatividade, volume padrão, canal de anúncios).
+
+    Leituras vêm sempre da memória: `get` nunca toca o disco. Cada guild é carregada do
+    SQLite só na primeira vez que é usada (`load`), então a inicialização não depende de
+    quantas guilds o bot tem; cargas que chegam juntas (ex: a restauração das filas)
+    viram uma única consulta.
+
+    Escritas mudam a memória na hora e marcam a guild como suja; uma tarefa em segundo
+    plano grava as guilds sujas em lote a cada `flush_interval` (write-behind), e `stop`
+    grava o que faltou.
+    """
+
+    def __init__(self, path: str | None = None, *, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+        self._cache: dict[int, GuildSettings] = {}
+        self._dirty: set[int] = set()
+        # Guilds esperando a próxima consulta em lote, com o Future de cada uma
+        self._loading: dict[int, asyncio.Future] = {}
+        self._load_scheduled = False
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or data_path("guild_settings.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS guild_settings (guild_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        self._db.commit()
+        registry.gauge("boris_guild_settings_cached", "Guilds com configurações em memória.", collect=lambda: [((), len(self._cache))])
+
+    # --- ACESSO SÍNCRONO AO DISCO (sempre chamado via asyncio.to_thread) ---
+    def _read(self, guild_ids: list[int]) -> dict[int, dict]:
+        found = {}
+        with self._lock:
+            # Consultas em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(guild_ids), 500):
+                chunk = guild_ids[start:start + 500]
+                rows = self._db.execute(f"SELECT guild_id, data FROM guild_settings WHERE guild_id IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((row[0], json.loads(row[1])) for row in rows)
+        return found
+
+    def _write(self, rows: list[tuple[int, dict]]):
+        with self._lock:
+            # Guild de volta ao padrão: a linha some em vez de guardar "{}"
+            self._db.executemany("DELETE FROM guild_settings WHERE guild_id = ?", [(guild_id,) for guild_id, data in rows if not data])
+            self._db.executemany("INSERT OR REPLACE INTO guild_settings (guild_id, data) VALUES (?, ?)", [(guild_id, json.dumps(data)) for guild_id, data in rows if data])
+            self._db.commit()
+
+    # --- LEITURA ---
+    def get(self, guild_id: int) -> GuildSettings:
+        """Configurações em memória. Se a guild ainda não foi carregada, devolve os padrões."""
+        settings = self._cache.get(guild_id)
+        return settings if settings is not None else GuildSettings()
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self._cache
+
+    async def load(self, guild_id: int) -> GuildSettings:
+        """Garante que a guild está em memória. Depois da primeira vez, não espera nada."""
+        settings = self._cache.get(guild_id)
+        if settings is not None:
+            return settings
+
+        future = self._loading.get(guild_id)
+        if future is None:
+            future = self._loading[guild_id] = asyncio.get_running_loop().create_future()
+            if not self._load_scheduled:
+                # Junta as cargas pedidas na mesma volta do event loop em uma consulta só
+                self._load_scheduled = True
+                spawn(self._load_batch(), name="guild-settings-load")
+        return await asyncio.shield(future)
+
+    async def _load_batch(self):
+        await asyncio.sleep(0)
+        batch, self._loading = self._loading, {}
+        self._load_scheduled = False
+        try:
+            rows = await asyncio.to_thread(self._read, list(batch))
+        except Exception as e:
+            # Sem o disco, a guild segue com os padrões (e o que for mudado ainda é gravado depois)
+            print(f"Falha ao ler as configurações de {len(batch)} guild(s): {e}")
+            rows = {}
+
+        for guild_id, future in batch.items():
+            # Uma escrita feita enquanto a carga estava em andamento tem prioridade
+            if guild_id not in self._cache:
+                self._cache[guild_id] = GuildSettings.from_dict(rows[guild_id]) if guild_id in rows else GuildSettings()
+            SETTINGS_LOADS.inc("stored" if guild_id in rows else "default")
+            if not future.done():
+                future.set_result(self._cache[guild_id])
+
+    def forget(self, guild_id: int):
+        """Tira a guild da memória (ex: o bot saiu dela). O que está pendente ainda é gravado."""
+        if guild_id not in self._dirty:
+            self._cache.pop(guild_id, None)
+
+    # --- ESCRITA ---
+    async def update(self, guild_id: int, **changes) -> GuildSettings:
+        """Muda as configurações da guild. A memória muda na hora; o disco, no próximo flush."""
+        for name, value in changes.items():
+            if name not in FIELDS:
+                raise KeyError(f"Configuração desconhecida: {name}")
+            kind = FIELDS[name][0]
+            if value is not None and not isinstance(value, kind):
+                raise TypeError(f"A configuração {name} espera {kind.__name__}, recebeu {type(value).__name__}")
+
+        settings = await self.load(guild_id)
+        for name, value in changes.items():
+            setattr(settings, name, value)
+        self._dirty.add(guild_id)
+        return settings
+
+    async def flush(self):
+        # O lock garante que dois flushes não gravem lotes fora de ordem
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = [(guild_id, self._cache[guild_id].to_dict()) for guild_id in dirty]
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception:
+                # Tenta de novo no próximo flush
+                self._dirty |= dirty
+                raise
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Erro ao gravar as configurações das guilds: {e}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
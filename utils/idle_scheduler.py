@@ -0,0 +1,88 @@
+import asyncio
+import heapq
+from typing import Awaitable, Callable
+
+from utils.background import spawn
+
+
+class IdleScheduler:
+    """
+    Agenda central de desconexão por inatividade.
+
+    Em vez de um `asyncio.sleep(300)` por guild, existe um único heap de prazos
+    (deadline, guild_id, geração) e uma única tarefa em segundo plano que dorme até
+    o próximo prazo. Reagendar ou cancelar só troca a geração da guild: entradas
+    antigas no heap são ignoradas quando chegam ao topo (remoção preguiçosa), então
+    as duas operações são O(log n) e nunca disparam uma desconexão velha.
+    """
+
+    def __init__(self, callback: Callable[[int], Awaitable[None]]):
+        self.callback = callback
+        self._heap: list[tuple[float, int, int]] = []
+        self._active: dict[int, tuple[float, int]] = {}
+        self._generation = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def schedule(self, guild_id: int, timeout: float):
+        """(Re)agenda a desconexão da guild para daqui a `timeout` segundos."""
+        self._generation += 1
+        deadline = asyncio.get_running_loop().time() + timeout
+        self._active[guild_id] = (deadline, self._generation)
+        heapq.heappush(self._heap, (deadline, guild_id, self._generation))
+
+        # Só acorda a tarefa se o novo prazo passou a ser o mais próximo
+        if self._heap[0][2] == self._generation:
+            self._wakeup.set()
+        self._maybe_compact()
+
+    def cancel(self, guild_id: int):
+        """Houve atividade na guild: o prazo pendente (se houver) deixa de valer."""
+        self._active.pop(guild_id, None)
+
+    def deadline(self, guild_id: int) -> float | None:
+        entry = self._active.get(guild_id)
+        return entry[0] if entry else None
+
+    def _maybe_compact(self):
+        # Muitas entradas canceladas/reagendadas acumuladas: reconstrói o heap só com as válidas
+        if len(self._heap) > 2 * len(self._active) + 64:
+            self._heap = [(deadline, guild_id, gen) for guild_id, (deadline, gen) in self._active.items()]
+            heapq.heapify(self._heap)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            now = loop.time()
+
+            while self._heap and self._heap[0][0] <= now:
+                _, guild_id, gen = heapq.heappop(self._heap)
+                if self._active.get(guild_id, (None, None))[1] != gen:
+                    continue  # entrada antiga: foi cancelada ou reagendada
+                del self._active[guild_id]
+                # Cada desconexão roda em sua própria tarefa para não atrasar as outras
+                spawn(self._fire(guild_id), name=f"idle-{guild_id}")
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, guild_id: int):
+        try:
+            await self.callback(guild_id)
+        except Exception as e:
+            print(f"Erro na desconexão por inatividade da guild {guild_id}: {e}")
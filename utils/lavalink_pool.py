@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import time
+
+import wavelink
+
+from utils.compat import drop_voice_client, set_resume_session
+from utils.player import BorisPlayer
+from utils.storage import data_path
+
+# Um arquivo por cluster: os processos do launcher (cluster.py) dividem o DATA_DIR e cada um tem as suas sessões
+SESSIONS_FILE = "lavalink_sessions.json"
+# Segundos que o Lavalink mantém a sessão (e os players tocando) esperando o bot voltar
+RESUME_TIMEOUT = int(os.getenv("LAVALINK_RESUME_TIMEOUT", 60))
+
+
+def load_node_configs() -> list[dict]:
+    """
+    Lê a lista de nós do Lavalink do ambiente.
+
+    LAVALINK_NODES="host1:2333:senha1,host2:2333:senha2"
+    Sem LAVALINK_NODES, usa o nó único de LAVALINK_HOST/LAVALINK_PORT/LAVALINK_PASSWORD.
+    """
+    configs = []
+    raw = os.getenv("LAVALINK_NODES", "").strip()
+    for entry in filter(None, (part.strip() for part in raw.split(','))):
+        host, port, password = entry.split(':', 2)
+        configs.append({"host": host, "port": int(port), "password": password})
+
+    if not configs:
+        configs.append({
+            "host": os.getenv("LAVALINK_HOST"),
+            "port": int(os.getenv("LAVALINK_PORT", 2333)),
+            "password": os.getenv("LAVALINK_PASSWORD"),
+        })
+    return configs
+
+
+def sessions_path(cluster_id: int | None = None) -> str:
+    """Arquivo de sessões do processo: `lavalink_sessions.json` sem cluster, `lavalink_sessions-<id>.json` com."""
+    if cluster_id is None:
+        return data_path(SESSIONS_FILE)
+    name, extension = os.path.splitext(SESSIONS_FILE)
+    return data_path(f"{name}-{cluster_id}{extension}")
+
+
+def load_sessions(cluster_id: int | None = None) -> dict[str, str]:
+    """Última sessão de cada nó (identificador -> session ID), gravada por `NodeBalancer.remember_session`."""
+    try:
+        with open(sessions_path(cluster_id), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_nodes(configs: list[dict], sessions: dict[str, str] | None = None) -> list[wavelink.Node]:
+    nodes = []
+    for config in configs:
+        identifier = f"{config['host']}:{config['port']}"
+        node = wavelink.Node(identifier=identifier, uri=f"http://{config['host']}:{config['port']}", password=config['password'], resume_timeout=RESUME_TIMEOUT)
+        # Com a sessão anterior, o wavelink manda o Session-Id ao abrir o websocket e o Lavalink
+        # retoma a sessão (com os players tocando) em vez de criar uma nova
+        if sessions and RESUME_TIMEOUT > 0:
+            set_resume_session(node, sessions.get(identifier))
+        nodes.append(node)
+    return nodes
+
+
+class NodeHealth:
+    """Última foto das estatísticas de um nó, usada para calcular a carga."""
+
+    def __init__(self):
+        self.latency_ms: float | None = None
+        self.players = 0
+        self.playing = 0
+        self.system_load = 0.0
+        self.frame_deficit = 0
+        self.frame_nulled = 0
+        self.updated = 0.0
+
+
+class NodeBalancer:
+    """
+    Distribui os players entre os nós do Lavalink e cuida do failover.
+
+    - Consulta `/v4/stats` de cada nó periodicamente (CPU, frames perdidos, players).
+    - Novos players vão para o nó com a menor penalidade (mesma fórmula usada pelos clientes do Lavalink).
+    - Quando um nó cai, os players dele são movidos para um nó saudável com `switch_node`,
+      que mantém a música atual, a posição e a fila.
+    - Guarda a sessão de cada nó, para que um reinício do bot retome os players que
+      continuaram tocando no Lavalink (`resumed_players`).
+    """
+
+    def __init__(self, bot, interval: float = 15.0):
+        self.bot = bot
+        self.interval = interval
+        self.health: dict[str, NodeHealth] = {}
+        # Sessões da execução anterior deste cluster: um nó que voltou com o mesmo ID retomou a sessão
+        self.cluster_id = bot.cluster.cluster_id if getattr(bot, "cluster", None) else None
+        self.previous_sessions = load_sessions(self.cluster_id)
+        self._task: asyncio.Task | None = None
+        self._failover_lock = asyncio.Lock()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    # --- CARGA ---
+    def penalty(self, node: wavelink.Node) -> float:
+        health = self.health.get(node.identifier, NodeHealth())
+        # Players criados desde a última consulta também contam
+        players = max(health.playing, len(node.players))
+        cpu = 1.05 ** (100 * health.system_load) * 10 - 10
+        deficit = 1.03 ** (500 * (health.frame_deficit / 3000)) * 600 - 600
+        nulled = (1.03 ** (500 * (health.frame_nulled / 3000)) * 600 - 600) * 2
+        return players + cpu + deficit + nulled
+
+    def healthy_nodes(self, exclude: wavelink.Node | None = None) -> list[wavelink.Node]:
+        return [
+            node for node in wavelink.Pool.nodes.values()
+            if node.status is wavelink.NodeStatus.CONNECTED and node is not exclude
+        ]
+
+    def best_node(self, exclude: wavelink.Node | None = None) -> wavelink.Node:
+        nodes = self.healthy_nodes(exclude)
+        if not nodes:
+            raise wavelink.InvalidNodeException("Nenhum nó do Lavalink está conectado.")
+        return min(nodes, key=self.penalty)
+
+    def new_player(self) -> BorisPlayer:
+        """Player já preso ao nó menos carregado, para usar em `channel.connect(cls=...)`."""
+        return BorisPlayer(nodes=[self.best_node()])
+
+    # --- MONITORAMENTO ---
+    async def _poll(self, node: wavelink.Node):
+        health = self.health.setdefault(node.identifier, NodeHealth())
+        started = time.perf_counter()
+        try:
+            stats = await node.fetch_stats()
+        except Exception as e:
+            print(f"Falha ao consultar estatísticas do nó '{node.identifier}': {e}")
+            health.latency_ms = None
+            return
+
+        health.latency_ms = (time.perf_counter() - started) * 1000
+        health.players = stats.players
+        health.playing = stats.playing
+        health.system_load = stats.cpu.system_load
+        health.frame_deficit = stats.frames.deficit if stats.frames else 0
+        health.frame_nulled = stats.frames.nulled if stats.frames else 0
+        health.updated = time.time()
+
+    async def _run(self):
+        while True:
+            nodes = list(wavelink.Pool.nodes.values())
+            await asyncio.gather(*(self._poll(node) for node in nodes if node.status is wavelink.NodeStatus.CONNECTED))
+
+            # Rede de segurança: nós que caíram sem disparar o evento de desconexão
+            for node in nodes:
+                if node.status is not wavelink.NodeStatus.CONNECTED and self.players_on(node):
+                    await self.failover(node)
+
+            await asyncio.sleep(self.interval)
+
+    # --- RETOMADA DE SESSÃO ---
+    def remember_session(self, node: wavelink.Node):
+        """Grava a sessão atual do nó (chamado a cada `node_ready`)."""
+        sessions = load_sessions(self.cluster_id)
+        if node.session_id and sessions.get(node.identifier) != node.session_id:
+            sessions[node.identifier] = node.session_id
+            with open(sessions_path(self.cluster_id), "w", encoding="utf-8") as file:
+                json.dump(sessions, file)
+
+    def resumed(self, node: wavelink.Node) -> bool:
+        return node.session_id is not None and node.session_id == self.previous_sessions.get(node.identifier)
+
+    async def resumed_players(self) -> dict[int, tuple[wavelink.Node, wavelink.PlayerResponsePayload]]:
+        """Players que o Lavalink manteve nas sessões retomadas, por guild."""
+        players = {}
+        for node in self.healthy_nodes():
+            if not self.resumed(node):
+                continue
+            try:
+                for info in await node.fetch_players():
+                    players[info.guild_id] = (node, info)
+            except Exception as e:
+                print(f"Falha ao listar os players da sessão retomada no nó '{node.identifier}': {e}")
+        return players
+
+    def detach_players(self) -> int:
+        """
+        Solta os players do discord.py antes de desligar o bot: sem isso, o `close()` desconecta
+        cada um e o Lavalink destrói os players que deveriam esperar pela retomada.
+        """
+        if RESUME_TIMEOUT <= 0:
+            return 0
+        detached = 0
+        for node in wavelink.Pool.nodes.values():
+            for guild_id in list(node.players):
+                drop_voice_client(self.bot, guild_id)
+                detached += 1
+        return detached
+
+    # --- FAILOVER ---
+    def players_on(self, node: wavelink.Node) -> list[wavelink.Player]:
+        """
+        Players ligados a `node`, a partir dos voice clients do bot. `node.players` não serve
+        aqui: quando o websocket cai, o wavelink esvazia esse dicionário antes do evento de desconexão.
+        """
+        return [player for player in self.bot.voice_clients if isinstance(player, wavelink.Player) and player.node is node]
+
+    async def failover(self, node: wavelink.Node) -> int:
+        """Move todos os players de `node` para nós saudáveis. Retorna quantos foram movidos."""
+        async with self._failover_lock:
+            moved = 0
+            for player in self.players_on(node):
+                try:
+                    target = self.best_node(exclude=node)
+                except wavelink.InvalidNodeException:
+                    print(f"Nó '{node.identifier}' caiu e não há outro nó saudável para receber os players.")
+                    break
+
+                try:
+                    await player.switch_node(target)
+                    moved += 1
+                except Exception as e:
+                    print(f"Falha ao mover o player da guild {player.guild.id if player.guild else '?'} para '{target.identifier}': {e}")
+                    await player.disconnect()
+
+            if moved:
+                print(f"Failover: {moved} player(s) movidos do nó '{node.identifier}'.")
+            return moved
+
+    def summary(self) -> list[dict]:
+        """Resumo de saúde/latência de cada nó (usado pelo comando /lavalink)."""
+        rows = []
+        for node in wavelink.Pool.nodes.values():
+            health = self.health.get(node.identifier, NodeHealth())
+            rows.append({
+                "identifier": node.identifier,
+                "status": node.status.name,
+                "latency_ms": health.latency_ms,
+                "players": len(node.players),
+                "system_load": health.system_load,
+                "frame_deficit": health.frame_deficit,
+                "penalty": self.penalty(node),
+            })
+        return rows
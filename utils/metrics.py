@@ -0,0 +1,201 @@
+import asyncio
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+import discord
+import wavelink
+from discord import app_commands
+
+# Buckets padrão (segundos) dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Gauge cujo valor é calculado na hora da coleta por `collect()`, que devolve [(labels, valor)]."""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), collect: Callable[[], Iterable[tuple[tuple, float]]] | None = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.collect = collect
+        self._values: dict[tuple, float] = {}
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        samples = self.collect() if self.collect else self._values.items()
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> (contagem por bucket, soma, total)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - started)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = (), collect=None) -> Gauge:
+        gauge = self._metrics.get(name) or self.register(Gauge(name, documentation, labels))
+        if collect:
+            gauge.collect = collect
+        return gauge
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Erro ao coletar a métrica {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro global, como o REGISTRY do prometheus_client
+registry = Registry()
+
+COMMAND_LATENCY = registry.histogram("boris_command_duration_seconds", "Tempo de cada comando de barra, do recebimento até a resposta final.", ("command", "status"))
+SEARCH_LATENCY = registry.histogram("boris_lavalink_search_duration_seconds", "Latência de wavelink.Playable.search.", ("source", "outcome"))
+SEARCH_RESULTS = registry.counter("boris_lavalink_search_results_total", "Faixas devolvidas pelas buscas no Lavalink.", ("source",))
+SPOTIFY_LATENCY = registry.histogram("boris_spotify_request_duration_seconds", "Latência das chamadas à API do Spotify.", ("endpoint", "status"))
+LOOP_LAG = registry.histogram("boris_event_loop_lag_seconds", "Atraso do event loop em relação ao horário agendado.", buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+
+def search_source_label(source) -> str:
+    if source is None:
+        return "url"
+    return source.name if isinstance(source, wavelink.TrackSource) else str(source)
+
+
+# --- GANCHOS ---
+class InstrumentedTree(app_commands.CommandTree):
+    """CommandTree que marca o início de cada comando; a duração é registrada no fim (sucesso ou erro)."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        admission = getattr(interaction.client, "admission", None)
+        if admission and isinstance(error, (app_commands.CheckFailure, app_commands.TransformerError)):
+            # O comando nem chegou a rodar: as fichas cobradas no interaction_check voltam
+            admission.refund(interaction)
+        if isinstance(error, app_commands.CheckFailure) and interaction.response.is_done():
+            # Checagem que já respondeu ao usuário (ex: controle de admissão): não é um erro do bot
+            observe_command(interaction, interaction.command, "rejected")
+            return
+        observe_command(interaction, interaction.command, "error")
+        await super().on_error(interaction, error)
+
+
+def observe_command(interaction: discord.Interaction, command, status: str):
+    started = interaction.extras.get("started")
+    if started is not None and command is not None:
+        COMMAND_LATENCY.observe(command.qualified_name, status, value=time.perf_counter() - started)
+
+
+async def timed_search(query: str, *, source=wavelink.TrackSource.YouTubeMusic) -> wavelink.Search:
+    """`wavelink.Playable.search` medida: todas as buscas do bot no Lavalink passam por aqui."""
+    label = search_source_label(source if "://" not in query else None)
+    started = time.perf_counter()
+    try:
+        result = await wavelink.Playable.search(query, source=source)
+    except Exception:
+        SEARCH_LATENCY.observe(label, "error", value=time.perf_counter() - started)
+        raise
+    count = len(result.tracks) if isinstance(result, wavelink.Playlist) else len(result)
+    SEARCH_LATENCY.observe(label, "found" if count else "empty", value=time.perf_counter() - started)
+    SEARCH_RESULTS.inc(label, amount=count)
+    return result
+
+
+async def measure_loop_lag(interval: float = 0.5):
+    """Mede continuamente o quanto o event loop atrasa para acordar uma tarefa agendada."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(value=max(0.0, loop.time() - started - interval))
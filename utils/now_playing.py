@@ -0,0 +1,113 @@
+import asyncio
+
+import discord
+
+from utils.outbound import OutboundScheduler
+
+# Quantas mensagens de outras pessoas podem aparecer depois do "Tocando Agora"
+# antes de considerarmos que ele ficou "enterrado" no canal
+BURY_THRESHOLD = 5
+
+
+class NowPlayingController:
+    """
+    Mantém UMA mensagem de "Tocando Agora" por guild e a edita a cada troca de música.
+
+    As atualizações passam pelo OutboundScheduler com a chave da guild, então trocas
+    mais rápidas do que o limite do Discord permite viram uma única edição com o
+    estado mais recente. Uma mensagem nova só é enviada quando a anterior foi apagada,
+    está em outro canal ou ficou enterrada por mensagens mais novas.
+
+    A chave só unifica o que ainda está na fila do agendador; uma publicação que chega
+    com outra em andamento espera o lock e então edita a mensagem que a primeira criou.
+    """
+
+    def __init__(self, guild_id: int, scheduler: OutboundScheduler):
+        self.guild_id = guild_id
+        self.scheduler = scheduler
+        self.message: discord.Message | None = None
+        self.messages_after = 0
+        self._channel = None
+        self._embed: discord.Embed | None = None
+        self._lock = asyncio.Lock()
+        # A guild parou (/stop, saída do canal): publicações pendentes não criam mensagem nova
+        self.closed = False
+
+    def update(self, channel, embed: discord.Embed):
+        """Agenda a exibição de `embed`. Não espera o envio."""
+        self._channel = channel
+        self._embed = embed
+        return self.scheduler.submit(("channel", channel.id), self._publish, key=("now_playing", self.guild_id))
+
+    def _is_buried(self) -> bool:
+        return self.messages_after >= BURY_THRESHOLD
+
+    async def _publish(self):
+        async with self._lock:
+            if self.closed:
+                return None
+            return await self._publish_locked()
+
+    async def _publish_locked(self):
+        channel, embed = self._channel, self._embed
+        message = self.message
+
+        if message and message.channel.id == channel.id and not self._is_buried():
+            try:
+                self.message = await message.edit(embed=embed)
+                return self.message
+            except discord.NotFound:
+                pass  # apagaram a mensagem: envia uma nova abaixo
+
+        if message:
+            # A antiga ficou para trás no canal: sai de cena para não confundir
+            try:
+                await message.delete()
+            except discord.HTTPException:
+                pass
+
+        self.message = await channel.send(embed=embed)
+        self.messages_after = 0
+        return self.message
+
+    def note_message(self, message: discord.Message):
+        """Chamado a cada mensagem nova no canal para saber se o "Tocando Agora" ficou enterrado."""
+        if self.message and message.channel.id == self.message.channel.id and message.id != self.message.id:
+            self.messages_after += 1
+
+    def note_deleted(self, message_id: int):
+        if self.message and self.message.id == message_id:
+            self.message = None
+
+
+class NowPlayingManager:
+    """Controladores de "Tocando Agora" de todas as guilds."""
+
+    def __init__(self, scheduler: OutboundScheduler):
+        self.scheduler = scheduler
+        self._controllers: dict[int, NowPlayingController] = {}
+        self._by_channel: dict[int, NowPlayingController] = {}
+
+    def show(self, guild_id: int, channel, embed: discord.Embed):
+        controller = self._controllers.get(guild_id)
+        if controller is None:
+            controller = self._controllers[guild_id] = NowPlayingController(guild_id, self.scheduler)
+        self._by_channel[channel.id] = controller
+        return controller.update(channel, embed)
+
+    def forget(self, guild_id: int):
+        controller = self._controllers.pop(guild_id, None)
+        if controller:
+            controller.closed = True
+            if controller._channel:
+                self._by_channel.pop(controller._channel.id, None)
+
+    def on_message(self, message: discord.Message):
+        controller = self._by_channel.get(message.channel.id)
+        if controller:
+            controller.note_message(message)
+
+    def on_message_delete(self, message_id: int, channel_id: int):
+        controller = self._by_channel.get(channel_id)
+        if controller:
+            controller.note_deleted(message_id)
@@ -0,0 +1,168 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.background import spawn
+
+
+class TokenBucket:
+    """Balde de fichas clássico: `capacity` fichas, repostas a `rate` por segundo."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = asyncio.get_running_loop().time()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float, cost: float = 1.0) -> bool:
+        self._refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def wait_time(self, now: float, cost: float = 1.0) -> float:
+        self._refill(now)
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+
+class _Op:
+    __slots__ = ("key", "factory", "future")
+
+    def __init__(self, key, factory, future):
+        self.key = key
+        self.factory = factory
+        self.future = future
+
+
+class OutboundScheduler:
+    """
+    Agendador global das mensagens que o bot envia/edita no Discord.
+
+    - Cada rota (ex: um canal) tem o seu balde, no ritmo dos limites do Discord
+      (~5 mensagens a cada 5s por canal), além de um teto global por segundo.
+    - Operações com a mesma `key` são unificadas enquanto esperam: só a mais recente
+      é executada (ex: várias trocas de música seguidas viram uma única edição).
+    - As rotas são atendidas em rodízio, então um canal muito ativo não atrasa os outros.
+
+    - Rotas no formato `(tipo, id)` podem ter limites próprios em `ROUTE_LIMITS`
+      (ex: apagar mensagens tem baldes diferentes dos de enviar).
+
+    O discord.py continua tratando 429s; aqui a ideia é nem chegar neles.
+    """
+
+    # Tipo de rota -> (capacidade, fichas por segundo), quando diferente do padrão
+    ROUTE_LIMITS = {
+        # bulk-delete: uma requisição (até 100 mensagens) por segundo por canal
+        "bulk_delete": (1, 1.0),
+        # Apagar mensagens uma a uma (as com mais de 14 dias) é bem mais restrito
+        "delete": (2, 0.5),
+    }
+
+    def __init__(self, *, route_capacity: float = 5, route_rate: float = 1.0, global_rate: float = 40):
+        self.route_capacity = route_capacity
+        self.route_rate = route_rate
+        self.global_rate = global_rate
+
+        self._routes: dict[Hashable, deque[_Op]] = {}
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._by_key: dict[Hashable, _Op] = {}
+        self._global: TokenBucket | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._global = TokenBucket(self.global_rate, self.global_rate)
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def _new_bucket(self, route: Hashable) -> TokenBucket:
+        kind = route[0] if isinstance(route, tuple) and route else route
+        capacity, rate = self.ROUTE_LIMITS.get(kind, (self.route_capacity, self.route_rate))
+        return TokenBucket(capacity, rate)
+
+    def depth(self) -> int:
+        return sum(len(ops) for ops in self._routes.values())
+
+    def submit(self, route: Hashable, factory: Callable[[], Awaitable[Any]], *, key: Hashable | None = None) -> asyncio.Future:
+        """
+        Agenda `factory()` na rota `route`. Retorna um Future com o resultado.
+        Se já houver uma operação pendente com a mesma `key`, ela é substituída por esta
+        (e o Future antigo recebe o mesmo resultado).
+        """
+        if key is not None and key in self._by_key:
+            op = self._by_key[key]
+            op.factory = factory
+            return op.future
+
+        op = _Op(key, factory, asyncio.get_running_loop().create_future())
+        self._routes.setdefault(route, deque()).append(op)
+        if key is not None:
+            self._by_key[key] = op
+        self._wakeup.set()
+        return op.future
+
+    async def _execute(self, op: _Op):
+        try:
+            result = await op.factory()
+            if not op.future.done():
+                op.future.set_result(result)
+        except Exception as e:
+            if not op.future.done():
+                op.future.set_exception(e)
+            # Ninguém aguardando o Future: evita o aviso de "exception was never retrieved"
+            op.future.exception()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            now = loop.time()
+            next_wait = None
+
+            for route in list(self._routes):
+                ops = self._routes[route]
+                bucket = self._buckets.get(route)
+                if bucket is None:
+                    bucket = self._buckets[route] = self._new_bucket(route)
+
+                # Rodízio: no máximo uma operação por rota a cada volta
+                if bucket.try_take(now):
+                    if not self._global.try_take(now):
+                        bucket.tokens += 1
+                        wait = self._global.wait_time(now)
+                    else:
+                        op = ops.popleft()
+                        if op.key is not None:
+                            self._by_key.pop(op.key, None)
+                        spawn(self._execute(op), name=f"outbound-{route}")
+                        wait = 0.0 if ops else None
+                else:
+                    wait = bucket.wait_time(now)
+
+                if not ops:
+                    del self._routes[route]
+                if wait is not None:
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+
+            # Baldes cheios de rotas ociosas não precisam ficar em memória
+            if len(self._buckets) > 1024:
+                for route, bucket in list(self._buckets.items()):
+                    if route not in self._routes and bucket.wait_time(now, bucket.capacity) == 0:
+                        del self._buckets[route]
+
+            if next_wait == 0.0:
+                await asyncio.sleep(0)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import wavelink
+
+from utils.background import spawn
+from utils.queue import IndexedQueue
+
+# Janela (segundos) em que mudanças seguidas de volume/posição/filtros viram uma única atualização no Lavalink
+UPDATE_WINDOW = 0.5
+
+
+class BorisPlayer(wavelink.Player):
+    """
+    Player do DJ Boris: o mesmo do wavelink, com a fila indexada (`IndexedQueue`) e
+    mudanças de estado agrupadas.
+
+    `request_volume`, `request_seek` e `request_filters` só anotam o valor desejado;
+    depois de `UPDATE_WINDOW` segundos, tudo o que foi pedido na janela vai para o
+    Lavalink em um único PATCH, com o valor mais recente de cada campo.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queue = IndexedQueue()
+        # Só o ID: o canal é buscado no cache da guild quando for usado (e some se for apagado)
+        self.text_channel_id: int | None = None
+        self._desired: dict[str, object] = {}
+        self._flushed: asyncio.Future | None = None
+
+    @property
+    def text_channel(self):
+        """Canal de texto onde a música foi pedida, se ele ainda existe."""
+        return self.guild.get_channel(self.text_channel_id) if self.text_channel_id and self.guild else None
+
+    # --- RETOMADA DE SESSÃO ---
+    def adopt(self, info: wavelink.PlayerResponsePayload):
+        """
+        Assume o estado de um player que continuou tocando no Lavalink (sessão retomada):
+        faixa atual, posição, volume, pausa e filtros ficam como estão, sem nenhum PATCH.
+        """
+        self._current = info.track
+        self._original = info.track
+        self._paused = info.paused
+        self._volume = info.volume
+        self._filters = info.filters
+        self._last_position = info.state.position
+        self._last_update = time.monotonic_ns()
+
+    # --- ESTADO AGRUPADO ---
+    @property
+    def target_volume(self) -> int:
+        """Volume que o player terá depois da atualização pendente (o que deve ser exibido)."""
+        return self._desired.get("volume", self.volume)
+
+    def pending_update(self) -> asyncio.Future | None:
+        """Future da atualização ainda não enviada, se houver."""
+        return self._flushed
+
+    def request_volume(self, value: int) -> asyncio.Future:
+        return self._request("volume", max(min(value, 1000), 0))
+
+    def request_seek(self, position: int) -> asyncio.Future:
+        return self._request("position", max(0, position))
+
+    def request_filters(self, filters: wavelink.Filters | None) -> asyncio.Future:
+        return self._request("filters", filters or wavelink.Filters())
+
+    def _request(self, field: str, value) -> asyncio.Future:
+        self._desired[field] = value
+        if self._flushed is None:
+            self._flushed = asyncio.get_running_loop().create_future()
+            spawn(self._flush_later(self._flushed), name=f"player-update-{self.guild.id if self.guild else None}")
+        return self._flushed
+
+    async def _flush_later(self, flushed: asyncio.Future):
+        await asyncio.sleep(UPDATE_WINDOW)
+        desired, self._desired = self._desired, {}
+        self._flushed = None
+        try:
+            await self._apply(desired)
+        except Exception as e:
+            flushed.set_exception(e)
+            # Ninguém aguardando o Future: evita o aviso de "exception was never retrieved"
+            flushed.exception()
+        else:
+            flushed.set_result(None)
+
+    async def _apply(self, desired: dict):
+        request = {}
+        if "volume" in desired:
+            request["volume"] = desired["volume"]
+        if "filters" in desired:
+            request["filters"] = desired["filters"]()
+        if "position" in desired and self.current:
+            request["position"] = desired["position"]
+        if not request or not self.guild:
+            return
+
+        # Os setters do wavelink mandam um PATCH cada; aqui vai um só com todos os campos
+        await self.node._update_player(self.guild.id, data=request)
+        if "volume" in desired:
+            self._volume = desired["volume"]
+        if "filters" in desired:
+            self._filters = desired["filters"]
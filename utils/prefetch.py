@@ -0,0 +1,194 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+
+import wavelink
+
+from utils.queue import LazyTrack, PendingTrack
+
+# Quantas músicas à frente da atual ficam resolvidas e validadas
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", 3))
+# Depois de quanto tempo (segundos) uma música vinda de cache/disco precisa ser validada de novo
+REVALIDATE_AFTER = 6 * 60 * 60
+# Tentativas de busca de um PendingTrack antes de ele sair da fila
+MAX_ATTEMPTS = 3
+
+
+class Prefetcher:
+    """
+    Estágio de pré-carregamento da fila: enquanto uma música toca, as próximas
+    `depth` entradas são resolvidas e validadas, para que a troca no fim da música
+    seja só um `player.play` com uma faixa pronta.
+
+    - `LazyTrack`s viram `Playable` de novo (localmente, sem busca).
+    - `PendingTrack`s (buscas que falharam antes) são buscados de novo.
+    - Faixas que não foram confirmadas no Lavalink recentemente (vindas do cache em
+      disco, do SpotifyStore ou do diário) são carregadas de novo pelo link.
+    - O que não dá mais para tocar sai da fila antes da hora, não no silêncio.
+
+    `resolve(entry)` devolve a faixa pronta (a mesma ou uma substituta), `None` para
+    tirá-la da fila, ou levanta uma exceção para tentar de novo na próxima rodada.
+    `replace(player, index, track)` aplica o resultado na fila (e no diário).
+    """
+
+    def __init__(self, resolve: Callable[[object], Awaitable[wavelink.Playable | None]],
+                 replace: Callable[[wavelink.Player, int, wavelink.Playable | None], None], *,
+                 depth: int = PREFETCH_DEPTH, revalidate_after: float = REVALIDATE_AFTER, max_verified: int = 20_000):
+        self.resolve = resolve
+        self.replace = replace
+        self.depth = depth
+        self.revalidate_after = revalidate_after
+        self.max_verified = max_verified
+
+        self._verified: OrderedDict[tuple, float] = OrderedDict()
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._dirty: set[int] = set()
+
+        # Instrumentação da troca de música
+        self._gap_started: dict[int, float] = {}
+        self.gaps_ms: deque[float] = deque(maxlen=500)
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    # --- FAIXAS CONFIRMADAS ---
+    @staticmethod
+    def _key(track: wavelink.Playable) -> tuple:
+        return (track.source, track.identifier)
+
+    def mark_fresh(self, tracks):
+        """Faixas que acabaram de vir do Lavalink não precisam ser validadas tão cedo."""
+        now = time.time()
+        for track in tracks:
+            key = self._key(track)
+            self._verified[key] = now
+            self._verified.move_to_end(key)
+        while len(self._verified) > self.max_verified:
+            self._verified.popitem(last=False)
+
+    def is_ready(self, entry) -> bool:
+        if not isinstance(entry, wavelink.Playable):
+            return False
+        verified = self._verified.get(self._key(entry))
+        return verified is not None and time.time() - verified < self.revalidate_after
+
+    # --- AGENDAMENTO ---
+    def schedule(self, player: wavelink.Player):
+        """Pede uma rodada de pré-carregamento. Pedidos durante uma rodada viram uma só repetição."""
+        guild_id = player.guild.id
+        task = self._tasks.get(guild_id)
+        if task and not task.done():
+            self._dirty.add(guild_id)
+            return
+        self._tasks[guild_id] = asyncio.create_task(self._run(player))
+
+    def forget(self, guild_id: int):
+        task = self._tasks.pop(guild_id, None)
+        if task:
+            task.cancel()
+        self._dirty.discard(guild_id)
+        self._gap_started.pop(guild_id, None)
+
+    def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def _run(self, player: wavelink.Player):
+        guild_id = player.guild.id
+        try:
+            while player.guild:
+                self._dirty.discard(guild_id)
+                await self._refresh(player)
+                if guild_id not in self._dirty:
+                    break
+        except Exception as e:
+            print(f"Erro no pré-carregamento da fila da guild {guild_id}: {e}")
+
+    async def _refresh(self, player: wavelink.Player):
+        failed: set[int] = set()
+        while player.connected:
+            window = player.queue[:self.depth]
+            pending = [entry for entry in window if not self.is_ready(entry) and id(entry) not in failed]
+            if not pending:
+                return
+
+            results = await asyncio.gather(*(self._resolve(entry) for entry in pending), return_exceptions=True)
+            for entry, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    failed.add(id(entry))
+                    continue
+                # A fila pode ter mudado durante a busca: procura a entrada de novo
+                index = self._index_of(player.queue, entry)
+                if index is None:
+                    continue
+                if result is None:
+                    self.dropped += 1
+                if result is not entry:
+                    self.replace(player, index, result)
+
+    async def _resolve(self, entry) -> wavelink.Playable | None:
+        if isinstance(entry, PendingTrack):
+            entry.attempts += 1
+            try:
+                track = await self.resolve(entry)
+            except Exception:
+                if entry.attempts >= MAX_ATTEMPTS:
+                    return None
+                raise
+            if track is None and entry.attempts < MAX_ATTEMPTS:
+                # "Não achou" também conta como tentativa: a busca é refeita na próxima rodada
+                raise LookupError(f"nada encontrado para '{entry.query}'")
+        else:
+            track = await self.resolve(entry)
+
+        if track is not None:
+            self.mark_fresh([track])
+        return track
+
+    def _index_of(self, queue, entry) -> int | None:
+        for index, item in enumerate(queue[:self.depth * 2]):
+            if item is entry:
+                return index
+        return None
+
+    async def resolve_now(self, entry) -> wavelink.Playable | None:
+        """Resolve na hora uma entrada que chegou à vez sem estar pronta."""
+        if isinstance(entry, wavelink.Playable):
+            return entry
+        if isinstance(entry, LazyTrack):
+            return entry.to_playable()
+        try:
+            return await self._resolve(entry)
+        except Exception as e:
+            print(f"Falha ao resolver '{entry.query}': {e}")
+            return None
+
+    # --- TEMPO ATÉ O PRÓXIMO ÁUDIO ---
+    def note_handoff(self, guild_id: int, entry):
+        """Chamado quando a próxima música sai da fila: marca o início do silêncio."""
+        # Acerto: a faixa já estava resolvida e o play não precisa esperar nenhuma busca
+        if not isinstance(entry, PendingTrack):
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._gap_started.setdefault(guild_id, time.perf_counter())
+
+    def note_started(self, guild_id: int):
+        started = self._gap_started.pop(guild_id, None)
+        if started is not None:
+            self.gaps_ms.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> dict:
+        gaps = sorted(self.gaps_ms)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "dropped": self.dropped,
+            "gap_p50_ms": gaps[len(gaps) // 2] if gaps else None,
+            "gap_p95_ms": gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))] if gaps else None,
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from utils.metrics import registry
+
+LOOP_STALLS = registry.counter("boris_event_loop_stalls_total", "Vezes em que o event loop ficou travado acima do limite do watchdog.")
+
+
+def _thread_frame(thread_id: int):
+    return sys._current_frames().get(thread_id)
+
+
+class LoopWatchdog:
+    """
+    Detecta travamentos do event loop e mostra onde ele está preso.
+
+    Uma tarefa no loop atualiza um "batimento" a cada `interval`; uma thread separada
+    confere o batimento e, se ele passar de `threshold` segundos, imprime a pilha atual
+    da thread do loop (o callback que está bloqueando), uma vez por travamento.
+    Diferente do modo debug do asyncio, não deixa cada callback mais lento.
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="boris-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+
+            reported_beat = beat
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            frame = _thread_frame(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "(pilha indisponível)\n"
+            print(f"[watchdog] Event loop travado há {stalled_for * 1000:.0f}ms. Pilha atual:\n{stack}", end="")
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem: uma thread olha a pilha da thread do loop `rate` vezes por
+    segundo e conta as pilhas no formato "collapsed" (uma linha `f1;f2;f3 contagem`),
+    que os geradores de flamegraph (flamegraph.pl, speedscope, inferno) leem direto.
+    Nada é instrumentado no código; o custo fica na thread de amostragem.
+    """
+
+    def __init__(self, rate: int = 100):
+        self.rate = rate
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._target: int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: int | None = None):
+        if self.running:
+            raise RuntimeError("O profiler já está rodando.")
+        self._target = thread_id or threading.get_ident()
+        self._stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="boris-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Para a amostragem e devolve as pilhas no formato collapsed."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.collapsed()
+
+    def _sample(self):
+        interval = 1 / self.rate
+        while not self._stop.wait(interval):
+            frame = _thread_frame(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
@@ -0,0 +1,172 @@
+import asyncio
+import datetime
+import time
+from typing import Awaitable, Callable
+
+import discord
+
+from utils.outbound import OutboundScheduler
+
+# O bulk-delete do Discord só aceita mensagens com menos de 14 dias; a folga cobre o tempo na fila
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=10)
+BULK_SIZE = 100
+# Lotes (de até 100) e mensagens antigas lidos do histórico à frente das exclusões
+BULK_BUFFER = 3
+SINGLE_BUFFER = 200
+
+
+def _bulk_cutoff() -> int:
+    """Snowflake mínimo para uma mensagem ainda poder ir no bulk-delete."""
+    return discord.utils.time_snowflake(discord.utils.utcnow() - BULK_MAX_AGE)
+
+
+class PurgeJob:
+    """
+    Uma limpeza de canal, de qualquer tamanho.
+
+    O histórico é lido em streaming (mais novas primeiro). Mensagens com menos de 14 dias
+    são agrupadas de 100 em 100 no bulk-delete; as mais antigas vão para uma fila lenta,
+    apagadas uma a uma. As duas filas passam pelo OutboundScheduler, com rotas próprias
+    ("bulk_delete" e "delete") e em rodízio com os outros canais, então uma limpeza grande
+    não atrasa o que as outras guilds estão fazendo. Cada fila manda uma exclusão por vez
+    ao agendador: cancelar para de apagar já na seguinte.
+    """
+
+    def __init__(self, channel, limit: int, scheduler: OutboundScheduler, requester_id: int):
+        self.channel = channel
+        self.limit = limit
+        self.scheduler = scheduler
+        self.requester_id = requester_id
+        self.started = time.monotonic()
+        # Nada enviado depois do comando (inclusive o próprio progresso) é apagado
+        self.before = discord.Object(id=discord.utils.time_snowflake(discord.utils.utcnow()))
+
+        self.scanned = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        # Mensagens recentes apagadas uma a uma porque o lote delas falhou (não são "antigas")
+        self.fallback_deleted = 0
+        self.skipped = 0
+        self.old_pending = 0
+        self.scan_done = False
+        self.cancelled = False
+        self.error: str | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def deleted(self) -> int:
+        return self.bulk_deleted + self.single_deleted + self.fallback_deleted
+
+    @property
+    def done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def start(self, on_progress: Callable[["PurgeJob", bool], Awaitable[None]], interval: float = 2.0) -> asyncio.Task:
+        """Começa a limpeza; `on_progress(job, final)` é chamado a cada `interval` segundos e no fim."""
+        self.task = asyncio.create_task(self._run(on_progress, interval))
+        return self.task
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _fail(self, error: str):
+        self.error = error
+        self.cancelled = True
+
+    # --- EXECUÇÃO ---
+    async def _run(self, on_progress, interval: float):
+        batches: asyncio.Queue[list[int] | None] = asyncio.Queue(BULK_BUFFER)
+        singles: asyncio.Queue[int | None] = asyncio.Queue(SINGLE_BUFFER)
+        work = asyncio.gather(self._scan(batches, singles), self._bulk_lane(batches), self._single_lane(singles))
+
+        while True:
+            try:
+                await asyncio.wait_for(asyncio.shield(work), timeout=interval)
+                break
+            except asyncio.TimeoutError:
+                await self._report(on_progress, False)
+            except Exception as e:
+                print(f"Erro inesperado na limpeza do canal {self.channel.id}: {e}")
+                self._fail("Algo deu errado durante a limpeza.")
+                break
+        await self._report(on_progress, True)
+
+    async def _report(self, on_progress, final: bool):
+        try:
+            await on_progress(self, final)
+        except Exception as e:
+            print(f"Falha ao atualizar o progresso da limpeza: {e}")
+
+    async def _scan(self, batches: asyncio.Queue, singles: asyncio.Queue):
+        cutoff = _bulk_cutoff()
+        batch: list[int] = []
+        try:
+            async for message in self.channel.history(limit=self.limit, before=self.before):
+                if self.cancelled:
+                    break
+                self.scanned += 1
+                if message.id > cutoff:
+                    batch.append(message.id)
+                    if len(batch) == BULK_SIZE:
+                        await batches.put(batch)
+                        batch = []
+                else:
+                    self.old_pending += 1
+                    await singles.put(message.id)
+        except discord.Forbidden:
+            self._fail("Eu não tenho permissão para ler o histórico deste canal.")
+        except discord.HTTPException as e:
+            self._fail(f"O Discord recusou a leitura do histórico ({e.status}).")
+        finally:
+            if batch:
+                await batches.put(batch)
+            await batches.put(None)
+            await singles.put(None)
+            self.scan_done = True
+
+    async def _bulk_lane(self, batches: asyncio.Queue):
+        while (batch := await batches.get()) is not None:
+            if self.cancelled:
+                continue  # esvazia a fila para o leitor do histórico não ficar preso
+            # O lote pode ter envelhecido esperando: o que passou dos 14 dias vai um a um.
+            # O histórico vem do mais novo para o mais antigo, então esses ficam no fim do lote.
+            cutoff = _bulk_cutoff()
+            fresh = [message_id for message_id in batch if message_id > cutoff]
+            if fresh:
+                await self._delete_bulk(fresh)
+            for message_id in batch[len(fresh):]:
+                await self._delete_one(message_id)
+
+    async def _delete_bulk(self, ids: list[int]):
+        try:
+            await self.scheduler.submit(("bulk_delete", self.channel.id), lambda: self.channel.delete_messages([discord.Object(id=i) for i in ids]))
+            self.bulk_deleted += len(ids)
+        except discord.Forbidden:
+            self._fail("Eu não tenho permissão para apagar mensagens neste canal.")
+        except discord.HTTPException:
+            # Alguma mensagem do lote já não existe: tenta uma a uma
+            for message_id in ids:
+                await self._delete_one(message_id, fallback=True)
+
+    async def _single_lane(self, singles: asyncio.Queue):
+        while (message_id := await singles.get()) is not None:
+            self.old_pending -= 1
+            if not self.cancelled:
+                await self._delete_one(message_id)
+
+    async def _delete_one(self, message_id: int, *, fallback: bool = False):
+        if self.cancelled:
+            return
+        try:
+            await self.scheduler.submit(("delete", self.channel.id), lambda: self.channel.get_partial_message(message_id).delete())
+            if fallback:
+                self.fallback_deleted += 1
+            else:
+                self.single_deleted += 1
+        except discord.NotFound:
+            self.skipped += 1
+        except discord.Forbidden:
+            self._fail("Eu não tenho permissão para apagar mensagens neste canal.")
+        except discord.HTTPException as e:
+            print(f"Falha ao apagar a mensagem {message_id} no canal {self.channel.id}: {e}")
+            self.skipped += 1
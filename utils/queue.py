@@ -0,0 +1,390 @@
+import random
+import sys
+from itertools import chain
+from typing import Iterable, Iterator
+
+import wavelink
+
+
+def _length(item) -> int:
+    return getattr(item, "length", 0) or 0
+
+
+class TrackList:
+    """
+    Sequência em blocos (listas de até ~2*LOAD itens) com uma árvore de Fenwick sobre
+    o tamanho dos blocos.
+
+    Tem a mesma interface de `list` usada pelo `wavelink.Queue`, mas:
+    - acesso/remoção/inserção por índice em O(log n) (+ O(LOAD) dentro do bloco);
+    - fatias de k itens em O(log n + k), sem copiar a fila inteira;
+    - duração total (`total_length`) mantida a cada alteração, sem percorrer nada.
+    """
+
+    LOAD = 256
+
+    def __init__(self, iterable: Iterable = ()):
+        self._blocks: list[list] = []
+        self._tree: list[int] = [0]
+        self._len = 0
+        self.total_length = 0
+        self.extend(iterable)
+
+    # --- ÁRVORE DE FENWICK (tamanho dos blocos) ---
+    def _rebuild_tree(self):
+        tree = [0] + [len(block) for block in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_index: int, delta: int):
+        i = block_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """Converte um índice global em (bloco, posição no bloco)."""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("list index out of range")
+
+        pos, remaining = 0, index
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return pos, remaining
+
+    # --- LEITURA ---
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._blocks)
+
+    def __reversed__(self) -> Iterator:
+        return chain.from_iterable(reversed(block) for block in reversed(self._blocks))
+
+    def __contains__(self, item) -> bool:
+        return any(item in block for block in self._blocks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            if start >= stop:
+                return []
+            block, offset = self._locate(start)
+            wanted = stop - start
+            items = self._blocks[block][offset:offset + wanted]
+            while len(items) < wanted:
+                block += 1
+                items.extend(self._blocks[block][:wanted - len(items)])
+            return items
+
+        block, offset = self._locate(index)
+        return self._blocks[block][offset]
+
+    def index(self, item) -> int:
+        base = 0
+        for block in self._blocks:
+            try:
+                return base + block.index(item)
+            except ValueError:
+                base += len(block)
+        raise ValueError(f"{item!r} is not in list")
+
+    # --- ESCRITA ---
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            items = list(self)
+            items[index] = value
+            self._reset(items)
+            return
+        block, offset = self._locate(index)
+        self.total_length += _length(value) - _length(self._blocks[block][offset])
+        self._blocks[block][offset] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            items = list(self)
+            del items[index]
+            self._reset(items)
+            return
+        self.pop(index)
+
+    def append(self, item):
+        if not self._blocks or len(self._blocks[-1]) >= 2 * self.LOAD:
+            self._blocks.append([])
+            self._rebuild_tree()
+        self._blocks[-1].append(item)
+        self._tree_add(len(self._blocks) - 1, 1)
+        self._len += 1
+        self.total_length += _length(item)
+
+    def extend(self, items: Iterable):
+        items = list(items)
+        if not items:
+            return
+        # Completa o último bloco e cria os demais já no tamanho ideal; a árvore é refeita uma vez só
+        if self._blocks and len(self._blocks[-1]) < self.LOAD:
+            room = self.LOAD - len(self._blocks[-1])
+            self._blocks[-1].extend(items[:room])
+            rest = items[room:]
+        else:
+            rest = items
+        for start in range(0, len(rest), self.LOAD):
+            self._blocks.append(rest[start:start + self.LOAD])
+        self._len += len(items)
+        self.total_length += sum(_length(item) for item in items)
+        self._rebuild_tree()
+
+    def insert(self, index: int, item):
+        if index < 0:
+            index = max(0, index + self._len)
+        if index >= self._len:
+            self.append(item)
+            return
+
+        block, offset = self._locate(index)
+        self._blocks[block].insert(offset, item)
+        self._len += 1
+        self.total_length += _length(item)
+        if len(self._blocks[block]) > 2 * self.LOAD:
+            # Bloco grande demais: divide ao meio
+            half = self._blocks[block]
+            self._blocks[block:block + 1] = [half[:self.LOAD], half[self.LOAD:]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(block, 1)
+
+    def pop(self, index: int = -1):
+        if not self._len:
+            raise IndexError("pop from empty list")
+        block, offset = self._locate(index)
+        item = self._blocks[block].pop(offset)
+        self._len -= 1
+        self.total_length -= _length(item)
+        if not self._blocks[block]:
+            del self._blocks[block]
+            self._rebuild_tree()
+        else:
+            self._tree_add(block, -1)
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def move(self, source: int, destination: int):
+        """Move o item da posição `source` para que ele termine na posição `destination`."""
+        self.insert(destination, self.pop(source))
+
+    def shuffle(self):
+        # Fisher-Yates bloco a bloco: embaralha sem montar uma lista com a fila toda
+        for i in range(self._len - 1, 0, -1):
+            j = random.randint(0, i)
+            if i != j:
+                bi, oi = self._locate(i)
+                bj, oj = self._locate(j)
+                self._blocks[bi][oi], self._blocks[bj][oj] = self._blocks[bj][oj], self._blocks[bi][oi]
+
+    def clear(self):
+        self._blocks = []
+        self._tree = [0]
+        self._len = 0
+        self.total_length = 0
+
+    def copy(self) -> "TrackList":
+        return TrackList(self)
+
+    def _reset(self, items: list):
+        self.clear()
+        self.extend(items)
+
+
+class PendingTrack:
+    """
+    Música que ainda não foi encontrada no Lavalink (ex: uma faixa do Spotify cuja busca
+    falhou). Fica na fila no lugar dela e é resolvida pelo `Prefetcher` antes da sua vez.
+    """
+
+    __slots__ = ("query", "title", "author", "length", "spotify_id", "requester_id", "attempts")
+
+    def __init__(self, query: str, *, title: str | None = None, author: str = "", length: int = 0,
+                 spotify_id: str | None = None, requester_id: int | None = None):
+        self.query = query
+        self.title = title or query
+        self.author = author
+        self.length = length
+        self.spotify_id = spotify_id
+        self.requester_id = requester_id
+        self.attempts = 0
+
+    @property
+    def uri(self) -> str | None:
+        return f"https://open.spotify.com/track/{self.spotify_id}" if self.spotify_id else None
+
+    @property
+    def raw_data(self) -> dict:
+        # Mesmo nome do atributo do Playable: o diário grava os dois tipos sem distinção
+        return {"pending": {
+            "query": self.query, "title": self.title, "author": self.author,
+            "length": self.length, "spotify_id": self.spotify_id, "requester_id": self.requester_id,
+        }}
+
+    def __repr__(self) -> str:
+        return f"<PendingTrack query={self.query!r}>"
+
+
+class LazyTrack:
+    """
+    Forma compacta de uma faixa já encontrada no Lavalink, para filas enormes.
+
+    Um `Playable` guarda o payload inteiro do Lavalink, além de álbum, artista e extras;
+    aqui ficam só os campos da fila e o `encoded`, com o qual o `Playable` é remontado
+    localmente (sem nova busca) quando a música entra na janela do Prefetcher.
+    """
+
+    __slots__ = ("encoded", "identifier", "title", "author", "length", "_uri", "source", "artwork", "requester_id")
+
+    def __init__(self, encoded: str, identifier: str, title: str, author: str, length: int,
+                 uri: str | None, source: str, artwork: str | None = None, requester_id: int | None = None):
+        self.encoded = encoded
+        self.identifier = identifier
+        self.title = title
+        self.author = author
+        self.length = length
+        # Poucos valores distintos ("youtube", "soundcloud"...): uma única cópia para todas as entradas
+        self.source = sys.intern(source)
+        # Link e capa do YouTube saem do identificador, não precisam ser guardados
+        self._uri = None if uri == self._youtube_uri(source, identifier) else uri
+        self.artwork = None if source == "youtube" else artwork
+        self.requester_id = requester_id
+
+    @staticmethod
+    def _youtube_uri(source: str, identifier: str) -> str | None:
+        return f"https://www.youtube.com/watch?v={identifier}" if source == "youtube" else None
+
+    @property
+    def uri(self) -> str | None:
+        return self._uri or self._youtube_uri(self.source, self.identifier)
+
+    @classmethod
+    def from_playable(cls, track: wavelink.Playable, requester_id: int | None = None) -> "LazyTrack":
+        return cls(track.encoded, track.identifier, track.title, track.author, track.length,
+                   track.uri, track.source, track.artwork, requester_id)
+
+    @classmethod
+    def from_data(cls, data: dict, requester_id: int | None = None) -> "LazyTrack":
+        """Direto do payload do Lavalink (ex: matches do SpotifyStore), sem criar um Playable."""
+        info = data["info"]
+        return cls(data["encoded"], info["identifier"], info["title"], info["author"], info["length"],
+                   info.get("uri"), info["sourceName"], info.get("artworkUrl"), requester_id)
+
+    def _artwork_url(self) -> str | None:
+        if self.source == "youtube":
+            return f"https://i.ytimg.com/vi/{self.identifier}/maxresdefault.jpg"
+        return self.artwork
+
+    def to_playable(self) -> wavelink.Playable:
+        return wavelink.Playable({
+            "encoded": self.encoded,
+            "info": {
+                "identifier": self.identifier,
+                "isSeekable": True,
+                "author": self.author,
+                "length": self.length,
+                "isStream": False,
+                "position": 0,
+                "title": self.title,
+                "uri": self.uri,
+                "artworkUrl": self._artwork_url(),
+                "isrc": None,
+                "sourceName": self.source,
+            },
+            "pluginInfo": {},
+            "userData": {"requester_id": self.requester_id} if self.requester_id else {},
+        })
+
+    @property
+    def raw_data(self) -> dict:
+        return {"lazy": [self.encoded, self.identifier, self.title, self.author, self.length,
+                         self._uri, self.source, self.artwork, self.requester_id]}
+
+    def __repr__(self) -> str:
+        return f"<LazyTrack title={self.title!r}>"
+
+
+def compact_tracks(tracks: Iterable[wavelink.Playable], requester_id: int | None = None) -> list:
+    """Converte faixas em `LazyTrack` para ocupar menos memória na fila (transmissões ao vivo ficam como estão)."""
+    return [track if track.is_stream else LazyTrack.from_playable(track, requester_id) for track in tracks]
+
+
+def entry_from_data(data: dict) -> "wavelink.Playable | PendingTrack | LazyTrack":
+    """Reconstrói uma entrada da fila gravada com `raw_data`."""
+    if "lazy" in data:
+        return LazyTrack(*data["lazy"])
+    if "pending" in data:
+        pending = data["pending"]
+        return PendingTrack(pending["query"], title=pending.get("title"), author=pending.get("author", ""),
+                            length=pending.get("length", 0), spotify_id=pending.get("spotify_id"),
+                            requester_id=pending.get("requester_id"))
+    return wavelink.Playable(data)
+
+
+class IndexedQueue(wavelink.Queue):
+    """
+    `wavelink.Queue` que guarda as faixas em um `TrackList` e aceita `LazyTrack`/`PendingTrack`.
+
+    Todo o restante do wavelink (autoplay, loop, histórico) continua funcionando,
+    já que o TrackList se comporta como uma lista.
+    """
+
+    def __init__(self, *, history: bool = True):
+        super().__init__(history=history)
+        self._items = TrackList()
+
+    @staticmethod
+    def _check_compatibility(item: object) -> bool:
+        # Além de Playable, a fila aceita as formas compactas e as músicas ainda não resolvidas
+        if not isinstance(item, (wavelink.Playable, LazyTrack, PendingTrack)):
+            raise TypeError("This queue is restricted to Playable, LazyTrack and PendingTrack objects.")
+        return True
+
+    @property
+    def total_length(self) -> int:
+        """Duração total da fila em milissegundos (mantida em cache)."""
+        return self._items.total_length
+
+    def page(self, page: int, per_page: int = 10) -> list:
+        """Itens da página `page` (começando em 0), sem copiar a fila."""
+        start = page * per_page
+        return self._items[start:start + per_page]
+
+    def move(self, source: int, destination: int):
+        self._items.move(source, destination)
+
+    def shuffle(self):
+        self._items.shuffle()
+
+    def remove(self, item, /, count: int | None = 1) -> int:
+        # A versão do wavelink copia a fila inteira antes de remover
+        deleted = 0
+        while count is None or deleted < count:
+            try:
+                self._items.remove(item)
+            except ValueError:
+                break
+            deleted += 1
+        return deleted
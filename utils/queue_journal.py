@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+
+from utils.storage import data_path
+
+
+class GuildQueueState:
+    """Estado da fila de uma guild reconstruído a partir do diário."""
+
+    def __init__(self):
+        self.voice_channel_id: int | None = None
+        self.text_channel_id: int | None = None
+        self.current: dict | None = None
+        self.position = 0
+        self.queue: list[dict] = []
+
+    def apply(self, entry: dict):
+        op = entry["op"]
+        if op == "snapshot":
+            state = entry["state"]
+            self.voice_channel_id = state.get("voice_channel_id")
+            self.text_channel_id = state.get("text_channel_id")
+            self.current = state.get("current")
+            self.position = state.get("position", 0)
+            self.queue = list(state.get("queue", []))
+        elif op == "session":
+            self.voice_channel_id = entry.get("voice_channel_id")
+            self.text_channel_id = entry.get("text_channel_id")
+        elif op == "enqueue":
+            self.queue.extend(entry["tracks"])
+        elif op == "dequeue":
+            self.current = self.queue.pop(0) if self.queue else None
+            self.position = 0
+        elif op == "position":
+            # Posição da música atual, anotada periodicamente (só vale se ela ainda é a atual)
+            if self.current:
+                self.position = entry["position"]
+        elif op == "skip":
+            # A música atual acabou (pulada ou terminou naturalmente)
+            self.current = None
+            self.position = 0
+        elif op == "remove":
+            if 0 <= entry["index"] < len(self.queue):
+                del self.queue[entry["index"]]
+        elif op == "replace":
+            if 0 <= entry["index"] < len(self.queue):
+                self.queue[entry["index"]] = entry["track"]
+        elif op == "move":
+            if 0 <= entry["source"] < len(self.queue):
+                self.queue.insert(entry["destination"], self.queue.pop(entry["source"]))
+        elif op == "clear":
+            self.queue.clear()
+            self.current = None
+            self.position = 0
+
+    @classmethod
+    def from_player(cls, player) -> "GuildQueueState":
+        """Foto do estado atual de um `wavelink.Player` (usada na compactação)."""
+        state = cls()
+        state.voice_channel_id = player.channel.id if player.channel else None
+        state.text_channel_id = getattr(player, 'text_channel_id', None)
+        state.current = player.current.raw_data if player.current else None
+        state.position = player.position if player.current else 0
+        state.queue = [track.raw_data for track in player.queue]
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            "voice_channel_id": self.voice_channel_id,
+            "text_channel_id": self.text_channel_id,
+            "current": self.current,
+            "position": self.position,
+            "queue": self.queue,
+        }
+
+
+class QueueJournal:
+    """
+    Diário append-only da fila de cada guild (um arquivo JSONL por guild).
+
+    O MusicCog registra as operações (enqueue, dequeue, position, skip, remove, replace, move, clear) de forma síncrona
+    e barata; uma tarefa em segundo plano grava o lote pendente a cada `flush_interval`.
+    Se a gravação falhar, o que não foi gravado volta para o início do próximo lote.
+    Quando um diário passa de `compact_after` operações, ele é reescrito como um único
+    snapshot (via arquivo temporário + rename, para nunca ficar pela metade).
+    As faixas são guardadas no formato do Lavalink (com `encoded`), então a restauração
+    não precisa buscar nada de novo.
+    """
+
+    def __init__(self, directory: str | None = None, *, flush_interval: float = 0.5, compact_after: int = 500):
+        self.directory = directory or os.path.dirname(data_path("journal", "_"))
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+
+        self._pending: dict[int, list[str]] = defaultdict(list)
+        # Guilds cujo arquivo deve ser reescrito (snapshot) em vez de receber novas linhas
+        self._rewrite: set[int] = set()
+        self._op_counts: dict[int, int] = defaultdict(int)
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    def _path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{guild_id}.jsonl")
+
+    # --- ESCRITA ---
+    def record(self, guild_id: int, op: str, **data):
+        """Registra uma operação. Não faz I/O: o lote vai para o disco no próximo flush."""
+        self._pending[guild_id].append(json.dumps({"op": op, **data}))
+        self._op_counts[guild_id] += 1
+
+    def enqueue(self, guild_id: int, tracks: list):
+        self.record(guild_id, "enqueue", tracks=[track.raw_data for track in tracks])
+
+    def session(self, guild_id: int, voice_channel_id: int | None, text_channel_id: int | None):
+        self.record(guild_id, "session", voice_channel_id=voice_channel_id, text_channel_id=text_channel_id)
+
+    def position(self, guild_id: int, position: int):
+        self.record(guild_id, "position", position=position)
+
+    def snapshot(self, guild_id: int, state: GuildQueueState):
+        """Substitui o diário inteiro da guild por um único snapshot (compactação)."""
+        self._pending[guild_id] = [json.dumps({"op": "snapshot", "state": state.to_dict()})]
+        self._rewrite.add(guild_id)
+        self._op_counts[guild_id] = 0
+
+    def forget(self, guild_id: int):
+        """A guild saiu do canal de voz: não há mais o que restaurar."""
+        self._pending[guild_id] = []
+        self._rewrite.add(guild_id)
+        self._op_counts.pop(guild_id, None)
+
+    def _write(self, batches: dict[int, list[str]], rewrite: set[int], written: set[int]):
+        for guild_id, lines in batches.items():
+            path = self._path(guild_id)
+            if guild_id in rewrite:
+                if not lines:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            else:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            written.add(guild_id)
+
+    async def flush(self):
+        # O lock garante que dois flushes não gravem lotes fora de ordem
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batches, self._pending = self._pending, defaultdict(list)
+            rewrite, self._rewrite = self._rewrite, set()
+            written: set[int] = set()
+            try:
+                await asyncio.to_thread(self._write, batches, rewrite, written)
+            except Exception:
+                self._requeue(batches, rewrite, written)
+                raise
+
+    def _requeue(self, batches: dict[int, list[str]], rewrite: set[int], written: set[int]):
+        """Devolve ao início da fila o que não chegou ao disco, para o próximo flush tentar de novo."""
+        for guild_id, lines in batches.items():
+            # Já gravado, ou substituído por um snapshot/forget mais novo que chegou durante a escrita
+            if guild_id in written or guild_id in self._rewrite:
+                continue
+            self._pending[guild_id] = lines + self._pending[guild_id]
+            if guild_id in rewrite:
+                self._rewrite.add(guild_id)
+
+    def needs_compaction(self, guild_id: int) -> bool:
+        return self._op_counts.get(guild_id, 0) >= self.compact_after
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Erro ao gravar o diário das filas: {e}")
+
+    # --- LEITURA ---
+    def _load(self) -> dict[int, GuildQueueState]:
+        states = {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".jsonl"):
+                continue
+            state = GuildQueueState()
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        state.apply(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        # Última linha cortada por um crash: o resto do diário continua válido
+                        continue
+            if state.voice_channel_id and (state.current or state.queue):
+                states[int(filename[:-6])] = state
+        return states
+
+    async def load_all(self) -> dict[int, GuildQueueState]:
+        """Reconstrói o estado de todas as guilds com fila salva."""
+        return await asyncio.to_thread(self._load)
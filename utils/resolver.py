@@ -0,0 +1,52 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def resolve_in_order(
+    source: AsyncIterable[T],
+    resolve: Callable[[T], Awaitable[R]],
+    concurrency: int = 8,
+) -> AsyncIterator[tuple[int, T, R | None]]:
+    """
+    Resolve os itens de `source` com no máximo `concurrency` tarefas em paralelo,
+    entregando os resultados na mesma ordem em que os itens chegaram.
+
+    A fonte é consumida aos poucos (streaming): o primeiro resultado pode ser
+    entregue antes de a fonte terminar. Falhas viram `None` no resultado.
+    """
+    concurrency = max(1, concurrency)
+    pending: deque[tuple[int, T, asyncio.Task]] = deque()
+
+    async def _safe(item: T) -> R | None:
+        try:
+            return await resolve(item)
+        except Exception as e:
+            print(f"Falha ao resolver '{item}': {e}")
+            return None
+
+    try:
+        index = 0
+        async for item in source:
+            pending.append((index, item, asyncio.create_task(_safe(item))))
+            index += 1
+
+            # Entrega tudo que já está pronto no começo da fila, sem bloquear a leitura da fonte
+            while pending and pending[0][2].done():
+                i, it, task = pending.popleft()
+                yield i, it, task.result()
+
+            # Janela cheia: espera o primeiro da fila para manter a ordem e o limite
+            while len(pending) >= concurrency:
+                i, it, task = pending.popleft()
+                yield i, it, await task
+
+        while pending:
+            i, it, task = pending.popleft()
+            yield i, it, await task
+    finally:
+        for _, _, task in pending:
+            task.cancel()
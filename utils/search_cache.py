@@ -0,0 +1,184 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import wavelink
+
+from utils.storage import data_path
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza a busca para que variações de espaço/maiúsculas caiam na mesma chave.
+    Links ficam como vieram: os IDs do YouTube diferenciam maiúsculas de minúsculas.
+    """
+    if "://" in query:
+        return query.strip()
+    return " ".join(query.lower().split())
+
+
+def _serialize(result: wavelink.Search) -> dict:
+    """Converte o resultado do Lavalink em um payload JSON (com as faixas codificadas)."""
+    if isinstance(result, wavelink.Playlist):
+        return {
+            "type": "playlist",
+            "info": {"name": result.name, "selectedTrack": result.selected},
+            "pluginInfo": {"type": result.type, "url": result.url, "artworkUrl": result.artwork, "author": result.author},
+            "tracks": [track.raw_data for track in result.tracks],
+        }
+    return {"type": "tracks", "tracks": [track.raw_data for track in result]}
+
+
+def _deserialize(payload: dict) -> wavelink.Search:
+    """Reconstrói os objetos do wavelink a partir do payload, sem falar com o Lavalink."""
+    if payload["type"] == "playlist":
+        return wavelink.Playlist(payload)
+    return [wavelink.Playable(data) for data in payload["tracks"]]
+
+
+class SearchCache:
+    """
+    Cache de buscas em duas camadas na frente de `wavelink.Playable.search`.
+
+    1. Memória: LRU com TTL e tamanho máximo.
+    2. Disco: SQLite, sobrevive a reinícios.
+
+    Guarda o payload das faixas (incluindo o `encoded`), então um acerto reconstrói
+    os `Playable` sem nenhuma ida ao Lavalink. Cada acerto devolve objetos novos,
+    para que `extras` de uma guild não vaze para outra.
+    """
+
+    def __init__(self, *, max_entries: int = 5000, memory_ttl: float = 6 * 3600,
+                 disk_ttl: float = 7 * 24 * 3600, max_disk_entries: int = 200_000, path: str | None = None):
+        self.max_entries = max_entries
+        self.memory_ttl = memory_ttl
+        self.disk_ttl = disk_ttl
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path or data_path("search_cache.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, payload TEXT NOT NULL, created REAL NOT NULL)")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < 1:
+            # Versão 0 guardava links em minúsculas: dois links diferentes podiam dividir a mesma entrada
+            self._db.execute("DELETE FROM search_cache WHERE key LIKE '%://%'")
+            self._db.execute("PRAGMA user_version = 1")
+        self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, source: str | None) -> str:
+        return f"{source or ''}:{normalize_query(query)}"
+
+    # --- CAMADA EM MEMÓRIA ---
+    def _memory_get(self, key: str) -> dict | None:
+        entry = self._memory.get(key)
+        if not entry:
+            return None
+        created, payload = entry
+        if time.time() - created > self.memory_ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return payload
+
+    def _memory_put(self, key: str, payload: dict, created: float):
+        self._memory[key] = (created, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- CAMADA EM DISCO (roda em thread para não travar o event loop) ---
+    def _disk_get(self, key: str) -> tuple[float, dict] | None:
+        with self._db_lock:
+            row = self._db.execute("SELECT created, payload FROM search_cache WHERE key = ?", (key,)).fetchone()
+        if not row or time.time() - row[0] > self.disk_ttl:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _disk_put(self, key: str, payload: dict, created: float):
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO search_cache (key, payload, created) VALUES (?, ?, ?)", (key, json.dumps(payload), created))
+            self._db.commit()
+
+    def _disk_prune(self):
+        with self._db_lock:
+            self._db.execute("DELETE FROM search_cache WHERE created < ?", (time.time() - self.disk_ttl,))
+            self._db.execute(
+                "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self._db.commit()
+
+    def _disk_first_tracks(self, limit: int) -> list[dict]:
+        """Primeira faixa de cada busca (não de playlists) guardada em disco, das mais novas para as mais antigas."""
+        with self._db_lock:
+            rows = self._db.execute("SELECT payload FROM search_cache ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        tracks = []
+        for (payload,) in rows:
+            payload = json.loads(payload)
+            if payload["type"] == "tracks" and payload["tracks"]:
+                tracks.append(payload["tracks"][0]["info"])
+        return tracks
+
+    # --- API PÚBLICA ---
+    async def get(self, query: str, source: str | None = None) -> list[wavelink.Playable] | wavelink.Playlist | None:
+        key = self.make_key(query, source)
+
+        payload = self._memory_get(key)
+        if payload is not None:
+            self.memory_hits += 1
+            return _deserialize(payload)
+
+        entry = await asyncio.to_thread(self._disk_get, key)
+        if entry is not None:
+            self.disk_hits += 1
+            created, payload = entry
+            self._memory_put(key, payload, created)
+            return _deserialize(payload)
+
+        self.misses += 1
+        return None
+
+    async def put(self, query: str, source: str | None, result: wavelink.Search):
+        # Resultados vazios e transmissões ao vivo não são guardados
+        if not result:
+            return
+        tracks = result.tracks if isinstance(result, wavelink.Playlist) else result
+        if any(track.is_stream for track in tracks):
+            return
+
+        key = self.make_key(query, source)
+        payload = _serialize(result)
+        created = time.time()
+        self._memory_put(key, payload, created)
+        await asyncio.to_thread(self._disk_put, key, payload, created)
+
+    async def prune(self):
+        """Remove do disco entradas expiradas e as mais antigas acima do limite."""
+        await asyncio.to_thread(self._disk_prune)
+
+    async def recent_tracks(self, limit: int) -> list[dict]:
+        """`info` (título, autor, uri...) da faixa escolhida pelas buscas mais recentes em disco."""
+        return await asyncio.to_thread(self._disk_first_tracks, limit)
+
+    def stats(self) -> dict:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
@@ -0,0 +1,190 @@
+import asyncio
+import base64
+import os
+import time
+
+import aiohttp
+
+from utils.metrics import SPOTIFY_LATENCY
+from utils.resolver import resolve_in_order
+
+# Maior `Retry-After` que vale esperar; acima disso a requisição falha na hora
+MAX_RETRY_AFTER = 30
+
+
+class SpotifyError(Exception):
+    """Erro retornado pela API do Spotify (ou pelo servidor de autenticação)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Spotify respondeu {status}: {message}")
+        self.status = status
+
+
+def _endpoint_label(url: str) -> str:
+    """Primeiro segmento do caminho (tracks, playlists, albums, search): rótulo sem IDs."""
+    path = url.split("://", 1)[-1].split("?", 1)[0].split("/")
+    segments = [part for part in path[1:] if part and part != "v1"]
+    return segments[0] if segments else "unknown"
+
+
+class _Token:
+    """Token de client-credentials compartilhado por todos os clientes com o mesmo client_id."""
+
+    def __init__(self):
+        self.value: str | None = None
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def valid(self) -> bool:
+        # Renova um minuto antes de expirar para nenhuma requisição sair com token vencido
+        return self.value is not None and time.monotonic() < self.expires_at - 60
+
+
+class SpotifyClient:
+    """
+    Cliente assíncrono da Web API do Spotify, feito para rodar no event loop do bot.
+
+    - Uma única `aiohttp.ClientSession` com pool de conexões (keep-alive).
+    - Token de client-credentials em cache, renovado automaticamente.
+    - Páginas de playlists/álbuns buscadas em paralelo a partir de `offset`/`total`.
+    - Respeita `Retry-After` em respostas 429 (até `MAX_RETRY_AFTER` segundos).
+    - Erros de rede e respostas 5xx são repetidos com espera exponencial.
+
+    `api_base` e `token_url` podem apontar para um servidor local (ex: um stub de testes),
+    também via SPOTIFY_API_BASE e SPOTIFY_TOKEN_URL.
+    """
+
+    API_BASE = "https://api.spotify.com/v1"
+    TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+    _tokens: dict[str, _Token] = {}
+
+    def __init__(self, client_id: str, client_secret: str, *, api_base: str | None = None, token_url: str | None = None,
+                 max_connections: int = 20, page_concurrency: int = 4, max_retries: int = 5):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = (api_base or os.getenv("SPOTIFY_API_BASE") or self.API_BASE).rstrip('/')
+        self.token_url = token_url or os.getenv("SPOTIFY_TOKEN_URL") or self.TOKEN_URL
+        self.max_connections = max_connections
+        self.page_concurrency = page_concurrency
+        self.max_retries = max_retries
+        self._session: aiohttp.ClientSession | None = None
+        self._token = self._tokens.setdefault(client_id, _Token())
+
+    # --- SESSÃO E AUTENTICAÇÃO ---
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Criada sob demanda para nascer dentro do event loop em execução
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=15))
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _get_access_token(self, force: bool = False) -> str:
+        if not force and self._token.valid():
+            return self._token.value
+
+        async with self._token.lock:
+            # Outra corrotina pode ter renovado enquanto esperávamos o lock
+            if not force and self._token.valid():
+                return self._token.value
+
+            credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            headers = {"Authorization": f"Basic {credentials}"}
+            async with self._get_session().post(self.token_url, data={"grant_type": "client_credentials"}, headers=headers) as resp:
+                if resp.status != 200:
+                    raise SpotifyError(resp.status, await resp.text())
+                data = await resp.json()
+
+            self._token.value = data["access_token"]
+            self._token.expires_at = time.monotonic() + data.get("expires_in", 3600)
+            return self._token.value
+
+    # --- REQUISIÇÕES ---
+    async def _get(self, path: str, params: dict | None = None) -> dict:
+        url = path if path.startswith("http") else f"{self.api_base}{path}"
+        force_token = False
+
+        last_error = SpotifyError(0, "nenhuma tentativa feita")
+
+        for attempt in range(self.max_retries + 1):
+            token = await self._get_access_token(force=force_token)
+            force_token = False
+            started = time.perf_counter()
+            try:
+                async with self._get_session().get(url, params=params, headers={"Authorization": f"Bearer {token}"}) as resp:
+                    SPOTIFY_LATENCY.observe(_endpoint_label(url), resp.status, value=time.perf_counter() - started)
+                    if resp.status == 200:
+                        return await resp.json()
+
+                    if resp.status == 429:
+                        # Rate limit: o Spotify diz quanto tempo esperar (em segundos; outro formato vira a espera padrão)
+                        try:
+                            delay = float(resp.headers.get("Retry-After", 1))
+                        except ValueError:
+                            delay = min(2 ** attempt, 10)
+                        if delay > MAX_RETRY_AFTER:
+                            raise SpotifyError(429, f"Retry-After de {delay:.0f}s, acima do limite de {MAX_RETRY_AFTER}s")
+                    elif resp.status == 401 and attempt == 0:
+                        # Token revogado/expirado antes do previsto: renova e tenta de novo
+                        force_token = True
+                        continue
+                    elif resp.status >= 500:
+                        delay = min(2 ** attempt, 10)
+                    else:
+                        raise SpotifyError(resp.status, await resp.text())
+                    last_error = SpotifyError(resp.status, "número máximo de tentativas excedido")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Falha de rede: uma oscilação não derruba a página inteira do /splay
+                SPOTIFY_LATENCY.observe(_endpoint_label(url), 0, value=time.perf_counter() - started)
+                delay = min(2 ** attempt, 10)
+                last_error = SpotifyError(0, f"falha de rede: {e!r}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def track(self, track_id: str) -> dict:
+        return await self._get(f"/tracks/{track_id}")
+
+    async def search(self, query: str, type: str = "track", limit: int = 1) -> dict:
+        return await self._get("/search", params={"q": query, "type": type, "limit": limit})
+
+    async def playlist(self, playlist_id: str, fields: str | None = None) -> dict:
+        params = {"fields": fields} if fields else None
+        return await self._get(f"/playlists/{playlist_id}", params=params)
+
+    async def iter_pages(self, path: str, limit: int, params: dict | None = None):
+        """
+        Gera as páginas de um recurso paginado, em ordem.
+
+        A primeira página informa o `total`; as demais são pedidas em paralelo
+        (até `page_concurrency` ao mesmo tempo) calculando os offsets diretamente,
+        em vez de seguir o campo `next` uma a uma.
+        """
+        params = dict(params or {})
+        first = await self._get(path, params={**params, "limit": limit, "offset": 0})
+        yield first
+
+        async def offsets():
+            for offset in range(limit, first.get("total", 0), limit):
+                yield offset
+
+        async def fetch(offset: int) -> dict:
+            return await self._get(path, params={**params, "limit": limit, "offset": offset})
+
+        async for _, offset, page in resolve_in_order(offsets(), fetch, concurrency=self.page_concurrency):
+            if page is None:
+                raise SpotifyError(0, f"falha ao buscar a página com offset {offset}")
+            yield page
+
+    def playlist_pages(self, playlist_id: str, fields: str | None = None):
+        params = {"fields": fields} if fields else None
+        return self.iter_pages(f"/playlists/{playlist_id}/tracks", limit=100, params=params)
+
+    def album_pages(self, album_id: str):
+        return self.iter_pages(f"/albums/{album_id}/tracks", limit=50)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from utils.storage import data_path
+
+
+def simplify_track(track: dict) -> dict:
+    """Reduz um objeto de faixa da API do Spotify ao que o bot usa."""
+    return {
+        "id": track.get("id"),
+        "name": track["name"],
+        "artists": [artist["name"] for artist in track.get("artists", [])],
+        "isrc": (track.get("external_ids") or {}).get("isrc"),
+        "duration_ms": track.get("duration_ms", 0),
+    }
+
+
+class SpotifyStore:
+    """
+    Armazena localmente (SQLite) entidades já resolvidas do Spotify:
+
+    - faixas (nome, artistas, ISRC, duração);
+    - álbuns (a lista de faixas de um álbum não muda);
+    - playlists versionadas pelo `snapshot_id`;
+    - a última faixa do Lavalink que cada ID do Spotify encontrou.
+
+    Com isso, uma playlist que não mudou custa uma única requisição de metadados,
+    e faixas já vistas voltam para a fila sem nova busca no Lavalink.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or data_path("spotify.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS albums (id TEXT PRIMARY KEY, track_ids TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS playlists (id TEXT PRIMARY KEY, snapshot_id TEXT NOT NULL, name TEXT, track_ids TEXT NOT NULL, updated REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS matches (spotify_id TEXT PRIMARY KEY, track TEXT NOT NULL, updated REAL NOT NULL);
+        """)
+        self._db.commit()
+
+    # --- ACESSO SÍNCRONO (sempre chamado via asyncio.to_thread) ---
+    def _get_tracks(self, ids: list[str]) -> dict[str, dict]:
+        found = {}
+        with self._lock:
+            # Consultas em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._db.execute(f"SELECT id, data FROM tracks WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((row[0], json.loads(row[1])) for row in rows)
+        return found
+
+    def _get_matches(self, ids: list[str]) -> dict[str, dict]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._db.execute(f"SELECT spotify_id, track FROM matches WHERE spotify_id IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((row[0], json.loads(row[1])) for row in rows)
+        return found
+
+    def _save_tracks(self, tracks: list[dict]):
+        rows = [(track["id"], json.dumps(track)) for track in tracks if track.get("id")]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO tracks (id, data) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def _get_collection(self, table: str, entity_id: str) -> tuple | None:
+        with self._lock:
+            if table == "playlists":
+                return self._db.execute("SELECT snapshot_id, name, track_ids FROM playlists WHERE id = ?", (entity_id,)).fetchone()
+            return self._db.execute("SELECT track_ids FROM albums WHERE id = ?", (entity_id,)).fetchone()
+
+    def _save_playlist(self, playlist_id: str, snapshot_id: str, name: str, track_ids: list[str]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO playlists (id, snapshot_id, name, track_ids, updated) VALUES (?, ?, ?, ?, ?)",
+                (playlist_id, snapshot_id, name, json.dumps(track_ids), time.time())
+            )
+            self._db.commit()
+
+    def _save_album(self, album_id: str, track_ids: list[str]):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO albums (id, track_ids) VALUES (?, ?)", (album_id, json.dumps(track_ids)))
+            self._db.commit()
+
+    def _save_match(self, spotify_id: str, track_payload: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO matches (spotify_id, track, updated) VALUES (?, ?, ?)",
+                (spotify_id, json.dumps(track_payload), time.time())
+            )
+            self._db.commit()
+
+    # --- API ASSÍNCRONA ---
+    async def get_tracks(self, ids: list[str]) -> dict[str, dict]:
+        return await asyncio.to_thread(self._get_tracks, ids)
+
+    async def save_tracks(self, tracks: list[dict]):
+        await asyncio.to_thread(self._save_tracks, tracks)
+
+    async def get_playlist(self, playlist_id: str, snapshot_id: str) -> list[str] | None:
+        """Retorna os IDs das faixas se a versão guardada for a mesma `snapshot_id`."""
+        row = await asyncio.to_thread(self._get_collection, "playlists", playlist_id)
+        if not row or row[0] != snapshot_id:
+            return None
+        return json.loads(row[2])
+
+    async def save_playlist(self, playlist_id: str, snapshot_id: str, name: str, track_ids: list[str]):
+        await asyncio.to_thread(self._save_playlist, playlist_id, snapshot_id, name, track_ids)
+
+    async def get_album(self, album_id: str) -> list[str] | None:
+        row = await asyncio.to_thread(self._get_collection, "albums", album_id)
+        return json.loads(row[0]) if row else None
+
+    async def save_album(self, album_id: str, track_ids: list[str]):
+        await asyncio.to_thread(self._save_album, album_id, track_ids)
+
+    async def get_matches(self, ids: list[str]) -> dict[str, dict]:
+        """Payloads das faixas do Lavalink que cada ID do Spotify encontrou da última vez."""
+        return await asyncio.to_thread(self._get_matches, ids)
+
+    async def save_match(self, spotify_id: str, track_payload: dict):
+        await asyncio.to_thread(self._save_match, spotify_id, track_payload)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
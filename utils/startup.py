@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import time
+
+from discord import app_commands
+
+from utils.metrics import registry
+from utils.storage import data_path
+
+STARTUP_PHASE = registry.gauge("boris_startup_phase_seconds", "Duração de cada fase da inicialização do bot.", ("phase",))
+
+SYNC_STATE_FILE = "command_sync.json"
+
+
+class BootTimer:
+    """
+    Cronometra as fases da inicialização. `mark` fecha uma fase sequencial (desde a marca
+    anterior); `measure` cronometra uma corrotina, então fases medidas assim podem rodar em paralelo.
+    """
+
+    def __init__(self, started: float | None = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self._last_mark = 0.0
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+        STARTUP_PHASE.set(phase, value=seconds)
+
+    def mark(self, phase: str | None = None):
+        now = self.elapsed()
+        if phase:
+            self.record(phase, now - self._last_mark)
+        self._last_mark = now
+
+    async def measure(self, phase: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.record(phase, time.perf_counter() - started)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        return ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases.items())
+
+
+def command_schema_hash(tree: app_commands.CommandTree) -> str:
+    """Hash do que é enviado ao Discord na sincronização: nomes, descrições, opções, permissões."""
+    commands = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda data: (data.get("type", 1), data["name"]))
+    return hashlib.sha256(json.dumps(commands, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _load_sync_state() -> dict:
+    try:
+        with open(data_path(SYNC_STATE_FILE), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+async def sync_if_changed(tree: app_commands.CommandTree, application_id: int | None) -> int | None:
+    """
+    Sincroniza os comandos de barra só se o esquema mudou desde a última sincronização
+    desta aplicação. Retorna quantos comandos foram sincronizados, ou None se foi pulado.
+    Com FORCE_COMMAND_SYNC=1 no ambiente, sincroniza mesmo sem mudança.
+    """
+    schema_hash = command_schema_hash(tree)
+    state = _load_sync_state()
+    key = str(application_id)
+    forced = os.getenv("FORCE_COMMAND_SYNC", "").lower() in ("1", "true", "sim")
+    if not forced and state.get(key) == schema_hash:
+        return None
+
+    synced = await tree.sync()
+    state[key] = schema_hash
+    with open(data_path(SYNC_STATE_FILE), "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    return len(synced)
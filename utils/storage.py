@@ -0,0 +1,11 @@
+import os
+
+# Pasta onde o bot guarda seus arquivos locais (caches, bancos SQLite, etc.)
+DATA_DIR = os.getenv("BORIS_DATA_DIR", "data")
+
+
+def data_path(*parts: str) -> str:
+    """Monta um caminho dentro de DATA_DIR, criando as pastas se necessário."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,252 @@
+import asyncio
+import importlib.util
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import wavelink
+
+from utils import ytdlp_worker
+from utils.metrics import registry, timed_search
+
+FALLBACK_REQUESTS = registry.counter("boris_ytdlp_fallback_total", "Buscas resolvidas pelo yt-dlp quando o Lavalink não achou nada.", ("outcome",))
+FALLBACK_LATENCY = registry.histogram("boris_ytdlp_fallback_duration_seconds", "Tempo de uma extração do yt-dlp (incluindo a espera por um processo livre).")
+
+# Estados do disjuntor
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+# Prazo mínimo (segundos) que uma extração precisa ter ao conseguir um processo; com menos, nem começa
+MIN_BUDGET = 5.0
+
+
+class FallbackBusy(Exception):
+    """Os processos ficaram ocupados até não sobrar prazo para a extração. Não é falha do yt-dlp."""
+
+
+class YtDlpResolver:
+    """
+    Plano B do /play: quando o Lavalink não acha nada (ou recusa a busca), o yt-dlp extrai
+    a faixa em um `ProcessPoolExecutor` e a URL direta do áudio volta para o Lavalink,
+    que a toca pela fonte HTTP. Nada da extração roda no event loop.
+
+    - Cada chamada tem um prazo (`timeout`), contando a espera por um processo livre. Se o
+      processo só fica livre com menos de `MIN_BUDGET` segundos de prazo, a chamada é
+      descartada sem rodar (e sem contar como falha para o disjuntor).
+    - Resultados ficam em cache por `cache_ttl` (as URLs diretas expiram depois de algumas
+      horas); buscas sem resultado ficam `negative_ttl` segundos sem nova tentativa.
+    - Disjuntor: depois de `failure_threshold` falhas seguidas (erro ou prazo estourado),
+      o yt-dlp fica `reset_after` segundos sem ser chamado; então uma única chamada de
+      teste decide se ele volta.
+
+    O pool só é criado na primeira extração, e o yt-dlp só é importado dentro dos processos.
+    Com "spawn", cada processo novo ainda importa de novo o módulo principal do bot (main.py
+    ou cluster.py, como `__mp_main__`), com discord e wavelink: a subida custa isso, uma vez
+    a cada `max_tasks_per_child` extrações.
+    """
+
+    def __init__(self, *, max_workers: int = 2, timeout: float = 20.0, cache_ttl: float = 3600,
+                 negative_ttl: float = 300, max_entries: int = 1000, failure_threshold: int = 5, reset_after: float = 60.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+
+        self.available = importlib.util.find_spec("yt_dlp") is not None
+        self._pool: ProcessPoolExecutor | None = None
+        # Uma extração por processo: o resto espera aqui, não na fila interna do pool
+        self._slots = asyncio.Semaphore(max_workers)
+        # Extrações que estouraram o prazo e ainda ocupam um processo
+        self._stuck = 0
+        self._cache: OrderedDict[str, tuple[float, dict | None]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        registry.gauge("boris_ytdlp_breaker_open", "1 quando o disjuntor do yt-dlp está aberto.", collect=lambda: [((), int(self.state != CLOSED))])
+
+    # --- DISJUNTOR ---
+    def _allow(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            # Só uma chamada de teste por vez
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == CLOSED
+
+    def _record_success(self):
+        self._failures = 0
+        self._probing = False
+        self.state = CLOSED
+
+    def _record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                print(f"yt-dlp: {self._failures} falha(s) seguidas, pausando o plano B por {self.reset_after:.0f}s.")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    # --- CACHE ---
+    def _cache_get(self, key: str) -> tuple[bool, dict | None]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        expires, result = entry
+        if time.monotonic() > expires:
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, result
+
+    def _cache_put(self, key: str, result: dict | None):
+        self._cache[key] = (time.monotonic() + (self.cache_ttl if result else self.negative_ttl), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    # --- POOL ---
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn": os processos não herdam as threads e conexões abertas do bot
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=50)
+        return self._pool
+
+    def _recycle(self):
+        """Todos os processos estão presos em extrações que passaram do prazo: começa um pool novo."""
+        pool, self._pool = self._pool, None
+        self._stuck = 0
+        if pool is None:
+            return
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        print("yt-dlp: processos travados encerrados, o pool será recriado na próxima busca.")
+
+    async def _extract(self, query: str) -> dict | None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        min_budget = min(MIN_BUDGET, self.timeout / 2)
+        try:
+            # A espera por um processo livre também respeita o prazo
+            await asyncio.wait_for(self._slots.acquire(), self.timeout - min_budget)
+        except asyncio.TimeoutError:
+            FALLBACK_LATENCY.observe(value=time.perf_counter() - started)
+            raise FallbackBusy() from None
+        try:
+            remaining = self.timeout - (time.perf_counter() - started)
+            if remaining < min_budget:
+                raise FallbackBusy()
+            future = loop.run_in_executor(self._executor(), ytdlp_worker.extract, query)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                # O processo continua preso na extração até ela terminar sozinha
+                self._stuck += 1
+                future.add_done_callback(self._release_stuck)
+                if self._stuck >= self.max_workers:
+                    self._recycle()
+                raise
+            except BrokenProcessPool:
+                # Um processo morreu (ex: falta de memória): o pool não serve mais, o próximo é novo
+                self._recycle()
+                raise
+        finally:
+            self._slots.release()
+            FALLBACK_LATENCY.observe(value=time.perf_counter() - started)
+
+    def _release_stuck(self, future: asyncio.Future):
+        self._stuck = max(0, self._stuck - 1)
+        # Ninguém mais espera este resultado: evita o aviso de "exception was never retrieved"
+        if not future.cancelled():
+            future.exception()
+
+    # --- API PÚBLICA ---
+    async def extract(self, query: str) -> dict | None:
+        """Metadados + URL direta da primeira faixa para `query`, ou None."""
+        if not self.available:
+            return None
+        # Links diferenciam maiúsculas (IDs do YouTube); buscas por texto, não
+        key = query.strip() if "://" in query else " ".join(query.lower().split())
+        hit, result = self._cache_get(key)
+        if hit:
+            FALLBACK_REQUESTS.inc("cache")
+            return result
+
+        # Buscas iguais ao mesmo tempo dividem a mesma extração
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        if not self._allow():
+            FALLBACK_REQUESTS.inc("breaker_open")
+            return None
+
+        inflight = self._inflight[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await self._extract(query)
+        except FallbackBusy:
+            # Fila cheia, não defeito: nem disjuntor nem cache
+            FALLBACK_REQUESTS.inc("busy")
+            self._probing = False
+        except asyncio.TimeoutError:
+            FALLBACK_REQUESTS.inc("timeout")
+            self._record_failure()
+        except Exception as e:
+            FALLBACK_REQUESTS.inc("error")
+            print(f"yt-dlp: falha ao extrair '{query}': {e}")
+            self._record_failure()
+        else:
+            FALLBACK_REQUESTS.inc("found" if result else "empty")
+            self._record_success()
+            self._cache_put(key, result)
+        finally:
+            del self._inflight[key]
+            inflight.set_result(result)
+        return result
+
+    async def resolve(self, query: str) -> list[wavelink.Playable]:
+        """
+        Resolve `query` pelo yt-dlp e carrega a URL direta no Lavalink. A faixa volta com o
+        título, autor, duração e link da página originais (o que o Lavalink vê é só a URL).
+        """
+        info = await self.extract(query)
+        if not info:
+            return []
+        try:
+            found = await timed_search(info["url"], source=None)
+        except wavelink.LavalinkLoadException as e:
+            print(f"yt-dlp: o Lavalink não carregou a URL direta de '{query}': {e}")
+            return []
+        if not found or isinstance(found, wavelink.Playlist):
+            return []
+
+        data = dict(found[0].raw_data)
+        data["info"] = {
+            **data["info"],
+            "title": info["title"],
+            "author": info["author"],
+            "uri": info["webpage_url"] or data["info"].get("uri"),
+            "artworkUrl": info["thumbnail"] or data["info"].get("artworkUrl"),
+            "length": info["duration_ms"] or data["info"].get("length", 0),
+        }
+        return [wavelink.Playable(data)]
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self._failures, "cached": len(self._cache), "available": self.available}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
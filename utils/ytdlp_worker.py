@@ -0,0 +1,38 @@
+"""
+Função executada nos processos do `YtDlpResolver` (ver utils/ytdlp_fallback.py).
+
+Fica num módulo só dela, sem discord/wavelink: o yt-dlp só é importado aqui dentro, na
+primeira extração. Com "spawn" o processo ainda importa o módulo principal do bot
+(main.py ou cluster.py, como `__mp_main__`), então a subida não é de graça; o pool
+reaproveita cada processo por várias extrações.
+"""
+
+YDL_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "noplaylist": True,
+    "format": "bestaudio/best",
+    "default_search": "ytsearch1",
+    "socket_timeout": 10,
+}
+
+
+def extract(query: str) -> dict | None:
+    """Metadados e URL direta do áudio da primeira faixa para `query` (busca ou link)."""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
+        info = ydl.extract_info(query, download=False)
+    if info and info.get("entries") is not None:
+        info = next((entry for entry in info["entries"] if entry), None)
+    if not info or not info.get("url"):
+        return None
+    return {
+        "url": info["url"],
+        "title": info.get("title") or query,
+        "author": info.get("uploader") or info.get("channel") or "",
+        "duration_ms": int((info.get("duration") or 0) * 1000),
+        "webpage_url": info.get("webpage_url"),
+        "thumbnail": info.get("thumbnail"),
+    }